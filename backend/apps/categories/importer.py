@@ -0,0 +1,152 @@
+"""
+Массовый импорт категорий (формат categories_data.json)
+
+Родитель в дампе указан через id из исходной базы (parent_id),
+поэтому импорт ведет соответствие "id в дампе -> id в базе".
+Дочерняя категория, чей родитель еще не встретился в файле,
+откладывается до его появления. Соответствие и отложенные записи
+входят в состояние для checkpoint (категорий немного).
+
+Сигналы не вызываются: переиндексация worksheets переименованных
+категорий и сброс кэша API и карточек выполняются один раз в finish().
+"""
+
+from apps.core.cache import bump_content_version
+
+from .models import Category
+
+# Поля, которые импорт заполняет у категории
+IMPORT_FIELDS = ['name', 'description', 'icon', 'order', 'is_active', 'parent_id']
+
+
+class CategoryImporter:
+    """
+    Импорт категорий пачками
+
+    Параметры:
+        batch_size: размер пачки для bulk_create/bulk_update
+        log: функция для вывода предупреждений (по умолчанию print)
+    """
+
+    def __init__(self, batch_size=500, log=print):
+        self.batch_size = batch_size
+        self.log = log
+        self.stats = {'created': 0, 'updated': 0, 'skipped': 0}
+
+        # id в дампе -> [id в базе, является ли категория родительской]
+        self.id_mapping = {}
+        # Дочерние категории, чей родитель еще не импортирован
+        self.pending = []
+        # Категории, у которых изменилось название (оно входит в поисковый индекс)
+        self.renamed_ids = set()
+
+    def get_state(self):
+        return {
+            # Ключи JSON - строки
+            'id_mapping': {str(key): value for key, value in self.id_mapping.items()},
+            'pending': self.pending,
+            'renamed_ids': sorted(self.renamed_ids),
+        }
+
+    def set_state(self, state):
+        self.id_mapping = {int(key): value for key, value in state.get('id_mapping', {}).items()}
+        self.pending = state.get('pending', [])
+        self.renamed_ids = set(state.get('renamed_ids', []))
+
+    def import_rows(self, rows):
+        """Импортировать пачку; отложенные дочерние пробуем снова, пока есть прогресс"""
+        rows = self.pending + list(rows)
+        self.pending = []
+
+        while rows:
+            ready = []
+            waiting = []
+            for row in rows:
+                if row.get('parent_id') is None or row['parent_id'] in self.id_mapping:
+                    ready.append(row)
+                else:
+                    waiting.append(row)
+
+            if not ready:
+                break
+            self._upsert(ready)
+            rows = waiting
+
+        self.pending = rows
+
+    def flush(self):
+        pass
+
+    def finish(self):
+        """
+        Пропустить категории без родителя, переиндексировать worksheets
+        переименованных категорий и сбросить кэш API
+
+        Возвращает:
+            dict: статистика импорта
+        """
+        from apps.worksheets import search
+        from apps.worksheets.cards import bump_cards_version
+        from apps.worksheets.models import Worksheet
+
+        for row in self.pending:
+            self.log(
+                f"  ⚠️  Родительская категория с ID {row['parent_id']} "
+                f"не найдена для '{row.get('name')}'"
+            )
+            self.stats['skipped'] += 1
+        self.pending = []
+
+        if self.renamed_ids:
+            search.update_index(Worksheet.objects.filter(category_id__in=self.renamed_ids))
+
+        bump_content_version()
+        bump_cards_version()
+        return self.stats
+
+    def _upsert(self, rows):
+        values_by_slug = {}
+        dump_ids = {}
+        for row in rows:
+            parent_id = None
+            if row.get('parent_id') is not None:
+                parent_id, parent_is_root = self.id_mapping[row['parent_id']]
+                if not parent_is_root:
+                    # Как Category.clean(): максимум 2 уровня
+                    self.log(f"  ⚠️  Категория 3-го уровня пропущена: '{row.get('name')}'")
+                    self.stats['skipped'] += 1
+                    continue
+
+            values_by_slug[row['slug']] = {
+                'name': row['name'],
+                'description': row.get('description') or '',
+                'icon': row.get('icon') or '',
+                'order': row.get('order') or 0,
+                'is_active': bool(row.get('is_active', True)),
+                'parent_id': parent_id,
+            }
+            dump_ids[row['slug']] = row.get('id')
+
+        existing = Category.objects.in_bulk(list(values_by_slug), field_name='slug')
+
+        new_categories = [
+            Category(slug=slug, **values)
+            for slug, values in values_by_slug.items() if slug not in existing
+        ]
+        Category.objects.bulk_create(new_categories, batch_size=self.batch_size)
+        self.stats['created'] += len(new_categories)
+
+        for slug, category in existing.items():
+            if category.name != values_by_slug[slug]['name']:
+                self.renamed_ids.add(category.pk)
+            for field, value in values_by_slug[slug].items():
+                setattr(category, field, value)
+        Category.objects.bulk_update(existing.values(), IMPORT_FIELDS, batch_size=self.batch_size)
+        self.stats['updated'] += len(existing)
+
+        # Не все базы возвращают id из bulk_create - дочитываем по slug
+        for slug, category_id in Category.objects.filter(
+            slug__in=list(values_by_slug)
+        ).values_list('slug', 'id'):
+            if dump_ids[slug] is not None:
+                self.id_mapping[dump_ids[slug]] = [category_id, values_by_slug[slug]['parent_id'] is None]
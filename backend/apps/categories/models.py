@@ -4,10 +4,43 @@
 """
 
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from slugify import slugify
 
 
+class CategoryQuerySet(models.QuerySet):
+    """QuerySet категорий с агрегированными счетчиками"""
+
+    def with_worksheets_count(self):
+        """
+        Аннотировать количество опубликованных worksheets одним запросом
+
+        published_worksheets_count = свои worksheets + worksheets активных детей
+        (для дочерних категорий детей нет, поэтому это просто свои).
+        Category.get_worksheets_count() использует аннотацию, если она есть.
+        """
+        children_count = (
+            Category.objects
+            .filter(parent=OuterRef('pk'), is_active=True, worksheets__is_published=True)
+            .order_by()
+            .values('parent')
+            .annotate(total=Count('worksheets'))
+            .values('total')
+        )
+        return self.annotate(
+            own_worksheets_count=Count(
+                'worksheets',
+                filter=Q(worksheets__is_published=True),
+                distinct=True
+            ),
+            children_worksheets_count=Coalesce(Subquery(children_count), Value(0)),
+        ).annotate(
+            published_worksheets_count=F('own_worksheets_count') + F('children_worksheets_count')
+        )
+
+
 class Category(models.Model):
     """
     Категория рабочих листов (максимум 2 уровня)
@@ -71,6 +104,8 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
@@ -144,9 +179,16 @@ class Category(models.Model):
         Получить количество рабочих листов в этой категории
         Для родительской категории - сумма из всех дочерних
 
+        Если категория получена через with_worksheets_count(),
+        возвращает аннотацию без дополнительных запросов
+
         Возвращает:
             int: Количество worksheets
         """
+        annotated = getattr(self, 'published_worksheets_count', None)
+        if annotated is not None:
+            return annotated
+
         if self.is_parent:
             # Для родителя - считаем из всех детей
             count = self.worksheets.filter(is_published=True).count()
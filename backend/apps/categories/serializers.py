@@ -70,9 +70,21 @@ class CategoryTreeSerializer(serializers.ModelSerializer):
         ]
 
     def get_children(self, obj):
-        """Получить дочерние категории если это родитель"""
+        """
+        Получить дочерние категории если это родитель
+
+        Если view подгрузил детей через prefetch (active_children),
+        используем их - без запроса на каждого родителя
+        """
         if obj.is_parent:
-            children = obj.children.filter(is_active=True).order_by('order', 'name')
+            children = getattr(obj, 'active_children', None)
+            if children is None:
+                children = (
+                    obj.children.filter(is_active=True)
+                    .select_related('parent')
+                    .with_worksheets_count()
+                    .order_by('order', 'name')
+                )
             return CategorySerializer(children, many=True, context=self.context).data
         return []
 
@@ -0,0 +1,72 @@
+"""
+Тесты API категорий
+
+Запуск: cd backend && pytest
+"""
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.worksheets.models import Worksheet
+
+from .models import Category
+
+
+class CategoryQueryCountTests(TestCase):
+    """
+    Дерево и список категорий отдаются за постоянное число запросов
+
+    Дерево: COUNT пагинации + родители + prefetch детей (3 запроса),
+    список: COUNT + категории (2 запроса) - при любом числе категорий
+    """
+
+    def create_categories(self, parents_count, children_per_parent=2):
+        for number in range(parents_count):
+            parent = Category.objects.create(name=f'Раздел {number}', slug=f'razdel-{number}', order=number)
+            for child_number in range(children_per_parent):
+                child = Category.objects.create(
+                    name=f'Подраздел {number}-{child_number}',
+                    slug=f'podrazdel-{number}-{child_number}',
+                    parent=parent,
+                )
+                Worksheet.objects.create(
+                    title=f'Лист {number}-{child_number}',
+                    slug=f'list-{number}-{child_number}',
+                    description='Описание',
+                    category=child,
+                    grade_level='grade1',
+                    pdf_file=f'worksheets/pdf/list-{number}-{child_number}.pdf',
+                )
+        # Ответы кэшируются по версии контента - считаем запросы без кэша
+        cache.clear()
+
+    def assert_tree_queries(self, parents_count):
+        self.create_categories(parents_count)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/categories/tree/')
+
+        self.assertEqual(response.status_code, 200)
+        tree = response.json()['results']
+        self.assertEqual(len(tree), parents_count)
+        self.assertEqual([len(item['children']) for item in tree], [2] * parents_count)
+        self.assertEqual([item['worksheets_count'] for item in tree], [2] * parents_count)
+
+    def assert_list_queries(self, parents_count):
+        self.create_categories(parents_count)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/categories/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], parents_count * 3)
+
+    def test_tree_two_parents(self):
+        self.assert_tree_queries(2)
+
+    def test_tree_many_parents(self):
+        self.assert_tree_queries(6)
+
+    def test_list_two_parents(self):
+        self.assert_list_queries(2)
+
+    def test_list_many_parents(self):
+        self.assert_list_queries(6)
@@ -2,14 +2,35 @@
 Views для API категорий
 """
 
+from django.db.models import Prefetch
 from rest_framework import generics
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
+from apps.core.cache import VersionedCacheMixin
+
 from .models import Category
 from .serializers import CategorySerializer, CategoryTreeSerializer
 
 
+def with_active_children(queryset):
+    """
+    Подгрузить активных детей со счетчиками worksheets одним запросом
+
+    Вместе с with_worksheets_count() дерево категорий
+    отдается за 2 запроса независимо от количества категорий
+    """
+    children = (
+        Category.objects.filter(is_active=True)
+        .select_related('parent')
+        .with_worksheets_count()
+        .order_by('order', 'name')
+    )
+    return queryset.prefetch_related(
+        Prefetch('children', queryset=children, to_attr='active_children')
+    )
+
+
 @extend_schema(
     tags=['Категории'],
     summary='Список категорий',
@@ -20,11 +41,13 @@ from .serializers import CategorySerializer, CategoryTreeSerializer
     Отсортировано по полю order и названию.
     ''',
 )
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(VersionedCacheMixin, generics.ListAPIView):
     """
     Список всех активных категорий
     """
-    queryset = Category.objects.filter(is_active=True).order_by('order', 'name')
+    queryset = Category.objects.filter(
+        is_active=True
+    ).select_related('parent').with_worksheets_count().order_by('order', 'name')
     serializer_class = CategorySerializer
 
 
@@ -41,14 +64,16 @@ class CategoryListView(generics.ListAPIView):
     Максимальная глубина вложенности: 2 уровня.
     ''',
 )
-class CategoryTreeView(generics.ListAPIView):
+class CategoryTreeView(VersionedCacheMixin, generics.ListAPIView):
     """
     Дерево категорий (родители с детьми)
     """
-    queryset = Category.objects.filter(
-        is_active=True,
-        parent__isnull=True  # Только родительские категории
-    ).order_by('order', 'name')
+    queryset = with_active_children(
+        Category.objects.filter(
+            is_active=True,
+            parent__isnull=True  # Только родительские категории
+        ).with_worksheets_count().order_by('order', 'name')
+    )
     serializer_class = CategoryTreeSerializer
 
 
@@ -75,6 +100,8 @@ class CategoryDetailView(generics.RetrieveAPIView):
     """
     Детальная информация о категории с дочерними категориями
     """
-    queryset = Category.objects.filter(is_active=True)
+    queryset = with_active_children(
+        Category.objects.filter(is_active=True).select_related('parent').with_worksheets_count()
+    )
     serializer_class = CategoryTreeSerializer
     lookup_field = 'slug'
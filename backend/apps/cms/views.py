@@ -2,11 +2,12 @@
 Views для CMS API
 """
 
-from rest_framework.views import APIView
-from rest_framework.response import Response
+from rest_framework import generics
 from wagtail.models import Site
 from drf_spectacular.utils import extend_schema
 
+from apps.core.cache import VersionedCacheMixin
+
 from .models import SiteSettings
 from .serializers import SiteSettingsSerializer
 
@@ -29,12 +30,13 @@ from .serializers import SiteSettingsSerializer
         200: SiteSettingsSerializer,
     },
 )
-class SiteSettingsView(APIView):
+class SiteSettingsView(VersionedCacheMixin, generics.RetrieveAPIView):
     """
     Глобальные настройки сайта
     """
+    serializer_class = SiteSettingsSerializer
 
-    def get(self, request):
+    def get_object(self):
         """Получить настройки для текущего сайта"""
         # Получаем текущий Site (Wagtail поддерживает multi-site)
         site = Site.objects.filter(is_default_site=True).first()
@@ -42,8 +44,4 @@ class SiteSettingsView(APIView):
             site = Site.objects.first()
 
         # Получаем настройки для этого сайта
-        settings = SiteSettings.for_site(site)
-
-        # Сериализуем и возвращаем
-        serializer = SiteSettingsSerializer(settings)
-        return Response(serializer.data)
+        return SiteSettings.for_site(site)
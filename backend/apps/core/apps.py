@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+    verbose_name = 'Общие компоненты'
+
+    def ready(self):
+        # Импортируем сигналы
+        import apps.core.signals
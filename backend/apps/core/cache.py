@@ -0,0 +1,111 @@
+"""
+Версионированный кэш ответов API для редко меняющихся данных
+
+Все закэшированные ответы привязаны к общей "версии контента".
+Версия меняется сигналами при сохранении/удалении категорий, тегов,
+рабочих листов и настроек сайта (см. signals.py) - после этого
+старые ключи просто перестают использоваться.
+
+Та же версия отдается в заголовке ETag, поэтому повторный запрос
+с If-None-Match получает 304 без обращения к базе.
+
+Кэш должен быть общим для всех gunicorn воркеров (см. CACHES в settings).
+Сама версия хранится в отдельном кэше 'versions': при переполнении
+основного кэша Django удаляет случайные записи, и потеря версии
+сбрасывала бы весь кэш API.
+"""
+
+import hashlib
+import uuid
+
+from django.core.cache import cache, caches
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+
+CONTENT_VERSION_KEY = 'api:content_version'
+
+# Время жизни закэшированного ответа (страховка на случай пропущенной инвалидации)
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+
+def get_version(key):
+    """
+    Текущая версия из кэша 'versions' (создается при первом обращении)
+
+    Возвращает:
+        str: короткий идентификатор версии, например '3f9a1c0b2e4d'
+    """
+    versions = caches['versions']
+    version = versions.get(key)
+    if version is None:
+        # add() не перезапишет версию, если ее успел создать другой воркер
+        versions.add(key, uuid.uuid4().hex[:12], None)
+        version = versions.get(key)
+    return version
+
+
+def bump_version(key):
+    """Сменить версию в кэше 'versions'"""
+    caches['versions'].set(key, uuid.uuid4().hex[:12], None)
+
+
+def get_content_version():
+    """Текущая версия контента"""
+    return get_version(CONTENT_VERSION_KEY)
+
+
+def bump_content_version():
+    """Сменить версию контента (инвалидирует все версионированные ответы)"""
+    bump_version(CONTENT_VERSION_KEY)
+
+
+def make_etag(version):
+    return f'W/"{version}"'
+
+
+class VersionedCacheMixin:
+    """
+    Mixin для GET views: кэш ответа по версии контента + ETag/304
+
+    Использование:
+        class TagListView(VersionedCacheMixin, generics.ListAPIView):
+            ...
+
+    Ключ кэша включает путь с query-параметрами, поэтому
+    ?page=2 и ?page=3 кэшируются отдельно.
+    """
+
+    cache_timeout = RESPONSE_CACHE_TIMEOUT
+
+    def get(self, request, *args, **kwargs):
+        version = get_content_version()
+        etag = make_etag(version)
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            return self._add_validators(response, etag)
+
+        key = self._response_cache_key(request, version)
+        data = cache.get(key)
+
+        if data is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(key, response.data, self.cache_timeout)
+        else:
+            response = Response(data)
+
+        return self._add_validators(response, etag)
+
+    def _response_cache_key(self, request, version):
+        path_hash = hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+        return f'api:response:{version}:{path_hash}'
+
+    def _add_validators(self, response, etag):
+        response['ETag'] = etag
+        # Браузер может хранить ответ, но обязан перепроверять его через ETag
+        patch_cache_control(response, no_cache=True)
+        return response
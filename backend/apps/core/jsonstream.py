@@ -0,0 +1,116 @@
+"""
+Потоковое чтение больших JSON-дампов (массив объектов верхнего уровня)
+
+json.load() держит в памяти весь файл и все записи сразу. Здесь файл
+читается блоками по READ_SIZE байт, а записи разбираются по одной
+через JSONDecoder.raw_decode - память ограничена размером блока
+и одной пачки записей, независимо от размера файла.
+
+Для каждой записи отдается байтовая позиция сразу после нее:
+ее можно сохранить в checkpoint и продолжить чтение с этого места.
+
+Пример:
+    for chunk in iter_chunks(iter_json_array('worksheets_data.json'), 500):
+        records = [record for record, offset in chunk]
+        ...
+"""
+
+import codecs
+import json
+from itertools import islice
+
+# Размер блока чтения файла
+READ_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+# Символы, после которых число верхнего уровня точно закончилось
+_DELIMITERS = _WHITESPACE + ',]'
+
+
+def iter_json_array(path, offset=0):
+    """
+    Перебрать элементы JSON-массива из файла, не загружая его целиком
+
+    Параметры:
+        path: путь к файлу
+        offset: байтовая позиция, с которой продолжить
+            (0 - с начала файла, иначе - позиция после записи из предыдущего запуска)
+
+    Возвращает:
+        iterator: пары (запись, байтовая позиция сразу после нее)
+
+    Исключения:
+        ValueError: файл не является JSON-массивом или поврежден
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+
+        buffer = ''
+        pos = 0            # позиция разбора в buffer
+        start = 0          # начало еще не отданной части buffer
+        consumed = offset  # байтовая позиция, соответствующая buffer[start]
+        eof = False
+        in_array = offset > 0
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+
+            record = end = None
+            if pos < len(buffer):
+                char = buffer[pos]
+                if not in_array:
+                    if char != '[':
+                        raise ValueError('Ожидается JSON-массив записей')
+                    in_array = True
+                    pos += 1
+                    continue
+                if char == ',':
+                    pos += 1
+                    continue
+                if char == ']':
+                    return
+
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+
+            # Запись могла оборваться на границе блока. Число без
+            # разделителя после него тоже: из "1." raw_decode разберет 1,
+            # а дробная часть придет в следующем блоке
+            if end is None or not eof and (
+                end == len(buffer)
+                or _is_number(record) and buffer[end] not in _DELIMITERS
+            ):
+                if eof:
+                    raise ValueError('Неожиданный конец файла: массив не закрыт')
+                # Отбрасываем отданную часть и дочитываем следующий блок
+                buffer, pos, start = buffer[start:], pos - start, 0
+                data = f.read(READ_SIZE)
+                eof = not data
+                buffer += utf8.decode(data, final=eof)
+                continue
+
+            consumed += len(buffer[start:end].encode('utf-8'))
+            pos = start = end
+            yield record, consumed
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def iter_chunks(iterable, size):
+    """Разбить итератор на списки по size элементов"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
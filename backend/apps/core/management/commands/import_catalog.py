@@ -0,0 +1,157 @@
+"""
+Импорт всего каталога (категории, теги, рабочие листы) одной командой
+
+Раньше import_all.sh запускал три отдельных процесса: каждый заново
+выполнял django.setup() и заново читал справочники из базы. Здесь все
+три файла импортируются в одном процессе и одной транзакции в порядке
+зависимостей: категории -> теги -> рабочие листы. Наличие PDF в
+хранилище проверяется параллельно (см. WorksheetImporter).
+
+С --json вместо текстового отчета в stdout выводится JSON-сводка
+(предупреждения - в stderr), которую удобно разбирать в скриптах.
+
+Для очень больших дампов с продолжением после сбоя - manage.py import_dump.
+
+Примеры:
+    python manage.py import_catalog
+    python manage.py import_catalog --dir /app --json > import_summary.json
+    python manage.py import_catalog --dry-run
+"""
+
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.categories.importer import CategoryImporter
+from apps.tags.importer import TagImporter
+from apps.worksheets.importer import WorksheetImporter
+
+
+class DryRunRollback(Exception):
+    """Откат транзакции в режиме --dry-run"""
+
+
+class Command(BaseCommand):
+    help = 'Импортирует категории, теги и рабочие листы в одном процессе и одной транзакции'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir',
+            default='.',
+            help='Папка с JSON файлами (по умолчанию текущая)',
+        )
+        parser.add_argument(
+            '--categories',
+            default='categories_data.json',
+            help='Файл категорий относительно --dir',
+        )
+        parser.add_argument(
+            '--tags',
+            default='tags_data.json',
+            help='Файл тегов относительно --dir',
+        )
+        parser.add_argument(
+            '--worksheets',
+            default='worksheets_data.json',
+            help='Файл рабочих листов относительно --dir',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Размер пачки для bulk-запросов (по умолчанию 500)',
+        )
+        parser.add_argument(
+            '--file-check-workers',
+            type=int,
+            default=8,
+            help='Потоков для проверки наличия PDF (по умолчанию 8)',
+        )
+        parser.add_argument(
+            '--skip-file-check',
+            action='store_true',
+            help='Не проверять наличие PDF файлов в хранилище',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Выполнить импорт и откатить транзакцию',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Вывести итог в stdout в виде JSON',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        as_json = options['json']
+        # В режиме --json stdout занят сводкой
+        log = self.stderr.write if as_json else self.stdout.write
+
+        rows = {}
+        for kind in ('categories', 'tags', 'worksheets'):
+            path = os.path.join(options['dir'], options[kind])
+            try:
+                with open(path, encoding='utf-8') as f:
+                    rows[kind] = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Не удалось прочитать {path}: {e}')
+            log(f'📂 {path}: {len(rows[kind])} записей')
+
+        summary = {}
+        timings = {}
+        try:
+            with transaction.atomic():
+                for kind in ('categories', 'tags', 'worksheets'):
+                    stage_started = time.monotonic()
+                    # Рабочие листы создаются после категорий и тегов:
+                    # WorksheetImporter читает их справочники при создании
+                    importer = self.get_importer(kind, options, log)
+                    importer.import_rows(rows[kind])
+                    summary[kind] = dict(importer.finish())
+                    timings[kind] = round(time.monotonic() - stage_started, 3)
+                    log(f'✅ {kind}: {summary[kind]}')
+
+                if options['dry_run']:
+                    raise DryRunRollback
+        except DryRunRollback:
+            log('Режим --dry-run: изменения откачены')
+
+        summary['missing_files'] = importer.missing_files
+        summary['timings'] = timings
+        summary['elapsed'] = round(time.monotonic() - started, 3)
+        summary['dry_run'] = options['dry_run']
+
+        if as_json:
+            self.stdout.write(json.dumps(summary, ensure_ascii=False, indent=2))
+            return
+
+        for name in summary['missing_files']:
+            self.stdout.write(f'  ⚠️  PDF не найден: {name}')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n🎉 Категорий: {self.format_stats(summary["categories"])}; '
+                f'тегов: {self.format_stats(summary["tags"])}; '
+                f'рабочих листов: {self.format_stats(summary["worksheets"])}; '
+                f'время: {summary["elapsed"]:.2f} сек'
+            )
+        )
+
+    def get_importer(self, kind, options, log):
+        if kind == 'categories':
+            return CategoryImporter(batch_size=options['batch_size'], log=log)
+        if kind == 'tags':
+            return TagImporter(batch_size=options['batch_size'], log=log)
+        return WorksheetImporter(
+            batch_size=options['batch_size'],
+            check_files=not options['skip_file_check'],
+            file_check_workers=options['file_check_workers'],
+            log=log,
+        )
+
+    def format_stats(self, stats):
+        return f'создано {stats["created"]}, обновлено {stats["updated"]}, пропущено {stats["skipped"]}'
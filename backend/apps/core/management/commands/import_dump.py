@@ -0,0 +1,172 @@
+"""
+Потоковый импорт больших JSON-дампов категорий, тегов и рабочих листов
+
+Файл не загружается целиком (apps/core/jsonstream.py): записи читаются
+пачками по --chunk-size, каждая пачка импортируется в своей транзакции.
+После коммита пачки в checkpoint-файл пишется байтовая позиция в дампе
+и состояние импорта - если команду прервать, повторный запуск продолжит
+со следующей пачки (--restart - начать заново).
+
+Сами импортеры те же, что и при обычном импорте (bulk_create/bulk_update):
+apps/categories/importer.py, apps/tags/importer.py, apps/worksheets/importer.py.
+
+Примеры:
+    python manage.py import_dump categories categories_data.json
+    python manage.py import_dump tags tags_data.json
+    python manage.py import_dump worksheets worksheets_data.json --chunk-size 1000
+"""
+
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.categories.importer import CategoryImporter
+from apps.core.jsonstream import iter_chunks, iter_json_array
+from apps.tags.importer import TagImporter
+from apps.worksheets.importer import WorksheetImporter
+
+IMPORTERS = {
+    'categories': CategoryImporter,
+    'tags': TagImporter,
+    'worksheets': WorksheetImporter,
+}
+
+
+class Command(BaseCommand):
+    help = 'Импортирует большой JSON-дамп пачками с продолжением после сбоя'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kind',
+            choices=list(IMPORTERS),
+            help='Что импортировать',
+        )
+        parser.add_argument(
+            'path',
+            help='JSON файл (массив записей)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Записей в пачке / транзакции (по умолчанию 500)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с позицией в дампе (по умолчанию .import_<kind>.checkpoint в BASE_DIR)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Игнорировать checkpoint и начать заново',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        checkpoint = options['checkpoint'] or str(
+            settings.BASE_DIR / f'.import_{options["kind"]}.checkpoint'
+        )
+
+        try:
+            size = os.path.getsize(path)
+        except OSError as e:
+            raise CommandError(f'Не удалось прочитать {path}: {e}')
+
+        if options['restart'] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        importer = IMPORTERS[options['kind']](
+            batch_size=options['chunk_size'],
+            log=self.stdout.write,
+        )
+
+        offset = 0
+        records = 0
+        saved = self.read_checkpoint(checkpoint)
+        if saved:
+            if saved['path'] != os.path.abspath(path) or saved['size'] != size:
+                raise CommandError(
+                    f'Checkpoint {checkpoint} относится к другому файлу - '
+                    f'запустите с --restart'
+                )
+            offset = saved['offset']
+            records = saved['records']
+            importer.set_state(saved['state'])
+            importer.stats.update(saved['stats'])
+            self.stdout.write(f'Продолжаем по checkpoint: уже импортировано {records} записей')
+
+        self.stdout.write(f'📂 {path}: {size / 1024 / 1024:.1f} МБ, пачка: {options["chunk_size"]}\n')
+
+        started = time.monotonic()
+        processed = 0
+        chunks = iter_chunks(iter_json_array(path, offset), options['chunk_size'])
+        while True:
+            # Ошибкой разбора считаем только ошибку чтения дампа: ValueError
+            # из импортера (некорректные данные записи) пробрасываем как есть
+            try:
+                chunk = next(chunks, None)
+            except ValueError as e:
+                raise CommandError(f'Ошибка разбора {path} после позиции {offset}: {e}')
+            if chunk is None:
+                break
+
+            with transaction.atomic():
+                importer.import_rows([record for record, _ in chunk])
+                importer.flush()
+
+            # Пачка закоммичена - следующий запуск начнет после нее
+            offset = chunk[-1][1]
+            processed += len(chunk)
+            records += len(chunk)
+            self.write_checkpoint(checkpoint, {
+                'path': os.path.abspath(path),
+                'size': size,
+                'offset': offset,
+                'records': records,
+                'state': importer.get_state(),
+                'stats': importer.stats,
+            })
+
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'  Импортировано: {records} ({offset / size:.0%}), '
+                f'{processed / elapsed:.0f} зап/сек'
+            )
+
+        with transaction.atomic():
+            stats = importer.finish()
+
+        # Checkpoint больше не нужен
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        timings = getattr(importer, 'timings', None)
+        if timings:
+            self.stdout.write('\n⏱  Время по этапам:')
+            for stage, seconds in timings.items():
+                self.stdout.write(f'  {stage}: {seconds:.2f} сек')
+
+        summary = ', '.join(f'{key}: {value}' for key, value in stats.items())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n🎉 Записей: {records} ({summary}), '
+                f'время: {time.monotonic() - started:.1f} сек'
+            )
+        )
+
+    def read_checkpoint(self, path):
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def write_checkpoint(self, path, data):
+        # Через временный файл: оборванная запись не испортит checkpoint
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
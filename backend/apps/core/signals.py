@@ -0,0 +1,39 @@
+"""
+Сигналы для инвалидации версионированного кэша API
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .cache import bump_content_version
+
+# Модели, изменение которых меняет закэшированные ответы
+# (дерево категорий, списки тегов, настройки сайта)
+VERSIONED_MODELS = [
+    'categories.Category',
+    'tags.Tag',
+    'worksheets.Worksheet',
+    'cms.SiteSettings',
+]
+
+
+def _bump_content_version(sender, **kwargs):
+    bump_content_version()
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(_bump_content_version, sender=model, dispatch_uid=f'bump_version_save_{model}')
+    post_delete.connect(_bump_content_version, sender=model, dispatch_uid=f'bump_version_delete_{model}')
+
+
+def _bump_content_version_on_m2m(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_content_version()
+
+
+# Теги рабочего листа сохраняются после самого листа (admin save_related),
+# без этого кэш (например, количество в листинге по тегу) устареет
+m2m_changed.connect(
+    _bump_content_version_on_m2m,
+    sender='worksheets.Worksheet_tags',
+    dispatch_uid='bump_version_worksheet_tags'
+)
@@ -0,0 +1,80 @@
+"""
+Хранилище файлов по хэшу содержимого (content-addressed)
+
+Файл сохраняется не под именем загрузки, а под SHA-256 содержимого:
+    worksheets/pdf/3f/3fa1...c9.pdf
+где worksheets/pdf/ - папка из upload_to поля, 3f - первые два символа
+хэша (чтобы в одной папке не было сотен тысяч файлов).
+
+Что это дает:
+- повторная загрузка того же PDF (частая после импорта) не пишет
+  на диск ни байта: файл с таким хэшем уже есть, возвращается его имя
+- одинаковые превью разных листов хранятся один раз
+- файл под таким именем никогда не меняется, поэтому его URL можно
+  кэшировать навсегда (nginx: Cache-Control immutable)
+
+Файлы с одним именем могут принадлежать нескольким записям -
+удалять их можно только когда на них больше никто не ссылается.
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Имя файла в хранилище: <папка>/<2 символа хэша>/<sha256>.<расширение>
+HASHED_NAME_RE = re.compile(r'(?:^|/)([0-9a-f]{2})/(\1[0-9a-f]{62})(\.[a-z0-9]+)?$')
+
+
+def file_digest(content):
+    """
+    SHA-256 содержимого файла (hex)
+
+    Параметры:
+        content: django File (читается блоками через chunks())
+    """
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_name_digest(name):
+    """Хэш из имени файла content-addressed хранилища (None для обычных имен)"""
+    match = HASHED_NAME_RE.search(name or '')
+    return match.group(2) if match else None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage, сохраняющий файлы под хэшем содержимого
+
+    Имя, переданное в save(), задает только папку и расширение.
+    Чтение, URL и удаление работают как у FileSystemStorage, в том
+    числе для файлов, сохраненных раньше под обычными именами.
+    """
+
+    def get_hashed_name(self, name, digest):
+        directory, filename = posixpath.split(name.replace('\\', '/'))
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(directory, digest[:2], f'{digest}{extension}')
+
+    def _save(self, name, content):
+        digest = file_digest(content)
+        hashed_name = self.get_hashed_name(name, digest)
+
+        # Такой файл уже есть - то же содержимое, писать нечего
+        if self.exists(hashed_name):
+            return hashed_name
+
+        # Пишем во временный файл и атомарно переименовываем: при
+        # одновременной загрузке одного файла победит любая копия
+        directory, filename = posixpath.split(hashed_name)
+        temp_name = super()._save(posixpath.join(directory, f'.{uuid.uuid4().hex}.tmp'), content)
+        os.replace(self.path(temp_name), self.path(hashed_name))
+        return hashed_name
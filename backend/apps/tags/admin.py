@@ -64,10 +64,7 @@ class TagAdmin(admin.ModelAdmin):
 
     def update_usage_counts(self, request, queryset):
         """Действие для обновления счетчиков использований"""
-        count = 0
-        for tag in queryset:
-            tag.update_usage_count()
-            count += 1
+        count = queryset.update_usage_counts()
 
         self.message_user(request, f'Счетчики обновлены для {count} тегов')
     update_usage_counts.short_description = 'Обновить счетчики использований'
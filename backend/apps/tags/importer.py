@@ -0,0 +1,88 @@
+"""
+Массовый импорт тегов (формат tags_data.json)
+
+Теги ищутся по slug одним запросом на пачку, новые создаются
+bulk_create, существующие обновляются bulk_update. Сигналы не
+вызываются, поэтому переиндексация worksheets с переименованными
+тегами и сброс кэша API и карточек выполняются один раз в finish().
+"""
+
+from apps.core.cache import bump_content_version
+
+from .models import Tag
+
+# Поля, которые импорт заполняет у тега
+IMPORT_FIELDS = ['name', 'description']
+
+
+class TagImporter:
+    """
+    Импорт тегов пачками
+
+    Параметры:
+        batch_size: размер пачки для bulk_create/bulk_update
+        log: функция для вывода предупреждений (по умолчанию print)
+    """
+
+    def __init__(self, batch_size=500, log=print):
+        self.batch_size = batch_size
+        self.log = log
+        self.stats = {'created': 0, 'updated': 0, 'skipped': 0}
+        # Теги, у которых изменилось название (оно входит в поисковый индекс)
+        self.renamed_ids = set()
+
+    def get_state(self):
+        return {'renamed_ids': sorted(self.renamed_ids)}
+
+    def set_state(self, state):
+        self.renamed_ids = set(state.get('renamed_ids', []))
+
+    def import_rows(self, rows):
+        values_by_slug = {}
+        for row in rows:
+            if not row.get('slug') or not row.get('name'):
+                self.log(f"  ⚠️  Тег без slug или названия пропущен: {row}")
+                self.stats['skipped'] += 1
+                continue
+            values_by_slug[row['slug']] = {
+                'name': row['name'],
+                'description': row.get('description') or '',
+            }
+
+        existing = Tag.objects.in_bulk(list(values_by_slug), field_name='slug')
+
+        new_tags = [
+            Tag(slug=slug, **values)
+            for slug, values in values_by_slug.items() if slug not in existing
+        ]
+        Tag.objects.bulk_create(new_tags, batch_size=self.batch_size)
+        self.stats['created'] += len(new_tags)
+
+        for slug, tag in existing.items():
+            if tag.name != values_by_slug[slug]['name']:
+                self.renamed_ids.add(tag.pk)
+            for field, value in values_by_slug[slug].items():
+                setattr(tag, field, value)
+        Tag.objects.bulk_update(existing.values(), IMPORT_FIELDS, batch_size=self.batch_size)
+        self.stats['updated'] += len(existing)
+
+    def flush(self):
+        pass
+
+    def finish(self):
+        """
+        Переиндексировать worksheets с переименованными тегами и сбросить кэш API
+
+        Возвращает:
+            dict: статистика импорта
+        """
+        from apps.worksheets import search
+        from apps.worksheets.cards import bump_cards_version
+        from apps.worksheets.models import Worksheet
+
+        if self.renamed_ids:
+            search.update_index(Worksheet.objects.filter(tags__in=self.renamed_ids).distinct())
+
+        bump_content_version()
+        bump_cards_version()
+        return self.stats
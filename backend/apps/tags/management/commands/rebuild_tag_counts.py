@@ -0,0 +1,21 @@
+"""
+Команда для полного пересчета Tag.usage_count
+
+Обычно счетчики поддерживаются сигналами (apps/tags/usage.py),
+команда нужна после прямых правок в базе или импорта в обход ORM.
+Все теги пересчитываются одним UPDATE с групповым подсчетом.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.tags.models import Tag
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает usage_count всех тегов одним запросом'
+
+    def handle(self, *args, **options):
+        updated = Tag.objects.all().update_usage_counts()
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Счетчики пересчитаны для {updated} тегов')
+        )
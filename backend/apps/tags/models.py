@@ -3,9 +3,38 @@
 """
 
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from slugify import slugify
 
 
+class TagQuerySet(models.QuerySet):
+    """QuerySet тегов с пересчетом счетчиков"""
+
+    def update_usage_counts(self):
+        """
+        Пересчитать usage_count всех тегов queryset одним UPDATE
+
+        Количество опубликованных worksheets считается коррелированным
+        подзапросом, поэтому число запросов не зависит от числа тегов.
+
+        Возвращает:
+            int: количество обновленных тегов
+        """
+        through = self.model.worksheets.through
+        published_count = (
+            through.objects
+            .filter(tag=OuterRef('pk'), worksheet__is_published=True)
+            .order_by()
+            .values('tag')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        return self.update(
+            usage_count=Coalesce(Subquery(published_count), 0)
+        )
+
+
 class Tag(models.Model):
     """
     Теги для категоризации рабочих листов
@@ -42,6 +71,8 @@ class Tag(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
 
+    objects = TagQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Тег'
         verbose_name_plural = 'Теги'
@@ -63,7 +94,9 @@ class Tag(models.Model):
     def update_usage_count(self):
         """
         Обновить счетчик использований
-        Вызывается автоматически через сигналы
+
+        Сигналы пересчитывают счетчики пачкой (apps/tags/usage.py),
+        этот метод - для одного тега
         """
-        self.usage_count = self.worksheets.filter(is_published=True).count()
-        self.save(update_fields=['usage_count'])
+        Tag.objects.filter(pk=self.pk).update_usage_counts()
+        self.refresh_from_db(fields=['usage_count'])
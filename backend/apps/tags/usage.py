@@ -0,0 +1,114 @@
+"""
+Пересчет Tag.usage_count при изменении тегов рабочих листов
+
+Сигнал m2m_changed (apps/worksheets/signals.py) передает сюда id
+затронутых тегов. Пересчет выполняется одним UPDATE на все теги
+(TagQuerySet.update_usage_counts) и откладывается до коммита транзакции:
+сколько бы раз внутри transaction.atomic() ни менялись теги,
+счетчики пересчитываются один раз.
+
+Для массовых операций без общей транзакции (импорт построчно):
+
+    with deferred_usage_counts():
+        for worksheet, tags in rows:
+            worksheet.tags.set(tags)
+
+Смена is_published (save() и массовый update()) не пересчитывает
+счетчики, а сдвигает их на +/- дельту: apply_publish_deltas().
+Полный пересчет: python manage.py rebuild_tag_counts
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Tag
+
+_state = threading.local()
+
+
+def _get_pending():
+    """Отложенные id тегов текущего потока: {alias базы: set(id)}"""
+    if not hasattr(_state, 'pending'):
+        _state.pending = {}
+    return _state.pending
+
+
+def schedule_usage_count_update(tag_ids, using='default'):
+    """
+    Запланировать пересчет usage_count для тегов
+
+    Вне транзакции пересчет выполняется сразу, внутри -
+    после коммита (один на все изменения в транзакции).
+    """
+    if not tag_ids:
+        return
+
+    _get_pending().setdefault(using, set()).update(tag_ids)
+
+    # Внутри deferred_usage_counts() пересчет - при выходе из блока
+    if getattr(_state, 'depth', 0):
+        return
+
+    # Повторные вызовы в той же транзакции найдут пустой набор и ничего не сделают
+    transaction.on_commit(partial(flush, using), using=using)
+
+
+def flush(using='default'):
+    """Пересчитать все отложенные теги одним запросом"""
+    tag_ids = _get_pending().pop(using, None)
+    if tag_ids:
+        Tag.objects.using(using).filter(pk__in=tag_ids).update_usage_counts()
+
+
+@contextmanager
+def deferred_usage_counts():
+    """Отложить пересчет usage_count до конца блока (для массовых операций)"""
+    _state.depth = getattr(_state, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+        if not _state.depth:
+            for using in list(_get_pending()):
+                transaction.on_commit(partial(flush, using), using=using)
+
+
+def apply_publish_deltas(worksheet_ids, published, using='default'):
+    """
+    Сдвинуть usage_count тегов, когда worksheets опубликованы/сняты с публикации
+
+    Каждый тег получает +N (или -N), где N - сколько из worksheet_ids
+    с ним связано. Теги с одинаковой дельтой обновляются одним UPDATE,
+    поэтому запросов столько, сколько разных дельт, а не тегов.
+
+    Параметры:
+        worksheet_ids: id worksheets, у которых is_published действительно изменился
+        published: новое значение is_published
+    """
+    if not worksheet_ids:
+        return
+
+    through = Tag.worksheets.through
+    links = (
+        through.objects.using(using)
+        .filter(worksheet_id__in=worksheet_ids)
+        .values('tag_id')
+        .annotate(count=Count('pk'))
+        .values_list('tag_id', 'count')
+    )
+
+    tags_by_delta = defaultdict(list)
+    for tag_id, count in links:
+        tags_by_delta[count if published else -count].append(tag_id)
+
+    for delta, tag_ids in tags_by_delta.items():
+        Tag.objects.using(using).filter(pk__in=tag_ids).update(
+            # Не уходим в минус, если счетчик уже был рассинхронизирован
+            usage_count=Greatest(F('usage_count') + delta, 0)
+        )
@@ -6,6 +6,8 @@ from rest_framework import generics
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
+from apps.core.cache import VersionedCacheMixin
+
 from .models import Tag
 from .serializers import TagSerializer, TagDetailSerializer
 
@@ -20,7 +22,7 @@ from .serializers import TagSerializer, TagDetailSerializer
     Каждый тег содержит количество рабочих листов, в которых он используется.
     ''',
 )
-class TagListView(generics.ListAPIView):
+class TagListView(VersionedCacheMixin, generics.ListAPIView):
     """
     Список всех тегов
     """
@@ -69,7 +71,7 @@ class TagDetailView(generics.RetrieveAPIView):
     Отсортировано по убыванию usage_count.
     ''',
 )
-class PopularTagsView(generics.ListAPIView):
+class PopularTagsView(VersionedCacheMixin, generics.ListAPIView):
     """
     Топ-20 популярных тегов
     """
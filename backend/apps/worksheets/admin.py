@@ -4,7 +4,9 @@ Django Admin для рабочих листов
 
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Worksheet
+from apps.core.cache import bump_content_version
+from .models import PreviewJob, PreviewStatus, Worksheet
+from . import jobs
 
 
 @admin.register(Worksheet)
@@ -14,7 +16,7 @@ class WorksheetAdmin(admin.ModelAdmin):
 
     Особенности:
     - Автоматическая генерация slug из названия
-    - Автоматическая генерация превью из PDF
+    - Фоновая генерация превью из PDF (статус виден в списке)
     - Управление тегами через filter_horizontal
     - Отображение превью в админке
     - Статистика просмотров и скачиваний
@@ -38,6 +40,7 @@ class WorksheetAdmin(admin.ModelAdmin):
     list_filter = [
         'is_published',
         'is_featured',
+        'preview_status',
         'category',
         'grade_level',
         'difficulty',
@@ -55,6 +58,8 @@ class WorksheetAdmin(admin.ModelAdmin):
         'downloads_count',
         'thumbnail_preview_large',
         'preview_image_display',
+        'preview_status',
+        'preview_error',
         'created_at',
         'updated_at',
         'pdf_info'
@@ -78,11 +83,13 @@ class WorksheetAdmin(admin.ModelAdmin):
             'fields': (
                 'pdf_file',
                 'pdf_info',
+                'preview_status',
+                'preview_error',
                 'thumbnail_preview_large',
                 'preview_image_display'
             ),
             'description': 'PDF файл и автоматически генерируемые превью. '
-                          'Превью создаются автоматически при сохранении.'
+                          'Превью создаются в фоне после сохранения.'
         }),
         ('SEO', {
             'fields': ('meta_title', 'meta_description'),
@@ -101,8 +108,19 @@ class WorksheetAdmin(admin.ModelAdmin):
         }),
     )
 
+    def preview_status_message(self, obj):
+        """Текст вместо превью, пока оно генерируется или если генерация упала"""
+        if obj.preview_status in (PreviewStatus.PENDING, PreviewStatus.PROCESSING):
+            return f"⏳ {obj.get_preview_status_display()}"
+        if obj.preview_status == PreviewStatus.FAILED:
+            return "❌ Ошибка генерации"
+        return None
+
     def thumbnail_preview(self, obj):
         """Маленькое превью для списка"""
+        message = self.preview_status_message(obj)
+        if message:
+            return message
         if obj.thumbnail:
             return format_html(
                 '<img src="{}" width="60" height="80" '
@@ -114,6 +132,9 @@ class WorksheetAdmin(admin.ModelAdmin):
 
     def thumbnail_preview_large(self, obj):
         """Большое превью миниатюры для детальной страницы"""
+        message = self.preview_status_message(obj)
+        if message:
+            return message
         if obj.thumbnail:
             return format_html(
                 '<div style="margin: 10px 0;">'
@@ -127,6 +148,9 @@ class WorksheetAdmin(admin.ModelAdmin):
 
     def preview_image_display(self, obj):
         """Большое превью для детальной страницы"""
+        message = self.preview_status_message(obj)
+        if message:
+            return message
         if obj.preview_image:
             return format_html(
                 '<div style="margin: 10px 0;">'
@@ -139,23 +163,33 @@ class WorksheetAdmin(admin.ModelAdmin):
     preview_image_display.short_description = 'Превью для карточки'
 
     def pdf_info(self, obj):
-        """Информация о PDF файле"""
-        if obj.pdf_file:
-            try:
-                size_mb = obj.pdf_file.size / (1024 * 1024)
-                return format_html(
-                    '<div style="padding: 10px; background: #f0f0f0; border-radius: 4px;">'
-                    '<p><strong>PDF файл:</strong> {}</p>'
-                    '<p><strong>Размер:</strong> {:.2f} MB</p>'
-                    '<p><strong>URL:</strong> <a href="{}" target="_blank">Открыть PDF</a></p>'
-                    '</div>',
-                    obj.pdf_file.name.split('/')[-1],
-                    size_mb,
-                    obj.pdf_file.url
-                )
-            except:
-                return "Информация недоступна"
-        return "PDF файл не загружен"
+        """
+        Информация о PDF файле
+
+        Размер и число страниц берутся из полей модели (manage.py scan_media),
+        файловая система при отрисовке не читается
+        """
+        if not obj.pdf_file:
+            return "PDF файл не загружен"
+
+        if obj.pdf_size is None:
+            size = "не проверен (manage.py scan_media)"
+        else:
+            size = f"{obj.pdf_size / (1024 * 1024):.2f} MB"
+        pages = obj.pdf_page_count if obj.pdf_page_count is not None else "—"
+
+        return format_html(
+            '<div style="padding: 10px; background: #f0f0f0; border-radius: 4px;">'
+            '<p><strong>PDF файл:</strong> {}</p>'
+            '<p><strong>Размер:</strong> {}</p>'
+            '<p><strong>Страниц:</strong> {}</p>'
+            '<p><strong>URL:</strong> <a href="{}" target="_blank">Открыть PDF</a></p>'
+            '</div>',
+            obj.pdf_file.name.split('/')[-1],
+            size,
+            pages,
+            obj.pdf_file.url
+        )
     pdf_info.short_description = 'Информация о PDF'
 
     def tags_display(self, obj):
@@ -181,25 +215,27 @@ class WorksheetAdmin(admin.ModelAdmin):
         - Изменился алгоритм генерации превью
         - Превью были повреждены
         - Нужно обновить качество изображений
+
+        Превью пересоздаются в фоне воркером очереди и всегда рендерятся
+        заново (готовые превью листов с тем же PDF не берутся)
         """
-        count = 0
-        for worksheet in queryset:
-            if worksheet.pdf_file:
-                worksheet.generate_previews()
-                count += 1
+        count = jobs.enqueue_many(queryset, force=True)
 
-        self.message_user(request, f'Превью пересозданы для {count} рабочих листов')
+        self.message_user(request, f'Пересоздание превью поставлено в очередь для {count} рабочих листов')
     regenerate_previews.short_description = '🔄 Пересоздать превью из PDF'
 
     def publish_worksheets(self, request, queryset):
         """Массовое действие: опубликовать"""
         updated = queryset.update(is_published=True)
+        # update() не вызывает сигналы - сбрасываем кэш API вручную
+        bump_content_version()
         self.message_user(request, f'Опубликовано {updated} рабочих листов')
     publish_worksheets.short_description = '✅ Опубликовать'
 
     def unpublish_worksheets(self, request, queryset):
         """Массовое действие: снять с публикации"""
         updated = queryset.update(is_published=False)
+        bump_content_version()
         self.message_user(request, f'Снято с публикации {updated} рабочих листов')
     unpublish_worksheets.short_description = '❌ Снять с публикации'
 
@@ -220,4 +256,33 @@ class WorksheetAdmin(admin.ModelAdmin):
                 from django.utils import timezone
                 obj.published_at = timezone.now()
 
+        # Размер нового PDF известен из загрузки, страницы посчитает scan_media
+        if 'pdf_file' in form.changed_data:
+            obj.pdf_size = obj.pdf_file.size if obj.pdf_file else None
+            obj.pdf_page_count = None
+
         super().save_model(request, obj, form, change)
+
+        # Новый PDF у листа с превью: Worksheet.save() превью не трогает.
+        # Если содержимое PDF то же, задание возьмет готовые превью без рендера
+        if change and 'pdf_file' in form.changed_data and obj.pdf_file and obj.thumbnail and obj.preview_image:
+            jobs.enqueue_previews(obj)
+
+
+@admin.register(PreviewJob)
+class PreviewJobAdmin(admin.ModelAdmin):
+    """
+    Очередь генерации превью (только просмотр)
+    """
+
+    list_display = ['worksheet', 'status', 'attempts', 'run_after', 'finished_at', 'last_error']
+    list_filter = ['status']
+    search_fields = ['worksheet__title']
+    list_select_related = ['worksheet']
+    readonly_fields = [
+        'worksheet', 'status', 'attempts', 'max_attempts', 'run_after',
+        'started_at', 'finished_at', 'last_error', 'created_at'
+    ]
+
+    def has_add_permission(self, request):
+        return False
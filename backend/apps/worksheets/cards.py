@@ -0,0 +1,145 @@
+"""
+Кэш карточек рабочих листов для списков
+
+Каждая страница каталога заново прогоняла те же 21 карточку через
+WorksheetListSerializer с вложенным TagSerializer - заметная доля CPU
+на запрос. Теперь готовый dict карточки (результат сериализатора)
+хранится в кэше отдельно для каждого worksheet:
+    worksheets:card:<версия карточек>:<хост>:<id>:<updated_at>
+
+Списки (CachedCardsMixin) выбирают из базы только id страницы
+в нужном порядке и счетчики, а карточки собирают одним cache.get_many().
+Отсутствующие в кэше карточки сериализуются одним запросом (for_list())
+и кладутся в кэш через set_many().
+
+Версия контента (apps.core.cache) меняется при любом изменении
+каталога, поэтому в ключ карточки она не входит - иначе каждое
+сохранение листа выбрасывало бы все карточки разом. Вместо нее:
+- updated_at листа из выборки id: сохранение листа, смена его тегов
+  (signals.py), новые превью, импорт и dedupe_media меняют updated_at,
+  и устаревает только карточка этого листа
+- версия карточек: меняется только при сохранении/удалении категорий
+  и тегов (их названия и пути есть в карточках многих листов) и при
+  их импорте - bump_cards_version()
+
+views_count и downloads_count в кэше устаревают сразу, поэтому
+берутся из той же выборки id плюс несброшенные инкременты из таблицы
+буфера счетчиков (apps.worksheets.counters, один запрос на страницу).
+Tag.usage_count меняется без сохранения тегов (UPDATE из apps/tags/usage.py)
+и тоже подставляется из базы - одним запросом на страницу.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from apps.core.cache import RESPONSE_CACHE_TIMEOUT, bump_version, get_version
+from apps.tags.models import Tag
+
+from . import counters
+from .models import Worksheet
+from .serializers import WorksheetListSerializer
+
+# Поля строки списка: id, updated_at (ключ карточки), счетчики
+# и поля сортировки keyset-пагинации
+ROW_FIELDS = ('id', 'created_at', 'updated_at', 'views_count', 'downloads_count')
+
+# Версия карточек в кэше 'versions'
+CARDS_VERSION_KEY = 'worksheets:cards_version'
+
+# Время жизни карточки (страховка на случай пропущенной инвалидации)
+CARD_CACHE_TIMEOUT = RESPONSE_CACHE_TIMEOUT
+
+
+def bump_cards_version():
+    """Сбросить все карточки (изменились категории или теги)"""
+    bump_version(CARDS_VERSION_KEY)
+
+
+def get_card_prefix(request):
+    """
+    Префикс ключей карточек
+
+    В карточке абсолютные URL картинок, поэтому ключ зависит от хоста
+    """
+    base_url = request.build_absolute_uri('/') if request is not None else ''
+    host = hashlib.md5(base_url.encode('utf-8')).hexdigest()[:8]
+    return f'worksheets:card:{get_version(CARDS_VERSION_KEY)}:{host}:'
+
+
+def get_card_key(prefix, row):
+    """Ключ карточки: меняется вместе с updated_at листа"""
+    return f'{prefix}{row["id"]}:{int(row["updated_at"].timestamp() * 1000000)}'
+
+
+def get_cards(rows, request=None):
+    """
+    Карточки worksheets в порядке rows
+
+    Параметры:
+        rows: dict с полями ROW_FIELDS (id и актуальные счетчики)
+        request: запрос (для абсолютных URL в карточке)
+
+    Возвращает:
+        list: dict карточек, как WorksheetListSerializer(many=True).data
+    """
+    prefix = get_card_prefix(request)
+    keys = {row['id']: get_card_key(prefix, row) for row in rows}
+    cached = cache.get_many(list(keys.values()))
+
+    missing_ids = [worksheet_id for worksheet_id, key in keys.items() if key not in cached]
+    if missing_ids:
+        worksheets = Worksheet.objects.filter(pk__in=missing_ids).for_list()
+        serializer = WorksheetListSerializer(worksheets, many=True, context={'request': request})
+        fresh = {keys[card['id']]: dict(card) for card in serializer.data}
+        cache.set_many(fresh, CARD_CACHE_TIMEOUT)
+        cached.update(fresh)
+
+    pending = counters.pending(list(keys)) if keys else {}
+    usage_counts = get_usage_counts(cached.values())
+
+    cards = []
+    for row in rows:
+        card = cached.get(keys[row['id']])
+        # Лист удалили между выборкой id и сериализацией
+        if card is None:
+            continue
+
+        card = dict(card)
+        deltas = pending.get(row['id'], {})
+        for field in counters.COUNTER_FIELDS:
+            card[field] = row[field] + deltas.get(field, 0)
+        card['tags'] = [
+            {**tag, 'usage_count': usage_counts.get(tag['id'], tag['usage_count'])}
+            for tag in card['tags']
+        ]
+        cards.append(card)
+    return cards
+
+
+def get_usage_counts(cards):
+    """Актуальные Tag.usage_count для тегов карточек: {tag_id: usage_count}"""
+    tag_ids = {tag['id'] for card in cards for tag in card['tags']}
+    if not tag_ids:
+        return {}
+    return dict(Tag.objects.filter(pk__in=tag_ids).values_list('id', 'usage_count'))
+
+
+class CachedCardsMixin:
+    """
+    list() для ListAPIView с WorksheetListSerializer из кэша карточек
+
+    Фильтры, сортировка и пагинация работают как раньше, но над
+    выборкой ROW_FIELDS вместо полных объектов
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.select_related(None).prefetch_related(None).values(*ROW_FIELDS)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(get_cards(page, request))
+
+        return Response(get_cards(list(rows), request))
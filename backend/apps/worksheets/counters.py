@@ -0,0 +1,194 @@
+"""
+Буферизованные счетчики просмотров и скачиваний (write-behind)
+
+Вместо UPDATE строки worksheet при каждом просмотре/скачивании
+инкремент записывается отдельной строкой в таблицу CounterIncrement
+(INSERT не блокирует горячую строку worksheet). Периодически таблица
+сбрасывается в worksheets пачкой атомарных
+UPDATE ... SET views_count = views_count + N.
+
+Таблица общая для всех gunicorn воркеров и процессов, поэтому:
+- инкременты не теряются при перезапуске воркера
+- manage.py flush_counters сбрасывает все накопленное, а не только
+  буфер своего процесса
+- несброшенные инкременты видны любому процессу (pending())
+
+Сбросить таблицу может любой процесс одновременно с другими: строки
+сначала помечаются своей пачкой (UPDATE ... SET batch = <uuid>
+WHERE batch IS NULL), поэтому каждая строка учитывается ровно один раз.
+
+Настройки (config/settings/base.py):
+- COUNTERS_FLUSH_INTERVAL: как часто сбрасывать таблицу (секунды, 0 - сразу)
+- COUNTERS_FLUSH_THRESHOLD: после скольких инкрементов процесса сбросить досрочно
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Sum
+
+logger = logging.getLogger(__name__)
+
+# Поля модели Worksheet, которые можно увеличивать через буфер
+COUNTER_FIELDS = ('views_count', 'downloads_count')
+
+
+class CounterBuffer:
+    """
+    Буфер инкрементов счетчиков в таблице CounterIncrement
+
+    Сброс (flush()) запускается:
+    - при превышении интервала или порога на очередном инкременте
+    - фоновым потоком раз в интервал
+    - вручную: manage.py flush_counters (например, из cron)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._since_flush = 0
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'COUNTERS_FLUSH_INTERVAL', 10)
+
+    @property
+    def flush_threshold(self):
+        return getattr(settings, 'COUNTERS_FLUSH_THRESHOLD', 500)
+
+    def increment(self, worksheet_id, field, amount=1):
+        """Добавить инкремент в буфер (и сбросить его, если пора)"""
+        from .models import CounterIncrement
+
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f'Неизвестный счетчик: {field}')
+
+        CounterIncrement.objects.create(worksheet_id=worksheet_id, **{field: amount})
+
+        with self._lock:
+            self._since_flush += amount
+            should_flush = (
+                self.flush_interval <= 0
+                or self._since_flush >= self.flush_threshold
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+        if should_flush:
+            self.flush()
+        else:
+            self._ensure_timer()
+
+    def pending(self, worksheet_ids):
+        """
+        Несброшенные инкременты worksheets (всех процессов)
+
+        Возвращает:
+            dict: {worksheet_id: {field: delta}}, например {5: {'views_count': 3}};
+                  worksheets без инкрементов в словарь не попадают
+        """
+        from .models import CounterIncrement
+
+        rows = (
+            CounterIncrement.objects.filter(worksheet_id__in=worksheet_ids)
+            .values('worksheet_id')
+            .annotate(**{field: Sum(field) for field in COUNTER_FIELDS})
+            .order_by()
+        )
+        return {
+            row['worksheet_id']: {field: row[field] for field in COUNTER_FIELDS if row[field]}
+            for row in rows
+        }
+
+    def flush(self):
+        """
+        Сбросить таблицу инкрементов в worksheets
+
+        Инкременты суммируются по worksheet и группируются по одинаковым
+        дельтам, поэтому на пачку worksheets уходит по одному UPDATE на
+        каждую уникальную комбинацию (views, downloads), а не на каждую строку.
+        При ошибке транзакция откатывается и строки остаются в таблице
+        до следующего сброса.
+
+        Возвращает:
+            int: количество обновленных worksheets
+        """
+        from .models import CounterIncrement, Worksheet
+
+        with self._lock:
+            self._since_flush = 0
+            self._last_flush = time.monotonic()
+
+        batch = uuid.uuid4()
+        with transaction.atomic():
+            # Забираем строки себе: параллельный сброс их уже не увидит
+            claimed = CounterIncrement.objects.filter(batch__isnull=True).update(batch=batch)
+            if not claimed:
+                return 0
+
+            totals = (
+                CounterIncrement.objects.filter(batch=batch)
+                .values('worksheet_id')
+                .annotate(**{field: Sum(field) for field in COUNTER_FIELDS})
+                .order_by()
+            )
+
+            # {(views_delta, downloads_delta): [id, id, ...]}
+            batches = defaultdict(list)
+            for row in totals:
+                key = tuple(row[field] for field in COUNTER_FIELDS)
+                batches[key].append(row['worksheet_id'])
+
+            for key, ids in batches.items():
+                updates = {
+                    field: F(field) + delta
+                    for field, delta in zip(COUNTER_FIELDS, key)
+                    if delta
+                }
+                Worksheet.objects.filter(pk__in=ids).update(**updates)
+
+            CounterIncrement.objects.filter(batch=batch).delete()
+
+        return sum(len(ids) for ids in batches.values())
+
+    def _ensure_timer(self):
+        """Запустить фоновый сброс, если он еще не запланирован"""
+        with self._lock:
+            if self._timer is not None and self._timer.is_alive():
+                return
+            self._timer = threading.Timer(self.flush_interval, self._timer_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timer_flush(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Ошибка при сбросе счетчиков')
+        finally:
+            # Соединения, открытые в фоновом потоке, сами не закрываются
+            connections.close_all()
+
+
+# Буфер счетчиков (таблица общая, объект хранит только расписание сброса процесса)
+buffer = CounterBuffer()
+
+
+def increment(worksheet_id, field, amount=1):
+    """Увеличить счетчик worksheet через буфер"""
+    buffer.increment(worksheet_id, field, amount)
+
+
+def pending(worksheet_ids):
+    """Несброшенные инкременты worksheets: {worksheet_id: {field: delta}}"""
+    return buffer.pending(worksheet_ids)
+
+
+def flush():
+    """Сбросить все накопленные инкременты в базу"""
+    return buffer.flush()
@@ -0,0 +1,206 @@
+"""
+Отдача PDF рабочих листов
+
+Раньше PDF всегда читался и отдавался самим Django (FileResponse):
+воркер gunicorn (их всего 3) занят, пока клиент скачивает файл.
+
+В режиме X-Accel-Redirect Django только проверяет лист, считает
+скачивание и отвечает пустым телом с заголовком
+    X-Accel-Redirect: /protected-media/worksheets/pdf/<файл>.pdf
+а сам файл отдает nginx из internal-location (nginx/conf.d/default.conf):
+    location /protected-media/ {
+        internal;
+        alias /var/www/media/;
+    }
+
+Режим включается настройкой WORKSHEETS_DOWNLOAD_ACCEL (в prod по умолчанию).
+Локально без nginx остается потоковая отдача через Django.
+
+Докачка и повторные скачивания:
+- ETag и Last-Modified строятся из размера и времени изменения файла,
+  ETag в том же формате, что у nginx ("<mtime hex>-<size hex>"), поэтому
+  валидаторы совпадают в обоих режимах
+- If-None-Match / If-Modified-Since -> 304 без тела
+- Range: bytes=... -> 206 с одним диапазоном (несколько диапазонов
+  отдаются целым файлом со статусом 200, это допускает RFC 9110);
+  в режиме X-Accel-Redirect диапазоны вырезает nginx
+- скачивание считается один раз на логическое скачивание: полный ответ
+  или первый кусок (диапазон с байта 0), но не 304, HEAD и продолжения докачки
+"""
+
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+# Размер блока при отдаче диапазона из Django
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+class RangeNotSatisfiable(Exception):
+    """Ни один запрошенный диапазон не попадает в файл (ответ 416)"""
+
+
+def get_accel_path(worksheet):
+    """
+    Путь internal-location nginx для PDF worksheet
+
+    Имя файла кодируется для URL: nginx декодирует путь перед поиском файла
+    """
+    prefix = settings.WORKSHEETS_DOWNLOAD_ACCEL_PREFIX.rstrip('/') + '/'
+    return prefix + quote(worksheet.pdf_file.name.lstrip('/'))
+
+
+def get_validators(worksheet):
+    """
+    Размер, время изменения и ETag файла PDF
+
+    Возвращает:
+        tuple: (размер в байтах, mtime в секундах, ETag)
+
+    Исключения:
+        Http404: файла нет в хранилище
+    """
+    storage = worksheet.pdf_file.storage
+    name = worksheet.pdf_file.name
+    try:
+        size = storage.size(name)
+        mtime = int(storage.get_modified_time(name).timestamp())
+    except (FileNotFoundError, NotImplementedError):
+        raise Http404("PDF файл не найден")
+
+    return size, mtime, f'"{mtime:x}-{size:x}"'
+
+
+def parse_range(header, size):
+    """
+    Разобрать заголовок Range для файла размером size
+
+    Параметры:
+        header: значение Range ('bytes=0-499', 'bytes=500-', 'bytes=-500')
+        size: размер файла
+
+    Возвращает:
+        tuple | None: (start, end) включительно для одного диапазона;
+                      None - отдать файл целиком (заголовка нет, он
+                      некорректен или диапазонов несколько)
+
+    Исключения:
+        RangeNotSatisfiable: диапазон за пределами файла
+    """
+    unit, _, ranges = (header or '').partition('=')
+    if unit.strip().lower() != 'bytes' or not ranges or ',' in ranges:
+        return None
+
+    match = _RANGE_RE.match(ranges)
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # Суффикс: последние N байт
+        length = int(last)
+        if not length or not size:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _if_range_passes(request, etag, mtime):
+    """If-Range: докачка разрешена, только если файл не изменился"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == mtime
+
+
+def _iter_range(file, start, length):
+    """Читать length байт файла с позиции start блоками по CHUNK_SIZE"""
+    with file:
+        file.seek(start)
+        while length > 0:
+            data = file.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def build_download_response(request, worksheet):
+    """
+    Ответ со скачиванием PDF worksheet
+
+    Возвращает:
+        tuple: (response, started), где response - 200/206 с файлом
+               (или пустой с X-Accel-Redirect для nginx), 304, 412 или 416;
+               started - начинает ли ответ новое логическое скачивание
+               (его нужно посчитать)
+    """
+    size, mtime, etag = get_validators(worksheet)
+
+    # If-None-Match / If-Modified-Since / If-Match / If-Unmodified-Since
+    response = get_conditional_response(request, etag=etag, last_modified=mtime)
+    if response is not None:
+        _set_validators(response, etag, mtime)
+        return response, False
+
+    byte_range = None
+    if _if_range_passes(request, etag, mtime):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response, False
+
+    started = request.method == 'GET' and (byte_range is None or byte_range[0] == 0)
+
+    if settings.WORKSHEETS_DOWNLOAD_ACCEL:
+        # Диапазон и валидаторы nginx выставит сам по тому же файлу
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Accel-Redirect'] = get_accel_path(worksheet)
+    elif byte_range is None:
+        response = FileResponse(
+            worksheet.pdf_file.open('rb'),
+            content_type='application/pdf'
+        )
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_range(worksheet.pdf_file.open('rb'), start, length),
+            status=206,
+            content_type='application/pdf'
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    if not settings.WORKSHEETS_DOWNLOAD_ACCEL:
+        response['Accept-Ranges'] = 'bytes'
+        _set_validators(response, etag, mtime)
+
+    # Устанавливаем заголовок для скачивания файла
+    filename = f"{worksheet.slug}.pdf"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response, started
+
+
+def _set_validators(response, etag, mtime):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    # Кэш браузера перепроверяет файл при каждом скачивании
+    response['Cache-Control'] = 'private, no-cache'
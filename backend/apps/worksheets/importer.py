@@ -0,0 +1,381 @@
+"""
+Массовый импорт рабочих листов (формат worksheets_data.json)
+
+Вместо get/update_or_create/tags.set() на каждую строку:
+- справочники категорий и тегов загружаются один раз
+- существующие slug ищутся одним запросом на пачку строк
+- новые листы создаются bulk_create, существующие обновляются bulk_update
+- связи с тегами пишутся пачкой напрямую в промежуточную таблицу
+
+bulk-операции не вызывают сигналы, поэтому поисковый индекс, очередь
+превью и индекс похожих обновляются в flush() (на пачку), а счетчики
+тегов и версия кэша API - один раз в finish(). bulk_update идет мимо
+WorksheetQuerySet.update(), иначе каждая пачка пересчитывала бы теги
+и индекс похожих еще раз.
+
+Имена файлов, которые manage.py dedupe_media перевел в хранилище по хэшу
+(а старые файлы удалил), заменяются по таблице MediaAlias.
+
+Использование:
+    importer = WorksheetImporter()
+    with transaction.atomic():
+        importer.import_rows(rows)
+        importer.finish()
+
+Потоковый импорт пачками: manage.py import_dump (apps/core).
+"""
+
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.categories.models import Category
+from apps.core.cache import bump_content_version
+from apps.tags.models import Tag
+
+from . import search, similarity
+from .models import JobStatus, MediaAlias, PreviewJob, PreviewStatus, Worksheet
+
+# Поля, которые импорт заполняет у рабочего листа
+IMPORT_FIELDS = [
+    'title',
+    'description',
+    'category_id',
+    'grade_level',
+    'difficulty',
+    'pdf_file',
+    'thumbnail',
+    'preview_image',
+    'meta_title',
+    'meta_description',
+    'is_featured',
+    'is_published',
+]
+
+# Поля с именами файлов в хранилище
+MEDIA_FIELDS = ('pdf_file', 'thumbnail', 'preview_image')
+
+
+class WorksheetImporter:
+    """
+    Импорт рабочих листов пачками
+
+    Параметры:
+        batch_size: размер пачки для bulk_create/bulk_update
+        check_files: проверять наличие PDF в хранилище
+        file_check_workers: сколько потоков проверяют наличие PDF
+            (проверка - это ожидание диска или сети, а не работа CPU)
+        log: функция для вывода предупреждений (по умолчанию print)
+    """
+
+    def __init__(self, batch_size=500, check_files=True, file_check_workers=8, log=print):
+        self.batch_size = batch_size
+        self.check_files = check_files
+        self.file_check_workers = file_check_workers
+        self.log = log
+
+        self.stats = {
+            'created': 0,
+            'updated': 0,
+            'skipped': 0,
+            'files_missing': 0,
+            'previews_queued': 0,
+        }
+        # Время по этапам, секунды
+        self.timings = defaultdict(float)
+        self.imported_ids = set()
+        # Прежние категории перенесенных листов: их списки похожих тоже меняются
+        self.old_category_ids = set()
+        self.worksheet_ids = {}
+        # PDF из импортированных строк, которых нет в хранилище
+        self.missing_files = []
+
+        self._load_maps()
+
+    def _load_maps(self):
+        """Справочники slug -> id загружаются один раз на весь импорт"""
+        with self._timer('загрузка справочников'):
+            self.category_ids = dict(Category.objects.values_list('slug', 'id'))
+            self.tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+
+    def get_state(self):
+        """Состояние для checkpoint (между пачками хранить нечего)"""
+        return {}
+
+    def set_state(self, state):
+        pass
+
+    def import_rows(self, rows):
+        """
+        Импортировать пачку строк JSON
+
+        Строки с уже существующим slug обновляются, остальные создаются.
+        Теги заменяются только у строк с непустым tag_slugs (как в import_worksheets.py).
+        """
+        with self._timer('старые имена файлов'):
+            rows = self._apply_aliases(rows)
+
+        missing_files = set()
+        if self.check_files:
+            with self._timer('проверка файлов'):
+                missing_files = self._find_missing_files({row['pdf_file'] for row in rows})
+
+        with self._timer('разбор строк'):
+            values_by_slug, tags_by_slug = self._parse_rows(rows, missing_files)
+
+        with self._timer('поиск существующих'):
+            self.worksheet_ids = self._get_existing_ids(list(values_by_slug))
+
+        new_slugs = [slug for slug in values_by_slug if slug not in self.worksheet_ids]
+        existing_slugs = [slug for slug in values_by_slug if slug in self.worksheet_ids]
+
+        with self._timer('создание'):
+            self._create(new_slugs, values_by_slug)
+
+        with self._timer('обновление'):
+            self._update(existing_slugs, values_by_slug)
+
+        with self._timer('теги'):
+            self._set_tags({
+                self.worksheet_ids[slug]: tag_ids
+                for slug, tag_ids in tags_by_slug.items()
+            })
+
+    def flush(self):
+        """Поисковый индекс и очередь превью для импортированных с прошлого flush()"""
+        ids = list(self.imported_ids)
+        self.imported_ids.clear()
+
+        with self._timer('поисковый индекс'):
+            search.update_index(Worksheet.objects.filter(pk__in=ids))
+
+        with self._timer('очередь превью'):
+            self.stats['previews_queued'] += self._enqueue_missing_previews(ids)
+
+        # Индекс похожих пересчитается после коммита
+        similarity.schedule_similar_refresh(ids, self.old_category_ids)
+        self.old_category_ids = set()
+
+    def finish(self):
+        """
+        Обновить все, что обычно делают сигналы, один раз на весь импорт
+
+        Возвращает:
+            dict: статистика импорта
+        """
+        self.flush()
+
+        with self._timer('счетчики тегов'):
+            Tag.objects.all().update_usage_counts()
+
+        bump_content_version()
+        return self.stats
+
+    # === Этапы ===
+
+    def _apply_aliases(self, rows):
+        """Заменить в строках старые имена файлов на имена по хэшу (один запрос на пачку)"""
+        names = {
+            row.get(field)
+            for row in rows
+            for field in MEDIA_FIELDS
+            if row.get(field)
+        }
+        if not names:
+            return rows
+
+        aliases = dict(
+            MediaAlias.objects.filter(name__in=names).values_list('name', 'hashed_name')
+        )
+        if not aliases:
+            return rows
+
+        return [
+            {
+                **row,
+                **{
+                    field: aliases[row[field]]
+                    for field in MEDIA_FIELDS
+                    if row.get(field) in aliases
+                },
+            }
+            for row in rows
+        ]
+
+    def _parse_rows(self, rows, missing_files):
+        values_by_slug = {}
+        tags_by_slug = {}
+
+        for row in rows:
+            category_id = self.category_ids.get(row.get('category_slug'))
+            if category_id is None:
+                self.log(f"  ⚠️  Категория '{row.get('category_slug')}' не найдена для '{row.get('title')}'")
+                self.stats['skipped'] += 1
+                continue
+
+            if row['pdf_file'] in missing_files:
+                # Все равно импортируем, но считаем
+                self.stats['files_missing'] += 1
+                self.missing_files.append(row['pdf_file'])
+
+            # При повторе slug в файле побеждает последняя строка
+            values_by_slug[row['slug']] = {
+                'title': row['title'],
+                'description': row['description'],
+                'category_id': category_id,
+                'grade_level': row['grade_level'],
+                'difficulty': row['difficulty'],
+                'pdf_file': row['pdf_file'],
+                'thumbnail': row.get('thumbnail') or '',
+                'preview_image': row.get('preview_image') or '',
+                'meta_title': row.get('meta_title') or '',
+                'meta_description': row.get('meta_description') or '',
+                'is_featured': bool(row.get('is_featured')),
+                'is_published': bool(row.get('is_published')),
+            }
+
+            tag_slugs = [slug.strip() for slug in (row.get('tag_slugs') or '').split(',') if slug.strip()]
+            if tag_slugs:
+                # Неизвестные теги пропускаются
+                tags_by_slug[row['slug']] = {
+                    self.tag_ids[slug] for slug in tag_slugs if slug in self.tag_ids
+                }
+
+        return values_by_slug, tags_by_slug
+
+    def _find_missing_files(self, names):
+        """Проверить наличие файлов в хранилище параллельно, вернуть отсутствующие"""
+        names = sorted(names)
+        with ThreadPoolExecutor(max_workers=self.file_check_workers) as executor:
+            exists = list(executor.map(default_storage.exists, names))
+        return {name for name, found in zip(names, exists) if not found}
+
+    def _get_existing_ids(self, slugs):
+        """slug -> id для уже существующих worksheets"""
+        existing = {}
+        for start in range(0, len(slugs), self.batch_size):
+            existing.update(
+                Worksheet.objects
+                .filter(slug__in=slugs[start:start + self.batch_size])
+                .values_list('slug', 'id')
+            )
+        return existing
+
+    def _create(self, slugs, values_by_slug):
+        if not slugs:
+            return
+
+        worksheets = [Worksheet(slug=slug, **values_by_slug[slug]) for slug in slugs]
+        Worksheet.objects.bulk_create(worksheets, batch_size=self.batch_size)
+
+        # Не все базы возвращают id из bulk_create - дочитываем по slug
+        created_ids = dict(Worksheet.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+        self.worksheet_ids.update(created_ids)
+        self.imported_ids.update(created_ids.values())
+        self.stats['created'] += len(created_ids)
+
+    def _update(self, slugs, values_by_slug):
+        if not slugs:
+            return
+
+        # bulk_update не заполняет auto_now - ставим updated_at сами
+        now = timezone.now()
+        worksheets = Worksheet.objects.in_bulk(slugs, field_name='slug')
+        for slug, worksheet in worksheets.items():
+            if worksheet.category_id != values_by_slug[slug]['category_id']:
+                self.old_category_ids.add(worksheet.category_id)
+            for field, value in values_by_slug[slug].items():
+                setattr(worksheet, field, value)
+            worksheet.updated_at = now
+
+        # Через базовый менеджер (обычный QuerySet): WorksheetQuerySet.update()
+        # на каждую пачку пересчитал бы теги (is_published приходит выражением
+        # Case) и индекс похожих - это делают flush() и finish()
+        Worksheet._base_manager.bulk_update(
+            worksheets.values(),
+            IMPORT_FIELDS + ['updated_at'],
+            batch_size=self.batch_size
+        )
+        self.imported_ids.update(worksheet.pk for worksheet in worksheets.values())
+        self.stats['updated'] += len(worksheets)
+
+    def _set_tags(self, tags_by_worksheet):
+        """Заменить теги worksheets: удалить лишние связи и добавить недостающие"""
+        if not tags_by_worksheet:
+            return
+
+        through = Worksheet.tags.through
+        current = defaultdict(set)
+        link_ids = {}
+        for link_id, worksheet_id, tag_id in through.objects.filter(
+            worksheet_id__in=tags_by_worksheet
+        ).values_list('id', 'worksheet_id', 'tag_id'):
+            current[worksheet_id].add(tag_id)
+            link_ids[worksheet_id, tag_id] = link_id
+
+        to_delete = []
+        to_create = []
+        for worksheet_id, tag_ids in tags_by_worksheet.items():
+            for tag_id in current[worksheet_id] - tag_ids:
+                to_delete.append(link_ids[worksheet_id, tag_id])
+            for tag_id in tag_ids - current[worksheet_id]:
+                to_create.append(through(worksheet_id=worksheet_id, tag_id=tag_id))
+
+        for start in range(0, len(to_delete), self.batch_size):
+            through.objects.filter(pk__in=to_delete[start:start + self.batch_size]).delete()
+        through.objects.bulk_create(to_create, batch_size=self.batch_size)
+
+    def _enqueue_missing_previews(self, ids):
+        """
+        Поставить в очередь превью для листов с PDF, но без картинок
+
+        Обычно это делает Worksheet.save(), который bulk-операции не вызывают
+
+        Возвращает:
+            int: количество поставленных в очередь (0 без фонового воркера)
+        """
+        if not ids or not getattr(settings, 'PREVIEW_GENERATION_ASYNC', True):
+            return 0
+
+        missing_ids = set(
+            Worksheet.objects
+            .filter(pk__in=ids)
+            .exclude(pdf_file='')
+            .filter(
+                Q(thumbnail='') | Q(thumbnail__isnull=True)
+                | Q(preview_image='') | Q(preview_image__isnull=True)
+            )
+            .values_list('pk', flat=True)
+        )
+        already_queued = set(
+            PreviewJob.objects
+            .filter(worksheet_id__in=missing_ids, status=JobStatus.PENDING)
+            .values_list('worksheet_id', flat=True)
+        )
+
+        PreviewJob.objects.bulk_create(
+            [PreviewJob(worksheet_id=pk) for pk in missing_ids - already_queued],
+            batch_size=self.batch_size
+        )
+        Worksheet.objects.filter(pk__in=missing_ids).update(
+            preview_status=PreviewStatus.PENDING,
+            preview_error=''
+        )
+        return len(missing_ids)
+
+    # === Вспомогательное ===
+
+    @contextmanager
+    def _timer(self, stage):
+        """Прибавить время блока к timings[stage]"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[stage] += time.monotonic() - started
@@ -0,0 +1,176 @@
+"""
+Фоновая очередь генерации превью (хранится в базе, модель PreviewJob)
+
+Worksheet.save() только ставит задание в очередь, а рендер PDF
+выполняет отдельный процесс:
+
+    python manage.py run_preview_worker
+
+Задание забирается через SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL),
+поэтому можно запускать несколько воркеров. Упавшее задание повторяется
+с экспоненциальной задержкой, после max_attempts помечается как failed.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import JobStatus, PreviewJob, PreviewStatus, Worksheet
+
+# Базовая задержка перед повтором (удваивается с каждой попыткой)
+RETRY_DELAY = timedelta(seconds=30)
+
+# Задание в статусе running дольше этого срока считается брошенным
+# (воркер упал посреди рендера) и забирается заново
+STALE_JOB_TIMEOUT = timedelta(minutes=10)
+
+
+def enqueue_previews(worksheet, force=False):
+    """
+    Поставить генерацию превью worksheet в очередь
+
+    Если PREVIEW_GENERATION_ASYNC = False (например, локально без воркера),
+    превью генерируются сразу, как раньше.
+
+    Параметры:
+        force: рендерить PDF заново, не беря готовые превью листов
+            с тем же PDF (явное пересоздание превью)
+
+    Возвращает:
+        PreviewJob | None: задание (None при синхронной генерации)
+    """
+    if not getattr(settings, 'PREVIEW_GENERATION_ASYNC', True):
+        worksheet.generate_previews(force=force)
+        return None
+
+    Worksheet.objects.filter(pk=worksheet.pk).update(
+        preview_status=PreviewStatus.PENDING,
+        preview_error=''
+    )
+    worksheet.preview_status = PreviewStatus.PENDING
+    worksheet.preview_error = ''
+
+    # Не плодим дубли: одного ожидающего задания на worksheet достаточно
+    job = PreviewJob.objects.filter(
+        worksheet=worksheet,
+        status=JobStatus.PENDING
+    ).first()
+    if job is None:
+        job = PreviewJob.objects.create(worksheet=worksheet, force=force)
+    elif force and not job.force:
+        job.force = True
+        job.save(update_fields=['force'])
+    return job
+
+
+def enqueue_many(worksheets, force=False):
+    """
+    Поставить в очередь генерацию превью для нескольких worksheets (см. enqueue_previews)
+
+    Возвращает:
+        int: количество поставленных в очередь
+    """
+    count = 0
+    for worksheet in worksheets:
+        if worksheet.pdf_file:
+            enqueue_previews(worksheet, force=force)
+            count += 1
+    return count
+
+
+def claim_next_job():
+    """
+    Забрать следующее задание из очереди
+
+    Возвращает:
+        PreviewJob | None: задание в статусе running или None если очередь пуста
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            PreviewJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=JobStatus.PENDING, run_after__lte=now)
+                | Q(status=JobStatus.RUNNING, started_at__lt=now - STALE_JOB_TIMEOUT)
+            )
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.started_at = now
+        job.save(update_fields=['status', 'attempts', 'started_at'])
+
+    Worksheet.objects.filter(pk=job.worksheet_id).update(
+        preview_status=PreviewStatus.PROCESSING
+    )
+    return job
+
+
+def run_job(job):
+    """
+    Выполнить задание: сгенерировать превью и обновить статусы
+
+    Возвращает:
+        bool: True если превью сгенерированы
+    """
+    worksheet = job.worksheet
+
+    try:
+        worksheet.render_previews(force=job.force)
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+        job.last_error = error
+        job.finished_at = timezone.now()
+
+        if job.attempts < job.max_attempts:
+            # Повторим позже: 30с, 60с, 120с...
+            job.status = JobStatus.PENDING
+            job.run_after = timezone.now() + RETRY_DELAY * (2 ** (job.attempts - 1))
+            worksheet_status = PreviewStatus.PENDING
+        else:
+            job.status = JobStatus.FAILED
+            worksheet_status = PreviewStatus.FAILED
+
+        job.save(update_fields=['status', 'run_after', 'last_error', 'finished_at'])
+        Worksheet.objects.filter(pk=worksheet.pk).update(
+            preview_status=worksheet_status,
+            preview_error=error
+        )
+        return False
+
+    # render_previews() сам выставляет preview_status = ready
+    job.status = JobStatus.DONE
+    job.last_error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'last_error', 'finished_at'])
+    return True
+
+
+def run_pending(limit=None):
+    """
+    Выполнить задания из очереди, пока она не опустеет
+
+    Параметры:
+        limit: максимум заданий за вызов (None - без ограничения)
+
+    Возвращает:
+        tuple: (успешно, с ошибкой)
+    """
+    succeeded = failed = 0
+    while limit is None or succeeded + failed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        if run_job(job):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
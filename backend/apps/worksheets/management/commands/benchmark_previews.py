@@ -0,0 +1,184 @@
+"""
+Бенчмарк генерации превью (apps/worksheets/previews.py)
+
+Стратегии:
+- legacy (200 DPI): как до оптимизации - рендер в 200 DPI и два PNG 1x
+- legacy + renditions: рендер в 200 DPI и тот же набор рендиций, что
+  в production (get_formats() x RENDITION_SCALES) - сколько стоил бы
+  production-набор без рендера в целевом размере
+- production: то, что реально выполняют воркер и regenerate_previews
+
+Каждая стратегия запускается в отдельном чистом процессе, поэтому
+пиковая память (VmHWM) не смешивается между ними.
+
+Пример:
+    python manage.py benchmark_previews media/worksheets/pdf/2026/01/ --repeat 3
+"""
+
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.worksheets import previews
+
+# Старый способ: растеризация в 200 DPI (~1650x2340 для A4)
+LEGACY_DPI = 200
+
+
+def render_legacy_page(pdf_path):
+    return previews.convert_from_path(
+        pdf_path,
+        first_page=1,
+        last_page=1,
+        dpi=LEGACY_DPI
+    )[0]
+
+
+def render_legacy(pdf_path, formats):
+    """Генерация превью как до оптимизации - для сравнения"""
+    first_page = render_legacy_page(pdf_path)
+    return {
+        'thumbnail': previews.resize_to_png(first_page, previews.THUMBNAIL_SIZE),
+        'preview': previews.resize_to_png(first_page, previews.PREVIEW_SIZE),
+    }
+
+
+def render_legacy_renditions(pdf_path, formats):
+    """Рендер в 200 DPI + production-набор рендиций"""
+    return previews.build_renditions(
+        render_legacy_page(pdf_path), formats=formats, scales=previews.RENDITION_SCALES
+    )
+
+
+def render_production(pdf_path, formats):
+    """Как в воркере: рендер в размере самой большой рендиции"""
+    return previews.render_preview_images(
+        pdf_path, formats=formats, scales=previews.RENDITION_SCALES
+    )
+
+
+STRATEGIES = {
+    'legacy (200 DPI)': render_legacy,
+    'legacy + renditions': render_legacy_renditions,
+    'production': render_production,
+}
+
+
+def get_peak_rss_mb():
+    """
+    Пиковая память текущего процесса, МБ
+
+    На Linux берем VmHWM: ru_maxrss после fork/exec наследует
+    память родителя и завышает результат для дочернего процесса.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS отдает байты, Linux - килобайты
+    return maxrss / 1024 / 1024 if sys.platform == 'darwin' else maxrss / 1024
+
+
+def run_strategy(name, pdf_paths, repeat, formats):
+    """
+    Выполняется в отдельном процессе (без настроек Django,
+    поэтому форматы передаются готовым списком)
+
+    Возвращает:
+        dict: время и пиковая память python-процесса и poppler
+    """
+    render = STRATEGIES[name]
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for pdf_path in pdf_paths:
+            render(pdf_path, formats)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'elapsed': elapsed,
+        'renders': repeat * len(pdf_paths),
+        'python_rss_mb': get_peak_rss_mb(),
+        # Для poppler доступен только ru_maxrss (оценка сверху, см. get_peak_rss_mb)
+        'poppler_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время и пиковую память генерации превью до/после оптимизации'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='+',
+            help='PDF файлы или папки с PDF',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=1,
+            help='Сколько раз прогнать каждый файл (по умолчанию 1)',
+        )
+
+    def handle(self, *args, **options):
+        if not previews.PDF2IMAGE_AVAILABLE:
+            raise CommandError('pdf2image не установлен')
+
+        pdf_paths = self.collect_pdfs(options['paths'])
+        if not pdf_paths:
+            raise CommandError('PDF файлы не найдены')
+
+        formats = previews.get_formats()
+        self.stdout.write(
+            f'PDF файлов: {len(pdf_paths)}, повторов: {options["repeat"]}, '
+            f'форматы: {", ".join(formats)}, плотности: {previews.RENDITION_SCALES}\n'
+        )
+
+        results = {}
+        for name in STRATEGIES:
+            # Новый процесс на каждую стратегию - чистый замер памяти
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                results[name] = executor.submit(
+                    run_strategy, name, pdf_paths, options['repeat'], formats
+                ).result()
+
+        self.stdout.write(
+            f'{"Стратегия":<20} {"Время, с":>10} {"мс/файл":>10} '
+            f'{"RSS python, МБ":>16} {"RSS poppler, МБ":>17}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<20} {result["elapsed"]:>10.2f} '
+                f'{result["elapsed"] / result["renders"] * 1000:>10.1f} '
+                f'{result["python_rss_mb"]:>16.1f} {result["poppler_rss_mb"]:>17.1f}'
+            )
+
+        legacy, production = results['legacy + renditions'], results['production']
+        self.stdout.write(self.style.SUCCESS(
+            f'\nProduction против рендера в 200 DPI с теми же рендициями: '
+            f'x{legacy["elapsed"] / production["elapsed"]:.2f}, '
+            f'пиковая память python: {legacy["python_rss_mb"]:.1f} -> {production["python_rss_mb"]:.1f} МБ'
+        ))
+
+    def collect_pdfs(self, paths):
+        pdf_paths = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    pdf_paths.extend(
+                        os.path.join(root, name) for name in sorted(files)
+                        if name.lower().endswith('.pdf')
+                    )
+            elif path.lower().endswith('.pdf'):
+                pdf_paths.append(path)
+        return pdf_paths
@@ -0,0 +1,89 @@
+"""
+Бенчмарк расчета рекомендаций по тегам на синтетическом каталоге
+
+База не используется: генерируются случайные наборы тегов
+(популярность тегов по закону Ципфа, 1-5 тегов на лист), замеряется
+построение матрицы и поиск top-k (recommendations.compute_recommendations).
+Запись в базу не входит в замер - она линейна по числу листов.
+
+Пример:
+    python manage.py benchmark_recommendations
+    python manage.py benchmark_recommendations --sizes 1000 10000 100000 --tags 500
+"""
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from apps.worksheets import recommendations
+
+
+def generate_links(worksheet_count, tag_count, rng):
+    """Случайные связи worksheet-тег: (rows, cols)"""
+    popularity = 1 / np.arange(1, tag_count + 1)
+    popularity /= popularity.sum()
+
+    per_worksheet = rng.integers(1, 6, size=worksheet_count)
+    rows = np.repeat(np.arange(worksheet_count), per_worksheet)
+    cols = rng.choice(tag_count, size=len(rows), p=popularity)
+    return rows, cols
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время расчета рекомендаций для 1k / 10k / 100k листов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1000, 10000, 100000],
+            help='Количество листов (по умолчанию 1000 10000 100000)',
+        )
+        parser.add_argument(
+            '--tags',
+            type=int,
+            default=100,
+            help='Количество тегов в каталоге (по умолчанию 100)',
+        )
+        parser.add_argument(
+            '--metric',
+            choices=recommendations.METRICS,
+            default='cosine',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=recommendations.RECOMMENDATIONS_LIMIT,
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+        )
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+
+        self.stdout.write(
+            f'Тегов: {options["tags"]}, мера: {options["metric"]}, top-{options["limit"]}\n'
+        )
+        self.stdout.write(
+            f'{"Листов":>10} {"Профилей":>10} {"Матрица, с":>12} {"Top-k, с":>10} {"Всего, с":>10}'
+        )
+
+        for size in options['sizes']:
+            rows, cols = generate_links(size, options['tags'], rng)
+
+            started = time.perf_counter()
+            matrix = recommendations.build_tag_matrix(rows, cols, (size, options['tags']))
+            built = time.perf_counter()
+            recommendations.compute_recommendations(matrix, options['limit'], options['metric'])
+            finished = time.perf_counter()
+
+            _, profiles = recommendations.group_profiles(matrix)
+            self.stdout.write(
+                f'{size:>10} {profiles.shape[0]:>10} {built - started:>12.3f} '
+                f'{finished - built:>10.3f} {finished - started:>10.3f}'
+            )
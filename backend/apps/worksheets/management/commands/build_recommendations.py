@@ -0,0 +1,41 @@
+"""
+Пакетный пересчет рекомендаций по пересечению тегов (apps/worksheets/recommendations.py)
+
+Запускается по расписанию (cron), например раз в сутки:
+    python manage.py build_recommendations
+    python manage.py build_recommendations --metric jaccard --limit 12
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.worksheets import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации рабочих листов по общим тегам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--metric',
+            choices=recommendations.METRICS,
+            default='cosine',
+            help='Мера сходства наборов тегов (по умолчанию cosine)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=recommendations.RECOMMENDATIONS_LIMIT,
+            help=f'Рекомендаций на лист (по умолчанию {recommendations.RECOMMENDATIONS_LIMIT})',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        built = recommendations.rebuild(limit=options['limit'], metric=options['metric'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Рекомендации построены для {built} листов, '
+                f'время: {time.monotonic() - started:.2f} сек'
+            )
+        )
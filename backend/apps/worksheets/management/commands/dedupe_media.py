@@ -0,0 +1,187 @@
+"""
+Перевод медиа файлов рабочих листов в хранилище по хэшу содержимого
+
+Новые загрузки сразу сохраняются по хэшу (apps/core/storage.py), а файлы
+из импорта и старых загрузок лежат под обычными именами - одинаковые
+PDF и превью занимают место на диске несколько раз.
+
+Команда копирует каждый такой файл под имя по хэшу (одинаковые файлы
+сливаются в один), переписывает ссылки в worksheets (pdf_file, thumbnail,
+preview_image, рендиции) и удаляет старые файлы. Для листов с готовыми
+превью запоминается хэш PDF (preview_pdf_hash) - лист с тем же PDF
+возьмет их без рендера.
+
+Старые имена записываются в MediaAlias: повторный импорт JSON со старыми
+именами (apps/worksheets/importer.py) подставит вместо них имена по хэшу.
+После переписывания ссылок поднимается версия кэша API.
+
+Примеры:
+    python manage.py dedupe_media --dry-run
+    python manage.py dedupe_media
+    python manage.py dedupe_media --keep-old
+"""
+
+import posixpath
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.cache import bump_content_version
+from apps.core.storage import file_digest, get_name_digest
+from apps.worksheets.models import MediaAlias, PreviewStatus, Worksheet, media_storage
+
+# Папка рендиций превью (остальные папки - upload_to полей)
+RENDITIONS_FOLDER = 'worksheets/renditions/'
+
+
+class Command(BaseCommand):
+    help = 'Переводит медиа файлы worksheets в хранилище по хэшу содержимого'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать, ничего не копировать и не менять',
+        )
+        parser.add_argument(
+            '--keep-old',
+            action='store_true',
+            help='Не удалять файлы со старыми именами',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Размер пачки при обновлении worksheets',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        # Старое имя -> (новое имя, хэш); None - файла нет в хранилище
+        self.renamed = {}
+        self.stats = {'files': 0, 'duplicates': 0, 'missing': 0, 'bytes_saved': 0}
+        self.seen_digests = set()
+
+        folders = {
+            field: Worksheet._meta.get_field(field).upload_to
+            for field in ('pdf_file', 'thumbnail', 'preview_image')
+        }
+
+        changed = []
+        now = timezone.now()
+        worksheets = Worksheet.objects.only(
+            'pdf_file', 'thumbnail', 'preview_image', 'preview_renditions',
+            'preview_pdf_hash', 'preview_status'
+        ).order_by('id')
+
+        for worksheet in worksheets.iterator(chunk_size=options['batch_size']):
+            is_changed = False
+            for field, folder in folders.items():
+                file = getattr(worksheet, field)
+                new_name, digest = self.convert(file.name, folder)
+                if new_name != file.name:
+                    file.name = new_name
+                    is_changed = True
+
+                if (
+                    field == 'pdf_file' and digest and not worksheet.preview_pdf_hash
+                    and worksheet.preview_status == PreviewStatus.READY
+                    and worksheet.thumbnail and worksheet.preview_image
+                ):
+                    worksheet.preview_pdf_hash = digest
+                    is_changed = True
+
+            for items in (worksheet.preview_renditions or {}).values():
+                for item in items:
+                    new_name, _ = self.convert(item['name'], RENDITIONS_FOLDER)
+                    if new_name != item['name']:
+                        item['name'] = new_name
+                        is_changed = True
+
+            if is_changed:
+                # Новый updated_at сбрасывает кэш карточки листа (apps/worksheets/cards.py)
+                worksheet.updated_at = now
+                changed.append(worksheet)
+
+        if not self.dry_run:
+            with transaction.atomic():
+                Worksheet.objects.bulk_update(
+                    changed,
+                    [
+                        'pdf_file', 'thumbnail', 'preview_image', 'preview_renditions',
+                        'preview_pdf_hash', 'updated_at'
+                    ],
+                    batch_size=options['batch_size']
+                )
+                MediaAlias.objects.bulk_create(
+                    [
+                        MediaAlias(name=old_name, hashed_name=result[0])
+                        for old_name, result in self.renamed.items()
+                        if result is not None and result[0] != old_name
+                    ],
+                    batch_size=options['batch_size'],
+                    update_conflicts=True,
+                    unique_fields=['name'],
+                    update_fields=['hashed_name'],
+                )
+
+            # bulk_update не вызывает сигналы - кэш API сбрасываем сами
+            bump_content_version()
+
+            # Ссылки переписаны - старые имена больше никому не нужны
+            if not options['keep_old']:
+                for old_name, result in self.renamed.items():
+                    if result is not None and result[0] != old_name:
+                        media_storage.delete(old_name)
+
+        prefix = '[dry-run] ' if self.dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Файлов переведено: {self.stats['files']}, "
+            f"из них дубликатов: {self.stats['duplicates']} "
+            f"({self.stats['bytes_saved'] / (1024 * 1024):.1f} MB), "
+            f"не найдено: {self.stats['missing']}, worksheets обновлено: {len(changed)}"
+        ))
+
+    def convert(self, name, folder):
+        """
+        Новое имя файла по хэшу (каждый файл копируется один раз)
+
+        Возвращает:
+            tuple: (новое имя, хэш); для пустых, уже переведенных
+                   и отсутствующих файлов - (прежнее имя, хэш или None)
+        """
+        if not name:
+            return name, None
+
+        digest = get_name_digest(name)
+        if digest:
+            return name, digest
+
+        if name not in self.renamed:
+            self.renamed[name] = self.copy(name, folder)
+
+        result = self.renamed[name]
+        return result if result is not None else (name, None)
+
+    def copy(self, name, folder):
+        if not media_storage.exists(name):
+            self.stats['missing'] += 1
+            return None
+
+        # Для хранилища имя задает только папку и расширение
+        upload_name = folder + posixpath.basename(name)
+        with media_storage.open(name, 'rb') as file:
+            digest = file_digest(file)
+            new_name = media_storage.get_hashed_name(upload_name, digest)
+
+            self.stats['files'] += 1
+            if digest in self.seen_digests or media_storage.exists(new_name):
+                self.stats['duplicates'] += 1
+                self.stats['bytes_saved'] += file.size
+            self.seen_digests.add(digest)
+
+            if not self.dry_run:
+                new_name = media_storage.save(upload_name, file)
+
+        return new_name, digest
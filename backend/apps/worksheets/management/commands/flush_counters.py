@@ -0,0 +1,21 @@
+"""
+Команда для принудительного сброса буфера счетчиков просмотров/скачиваний
+
+Инкременты всех воркеров лежат в общей таблице CounterIncrement,
+поэтому команда сбрасывает все накопленное. Можно запускать из cron
+или перед выгрузкой статистики.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.worksheets import counters
+
+
+class Command(BaseCommand):
+    help = 'Сбрасывает накопленные инкременты views_count/downloads_count в базу'
+
+    def handle(self, *args, **options):
+        updated = counters.flush()
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Счетчики сброшены для {updated} рабочих листов')
+        )
@@ -0,0 +1,90 @@
+"""
+Команда для быстрого импорта рабочих листов из JSON (worksheets_data.json)
+
+Весь импорт выполняется в одной транзакции через bulk_create/bulk_update
+(см. apps/worksheets/importer.py), сигналы на каждую строку не вызываются,
+поисковый индекс и счетчики тегов обновляются один раз в конце.
+
+Примеры:
+    python manage.py import_worksheets worksheets_data.json
+    python manage.py import_worksheets /app/worksheets_data.json --dry-run
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.worksheets.importer import WorksheetImporter
+
+
+class DryRunRollback(Exception):
+    """Откат транзакции в режиме --dry-run"""
+
+
+class Command(BaseCommand):
+    help = 'Импортирует рабочие листы из JSON пачками (bulk_create/bulk_update)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='worksheets_data.json',
+            help='JSON файл с рабочими листами (по умолчанию worksheets_data.json)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Размер пачки для bulk-запросов (по умолчанию 500)',
+        )
+        parser.add_argument(
+            '--skip-file-check',
+            action='store_true',
+            help='Не проверять наличие PDF файлов в хранилище',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Выполнить импорт и откатить транзакцию',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        try:
+            with open(options['path'], encoding='utf-8') as f:
+                rows = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Не удалось прочитать {options["path"]}: {e}')
+
+        self.stdout.write(f'📂 Строк в файле: {len(rows)}')
+
+        try:
+            with transaction.atomic():
+                importer = WorksheetImporter(
+                    batch_size=options['batch_size'],
+                    check_files=not options['skip_file_check'],
+                    log=self.stdout.write,
+                )
+                importer.import_rows(rows)
+                stats = importer.finish()
+
+                if options['dry_run']:
+                    raise DryRunRollback
+        except DryRunRollback:
+            self.stdout.write(self.style.WARNING('\nРежим --dry-run: изменения откачены'))
+
+        self.stdout.write('\n⏱  Время по этапам:')
+        for stage, seconds in importer.timings.items():
+            self.stdout.write(f'  {stage}: {seconds:.2f} сек')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n🎉 Создано: {stats["created"]}, обновлено: {stats["updated"]}, '
+                f'пропущено: {stats["skipped"]}, PDF не найдено: {stats["files_missing"]}, '
+                f'превью в очереди: {stats["previews_queued"]}, '
+                f'всего: {time.monotonic() - started:.2f} сек'
+            )
+        )
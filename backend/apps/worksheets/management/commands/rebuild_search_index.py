@@ -0,0 +1,21 @@
+"""
+Команда для полной перестройки поискового индекса рабочих листов
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.worksheets.models import Worksheet
+from apps.worksheets.search import update_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс (tsvector / FTS5) для всех worksheet'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Перестройка поискового индекса...')
+
+        count = update_index(Worksheet.objects.all())
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Проиндексировано рабочих листов: {count}')
+        )
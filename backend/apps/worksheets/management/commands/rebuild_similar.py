@@ -0,0 +1,28 @@
+"""
+Полная перестройка индекса похожих рабочих листов (apps/worksheets/similarity.py)
+
+Обычно индекс обновляется сам после сохранения worksheets;
+команда нужна после первого развертывания и для проверки.
+
+Пример:
+    python manage.py rebuild_similar
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.worksheets import similarity
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает индекс похожих рабочих листов'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        built = similarity.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Списков похожих: {built}, время: {time.monotonic() - started:.2f} сек'
+            )
+        )
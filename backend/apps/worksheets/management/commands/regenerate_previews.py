@@ -0,0 +1,203 @@
+"""
+Команда для массовой перегенерации превью из PDF в несколько процессов
+
+Рендер PDF (poppler + ресайз) выполняется в пуле процессов по числу ядер,
+а сохранение файлов и запись в базу - в основном процессе. Листы с одним
+и тем же PDF (одинаковое имя в хранилище) рендерятся один раз.
+Готовые превью листов с тем же PDF не используются - каждый PDF
+рендерится заново.
+
+Прогресс сохраняется в checkpoint-файл: если команду прервать,
+повторный запуск с теми же фильтрами продолжит с того же места
+(--restart - начать заново). У каждого набора фильтров свой файл,
+поэтому запуск с другими --category/--only-missing/--since не
+пропускает листы, обработанные другим запуском.
+
+Примеры:
+    python manage.py regenerate_previews
+    python manage.py regenerate_previews --only-missing
+    python manage.py regenerate_previews --category matematika --since 2026-01-01
+    python manage.py regenerate_previews --workers 4
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, time as dt_time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.categories.models import Category
+from apps.worksheets.models import Worksheet
+from apps.worksheets.previews import RENDITION_SCALES, get_formats, render_preview_images
+
+
+def render_worksheet(worksheet_id, pdf_path, formats):
+    """Выполняется в дочернем процессе: только рендер, без базы"""
+    return worksheet_id, render_preview_images(pdf_path, formats=formats, scales=RENDITION_SCALES)
+
+
+class Command(BaseCommand):
+    help = 'Перегенерирует превью из PDF параллельно в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only-missing',
+            action='store_true',
+            help='Только worksheets без миниатюры или большого превью',
+        )
+        parser.add_argument(
+            '--since',
+            help='Только worksheets, измененные начиная с даты (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--category',
+            help='Slug категории (для родительской - вместе с дочерними)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Количество процессов (по умолчанию - по числу ядер)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с id уже обработанных worksheets (для продолжения после прерывания); '
+                 'по умолчанию - свой файл для каждого набора фильтров',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Игнорировать checkpoint и начать заново',
+        )
+
+    def handle(self, *args, **options):
+        queryset = self.get_queryset(options)
+        checkpoint = options['checkpoint'] or self.get_checkpoint_path(options)
+
+        if options['restart'] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        done_ids = self.read_checkpoint(checkpoint)
+        storage = Worksheet._meta.get_field('pdf_file').storage
+        # PDF -> листы с этим PDF: каждый файл рендерится один раз
+        ids_by_pdf = {}
+        for worksheet_id, pdf_name in queryset.values_list('id', 'pdf_file'):
+            if worksheet_id not in done_ids:
+                ids_by_pdf.setdefault(pdf_name, []).append(worksheet_id)
+        tasks = [(worksheet_ids, storage.path(pdf_name)) for pdf_name, worksheet_ids in ids_by_pdf.items()]
+
+        if done_ids:
+            self.stdout.write(f'Продолжаем по checkpoint: уже обработано {len(done_ids)}')
+
+        total = sum(len(worksheet_ids) for worksheet_ids, _ in tasks)
+        self.stdout.write(
+            f'Worksheets для обработки: {total}, PDF: {len(tasks)}, процессов: {options["workers"]}\n'
+        )
+
+        if not tasks:
+            self.finish(checkpoint)
+            return
+
+        # Соединения с базой нельзя наследовать в дочерние процессы
+        connections.close_all()
+
+        # Настройки читаем в основном процессе, в дочерние передаем готовый список
+        formats = get_formats()
+        processed = failed = 0
+        started = time.monotonic()
+
+        with open(checkpoint, 'a') as checkpoint_file, \
+                ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {
+                executor.submit(render_worksheet, worksheet_ids[0], pdf_path, formats): worksheet_ids
+                for worksheet_ids, pdf_path in tasks
+            }
+
+            for future in as_completed(futures):
+                worksheet_ids = futures[future]
+                try:
+                    _, images = future.result()
+                except Exception as e:
+                    failed += len(worksheet_ids)
+                    self.stdout.write(self.style.ERROR(f'❌ Worksheet #{worksheet_ids[0]}: {e}'))
+                    continue
+
+                for worksheet_id in worksheet_ids:
+                    try:
+                        worksheet = Worksheet.objects.get(pk=worksheet_id)
+                        worksheet.save_preview_images(images)
+                    except Exception as e:
+                        failed += 1
+                        self.stdout.write(self.style.ERROR(f'❌ Worksheet #{worksheet_id}: {e}'))
+                        continue
+
+                    processed += 1
+                    checkpoint_file.write(f'{worksheet_id}\n')
+                checkpoint_file.flush()
+
+                if processed and processed % 10 == 0:
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(
+                        f'  Обработано: {processed}/{total} ({processed / elapsed:.1f} листов/сек)'
+                    )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n🎉 Готово: {processed}, ошибок: {failed}, '
+                f'время: {elapsed:.1f} сек, скорость: {processed / elapsed:.2f} листов/сек'
+            )
+        )
+
+        # Checkpoint больше не нужен, если все прошло без ошибок
+        if not failed:
+            self.finish(checkpoint)
+
+    def get_queryset(self, options):
+        queryset = Worksheet.objects.exclude(pdf_file='').order_by('id')
+
+        if options['only_missing']:
+            queryset = queryset.filter(
+                Q(thumbnail='') | Q(thumbnail__isnull=True)
+                | Q(preview_image='') | Q(preview_image__isnull=True)
+            )
+
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d')
+            except ValueError:
+                raise CommandError('--since должен быть в формате YYYY-MM-DD')
+            since = timezone.make_aware(datetime.combine(since.date(), dt_time.min))
+            queryset = queryset.filter(updated_at__gte=since)
+
+        if options['category']:
+            try:
+                category = Category.objects.get(slug=options['category'])
+            except Category.DoesNotExist:
+                raise CommandError(f'Категория "{options["category"]}" не найдена')
+            queryset = queryset.filter(Q(category=category) | Q(category__parent=category))
+
+        return queryset
+
+    def get_checkpoint_path(self, options):
+        """Checkpoint по умолчанию: имя зависит от фильтров выборки"""
+        filters = [options['only_missing'], options['since'], options['category']]
+        key = hashlib.md5(json.dumps(filters).encode('utf-8')).hexdigest()[:8]
+        return str(settings.BASE_DIR / f'.regenerate_previews.{key}.checkpoint')
+
+    def read_checkpoint(self, path):
+        if not os.path.exists(path):
+            return set()
+        with open(path) as f:
+            return {int(line) for line in f if line.strip()}
+
+    def finish(self, checkpoint):
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
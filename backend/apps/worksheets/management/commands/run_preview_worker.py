@@ -0,0 +1,47 @@
+"""
+Воркер фоновой генерации превью из PDF
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.worksheets import jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задания на генерацию превью из очереди (PreviewJob)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить текущие задания и выйти (без ожидания новых)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Пауза между проверками пустой очереди, секунд (по умолчанию 5)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🚀 Воркер генерации превью запущен')
+
+        try:
+            while True:
+                close_old_connections()
+                succeeded, failed = jobs.run_pending()
+
+                if succeeded or failed:
+                    self.stdout.write(f'  Готово: {succeeded}, с ошибкой: {failed}')
+
+                if options['once']:
+                    break
+
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('✓ Воркер остановлен'))
@@ -0,0 +1,226 @@
+"""
+Проверка целостности медиа файлов рабочих листов
+
+Дерево MEDIA_ROOT обходится пулом потоков (каждая папка - отдельная
+задача), затем сверяется с файлами, на которые ссылаются worksheets
+(pdf_file, thumbnail, preview_image и рендиции превью). В отчете:
+- missing: файл указан в модели, но его нет на диске
+- zero_byte: файл есть, но пустой
+- orphaned: файл в папке --prefix, на который никто не ссылается
+
+Размер и число страниц PDF сохраняются в Worksheet.pdf_size /
+pdf_page_count - админка показывает их, не обращаясь к диску.
+pdfinfo запускается только для PDF, размер которых изменился.
+
+Примеры:
+    python manage.py scan_media
+    python manage.py scan_media --workers 16 --json > media_report.json
+    python manage.py scan_media --dry-run
+"""
+
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.worksheets.models import Worksheet
+from apps.worksheets.previews import get_page_count
+
+# Сколько записей каждого вида выводить в текстовом отчете
+REPORT_LIMIT = 20
+
+
+def scan_directory(path):
+    """Файлы (путь -> размер) и подпапки одной папки"""
+    files = {}
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file():
+                files[entry.path] = entry.stat().st_size
+    return files, subdirs
+
+
+def scan_tree(root, workers):
+    """
+    Все файлы под root
+
+    Возвращает:
+        dict: {имя относительно root через '/': размер в байтах}
+    """
+    if not os.path.isdir(root):
+        return {}
+
+    files = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(scan_directory, root)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, subdirs = future.result()
+                files.update(found)
+                pending.update(executor.submit(scan_directory, path) for path in subdirs)
+
+    return {
+        os.path.relpath(path, root).replace(os.sep, '/'): size
+        for path, size in files.items()
+    }
+
+
+class Command(BaseCommand):
+    help = 'Сверяет медиа файлы worksheets с MEDIA_ROOT и кэширует размер/страницы PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Потоков для обхода папок и pdfinfo (по умолчанию 8)',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='worksheets/',
+            help='Папка в MEDIA_ROOT, где искать файлы-сироты (по умолчанию worksheets/)',
+        )
+        parser.add_argument(
+            '--skip-page-count',
+            action='store_true',
+            help='Не считать страницы PDF (не запускать pdfinfo)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только отчет, не сохранять размер и страницы в базу',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Вывести отчет в stdout в виде JSON',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        media_root = str(settings.MEDIA_ROOT)
+
+        files = scan_tree(media_root, options['workers'])
+        scanned = time.monotonic() - started
+
+        missing = []
+        zero_byte = []
+        referenced = set()
+        worksheets = Worksheet.objects.only(
+            'id', 'slug', 'pdf_file', 'thumbnail', 'preview_image',
+            'preview_renditions', 'pdf_size', 'pdf_page_count'
+        ).order_by('id')
+
+        for worksheet in worksheets:
+            names = [
+                ('pdf_file', worksheet.pdf_file.name),
+                ('thumbnail', worksheet.thumbnail.name),
+                ('preview_image', worksheet.preview_image.name),
+            ]
+            for items in (worksheet.preview_renditions or {}).values():
+                names.extend(('preview_renditions', item['name']) for item in items)
+
+            for field, name in names:
+                if not name or name in referenced:
+                    continue
+                referenced.add(name)
+                entry = {'worksheet': worksheet.slug, 'field': field, 'name': name}
+                if name not in files:
+                    missing.append(entry)
+                elif files[name] == 0:
+                    zero_byte.append(entry)
+
+        orphaned = sorted(
+            name for name in files
+            if name.startswith(options['prefix']) and name not in referenced
+        )
+
+        changed = self.update_pdf_info(worksheets, files, media_root, options)
+
+        report = {
+            'media_root': media_root,
+            'files_scanned': len(files),
+            'worksheets': len(worksheets),
+            'missing': missing,
+            'zero_byte': zero_byte,
+            'orphaned': orphaned,
+            'pdf_info_updated': len(changed),
+            'scan_seconds': round(scanned, 3),
+            'elapsed': round(time.monotonic() - started, 3),
+            'dry_run': options['dry_run'],
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(
+            f'📂 {media_root}: файлов {len(files)} (обход {scanned:.2f} сек), '
+            f'worksheets: {len(worksheets)}'
+        )
+        self.write_section('❌ Нет на диске', [
+            f'{item["worksheet"]}.{item["field"]}: {item["name"]}' for item in missing
+        ])
+        self.write_section('⚠️  Пустые файлы', [
+            f'{item["worksheet"]}.{item["field"]}: {item["name"]}' for item in zero_byte
+        ])
+        self.write_section(f'🗑  Файлы без ссылок в {options["prefix"]}', orphaned)
+
+        style = self.style.SUCCESS if not (missing or zero_byte) else self.style.WARNING
+        self.stdout.write(style(
+            f'\nНет на диске: {len(missing)}, пустых: {len(zero_byte)}, '
+            f'без ссылок: {len(orphaned)}, обновлено PDF: {len(changed)}'
+            f'{" (--dry-run, не сохранено)" if options["dry_run"] else ""}, '
+            f'время: {report["elapsed"]:.2f} сек'
+        ))
+
+    def update_pdf_info(self, worksheets, files, media_root, options):
+        """
+        Обновить pdf_size / pdf_page_count по результатам обхода
+
+        Страницы пересчитываются только для PDF, чей размер изменился
+        или еще не посчитан - pdfinfo запускается в пуле потоков.
+
+        Возвращает:
+            list: worksheets, у которых изменились поля
+        """
+        changed = {}
+        to_count = []
+        for worksheet in worksheets:
+            size = files.get(worksheet.pdf_file.name)
+            if size != worksheet.pdf_size:
+                worksheet.pdf_size = size
+                worksheet.pdf_page_count = None
+                changed[worksheet.pk] = worksheet
+            if size and worksheet.pdf_page_count is None and not options['skip_page_count']:
+                to_count.append(worksheet)
+
+        if to_count:
+            paths = [os.path.join(media_root, worksheet.pdf_file.name) for worksheet in to_count]
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                page_counts = list(executor.map(get_page_count, paths))
+
+            for worksheet, page_count in zip(to_count, page_counts):
+                if page_count is not None:
+                    worksheet.pdf_page_count = page_count
+                    changed[worksheet.pk] = worksheet
+
+        if changed and not options['dry_run']:
+            Worksheet.objects.bulk_update(changed.values(), ['pdf_size', 'pdf_page_count'], batch_size=500)
+        return list(changed.values())
+
+    def write_section(self, title, lines):
+        if not lines:
+            return
+        self.stdout.write(f'\n{title}: {len(lines)}')
+        for line in lines[:REPORT_LIMIT]:
+            self.stdout.write(f'  {line}')
+        if len(lines) > REPORT_LIMIT:
+            self.stdout.write(f'  ... и еще {len(lines) - REPORT_LIMIT} (полный список: --json)')
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.14 on 2026-10-17 12:45
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_structures(apps, schema_editor):
+    """GIN индекс для PostgreSQL или FTS5 таблица для SQLite"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX worksheets_search_vector_gin '
+            'ON worksheets_worksheet USING gin (search_vector)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE worksheets_worksheet_fts USING fts5('
+            'title, tags, category, description, '
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_search_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS worksheets_search_vector_gin')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS worksheets_worksheet_fts')
+
+
+def build_search_index(apps, schema_editor):
+    from apps.worksheets.search import update_index
+
+    Worksheet = apps.get_model('worksheets', 'Worksheet')
+    update_index(Worksheet.objects.using(schema_editor.connection.alias).all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worksheets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksheet',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_structures, drop_search_structures),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
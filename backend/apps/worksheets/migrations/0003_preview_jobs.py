@@ -0,0 +1,46 @@
+# Generated by Django 5.0.14 on 2026-10-17 12:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worksheets', '0002_worksheet_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksheet',
+            name='preview_error',
+            field=models.TextField(blank=True, verbose_name='Ошибка генерации превью'),
+        ),
+        migrations.AddField(
+            model_name='worksheet',
+            name='preview_status',
+            field=models.CharField(choices=[('pending', 'В очереди'), ('processing', 'Генерируется'), ('ready', 'Готово'), ('failed', 'Ошибка')], default='ready', help_text='Превью генерируются в фоне: manage.py run_preview_worker', max_length=20, verbose_name='Статус превью'),
+        ),
+        migrations.CreateModel(
+            name='PreviewJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('running', 'Выполняется'), ('done', 'Выполнено'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='Максимум попыток')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='Для повторных попыток задание откладывается', verbose_name='Выполнить после')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало выполнения')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание выполнения')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('worksheet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='preview_jobs', to='worksheets.worksheet', verbose_name='Рабочий лист')),
+            ],
+            options={
+                'verbose_name': 'Задание на генерацию превью',
+                'verbose_name_plural': 'Задания на генерацию превью',
+                'ordering': ['run_after', 'id'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='worksheets__status_016f62_idx')],
+            },
+        ),
+    ]
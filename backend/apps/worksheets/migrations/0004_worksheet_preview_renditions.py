@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worksheets', '0003_preview_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksheet',
+            name='preview_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Рендиции превью'),
+        ),
+    ]
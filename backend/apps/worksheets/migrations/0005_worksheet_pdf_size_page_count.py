@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worksheets', '0004_worksheet_preview_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksheet',
+            name='pdf_page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Страниц в PDF'),
+        ),
+        migrations.AddField(
+            model_name='worksheet',
+            name='pdf_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Размер PDF, байт'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.14 on 2026-10-17 13:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_similar_index(apps, schema_editor):
+    """Индекс похожих для уже существующих worksheets (сигналы обновят только новые изменения)"""
+    from apps.worksheets.similarity import rebuild
+
+    rebuild(using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worksheets', '0005_worksheet_pdf_size_page_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarWorksheet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Позиция')),
+                ('score', models.PositiveIntegerField(help_text='Общие теги, класс и сложность (см. similarity.py)', verbose_name='Оценка сходства')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_for', to='worksheets.worksheet', verbose_name='Похожий рабочий лист')),
+                ('worksheet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_links', to='worksheets.worksheet', verbose_name='Рабочий лист')),
+            ],
+            options={
+                'verbose_name': 'Похожий рабочий лист',
+                'verbose_name_plural': 'Похожие рабочие листы',
+                'ordering': ['worksheet', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='similarworksheet',
+            constraint=models.UniqueConstraint(fields=('worksheet', 'position'), name='unique_similar_worksheet_position'),
+        ),
+        migrations.RunPython(build_similar_index, migrations.RunPython.noop),
+    ]
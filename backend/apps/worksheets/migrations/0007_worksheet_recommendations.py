@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-17 13:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worksheets', '0006_similar_worksheets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorksheetRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Позиция')),
+                ('score', models.FloatField(help_text='Косинус или коэффициент Жаккара, от 0 до 1', verbose_name='Сходство по тегам')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_for', to='worksheets.worksheet', verbose_name='Рекомендуемый рабочий лист')),
+                ('worksheet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendation_links', to='worksheets.worksheet', verbose_name='Рабочий лист')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация',
+                'verbose_name_plural': 'Рекомендации',
+                'ordering': ['worksheet', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='worksheetrecommendation',
+            constraint=models.UniqueConstraint(fields=('worksheet', 'position'), name='unique_recommendation_position'),
+        ),
+    ]
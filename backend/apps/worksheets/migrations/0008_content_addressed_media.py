@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-17 13:28
+
+import apps.core.storage
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worksheets', '0007_worksheet_recommendations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksheet',
+            name='preview_pdf_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, verbose_name='Хэш PDF превью'),
+        ),
+        migrations.AlterField(
+            model_name='worksheet',
+            name='pdf_file',
+            field=models.FileField(help_text='Рабочий лист в формате PDF для печати', storage=apps.core.storage.ContentAddressedStorage(), upload_to='worksheets/pdf/', validators=[django.core.validators.FileExtensionValidator(['pdf'])], verbose_name='PDF файл'),
+        ),
+        migrations.AlterField(
+            model_name='worksheet',
+            name='preview_image',
+            field=models.ImageField(blank=True, help_text='Автоматически генерируется из PDF (800x1000px)', null=True, storage=apps.core.storage.ContentAddressedStorage(), upload_to='worksheets/previews/', verbose_name='Превью для карточки'),
+        ),
+        migrations.AlterField(
+            model_name='worksheet',
+            name='thumbnail',
+            field=models.ImageField(blank=True, help_text='Автоматически генерируется из PDF (300x400px)', null=True, storage=apps.core.storage.ContentAddressedStorage(), upload_to='worksheets/thumbnails/', verbose_name='Миниатюра для каталога'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-17 13:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worksheets', '0008_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterIncrement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('views_count', models.PositiveIntegerField(default=0, verbose_name='Просмотры')),
+                ('downloads_count', models.PositiveIntegerField(default=0, verbose_name='Скачивания')),
+                ('batch', models.UUIDField(blank=True, db_index=True, help_text='Заполняется процессом, который сейчас сбрасывает строку', null=True, verbose_name='Пачка сброса')),
+                ('worksheet', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='worksheets.worksheet', verbose_name='Рабочий лист')),
+            ],
+            options={
+                'verbose_name': 'Инкремент счетчиков',
+                'verbose_name_plural': 'Инкременты счетчиков',
+            },
+        ),
+    ]
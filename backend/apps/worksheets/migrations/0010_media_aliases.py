@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-17 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worksheets', '0009_counter_increments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Старое имя')),
+                ('hashed_name', models.CharField(max_length=255, verbose_name='Имя по хэшу')),
+            ],
+            options={
+                'verbose_name': 'Старое имя медиа файла',
+                'verbose_name_plural': 'Старые имена медиа файлов',
+            },
+        ),
+    ]
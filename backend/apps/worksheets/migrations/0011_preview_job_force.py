@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worksheets', '0010_media_aliases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='previewjob',
+            name='force',
+            field=models.BooleanField(default=False, help_text='Не брать готовые превью листов с тем же PDF (явное пересоздание превью)', verbose_name='Рендерить заново'),
+        ),
+    ]
@@ -2,20 +2,23 @@
 Модель рабочих листов (worksheets)
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import FileExtensionValidator
 from django.core.files.base import ContentFile
 from slugify import slugify
-from PIL import Image
-import io
-import os
 
-# Для генерации превью из PDF
-try:
-    from pdf2image import convert_from_path
-    PDF2IMAGE_AVAILABLE = True
-except ImportError:
-    PDF2IMAGE_AVAILABLE = False
+from apps.core.storage import ContentAddressedStorage, file_digest, get_name_digest
+
+from .previews import (
+    IMAGE_FORMATS, PDF2IMAGE_AVAILABLE, RENDITION_SCALES, get_formats, render_preview_images
+)
+
+
+# PDF и превью хранятся по хэшу содержимого: одинаковые файлы - один раз
+# на диске, имя файла никогда не перезаписывается (см. apps/core/storage.py)
+media_storage = ContentAddressedStorage()
 
 
 class GradeLevel(models.TextChoices):
@@ -36,6 +39,97 @@ class Difficulty(models.TextChoices):
     HARD = 'hard', 'Сложный'
 
 
+class PreviewStatus(models.TextChoices):
+    """Состояние генерации превью из PDF"""
+    PENDING = 'pending', 'В очереди'
+    PROCESSING = 'processing', 'Генерируется'
+    READY = 'ready', 'Готово'
+    FAILED = 'failed', 'Ошибка'
+
+
+# Поля карточки в списках (WorksheetListSerializer): без SEO-полей,
+# PDF, большого превью и поискового вектора
+LIST_FIELDS = [
+    'id', 'title', 'slug', 'description', 'grade_level', 'difficulty',
+    'thumbnail', 'preview_renditions', 'views_count', 'downloads_count',
+    'created_at', 'updated_at',
+    'category__id', 'category__name', 'category__slug',
+    'category__parent__id', 'category__parent__slug',
+]
+
+
+class WorksheetQuerySet(models.QuerySet):
+    """QuerySet рабочих листов"""
+
+    def for_list(self):
+        """
+        Только то, что нужно карточке в списках (WorksheetListSerializer)
+
+        Категория и ее родитель (для category_path) приходят в том же
+        запросе, теги - одним prefetch-запросом на страницу: число
+        запросов не зависит от количества листов на странице.
+        """
+        from apps.tags.models import Tag
+
+        return (
+            self.select_related('category__parent')
+            .only(*LIST_FIELDS)
+            .prefetch_related(
+                models.Prefetch('tags', queryset=Tag.objects.only('id', 'name', 'slug', 'usage_count'))
+            )
+        )
+
+    def update(self, **kwargs):
+        """
+        update() с поддержкой счетчиков тегов и индекса похожих
+
+        Массовый update() не вызывает сигналы, поэтому дельты для
+        Tag.usage_count применяются здесь - только для строк,
+        у которых is_published действительно меняется. Если меняются
+        поля индекса похожих, он обновляется после коммита.
+        """
+        from .similarity import SIMILARITY_FIELDS, schedule_similar_refresh
+
+        if not SIMILARITY_FIELDS & set(kwargs):
+            return self._update_published(**kwargs)
+
+        # Прежние категории нужны, чтобы убрать листы из их индекса
+        affected = list(self.values_list('pk', 'category_id'))
+        rows = self._update_published(**kwargs)
+        schedule_similar_refresh(
+            [pk for pk, _ in affected],
+            {category_id for _, category_id in affected},
+            using=self.db
+        )
+        return rows
+
+    def _update_published(self, **kwargs):
+        if 'is_published' not in kwargs:
+            return super().update(**kwargs)
+
+        from apps.tags.models import Tag
+        from apps.tags.usage import apply_publish_deltas
+
+        published = kwargs['is_published']
+        with transaction.atomic(using=self.db):
+            if isinstance(published, bool):
+                changed_ids = list(
+                    self.exclude(is_published=published).values_list('pk', flat=True)
+                )
+                rows = super().update(**kwargs)
+                apply_publish_deltas(changed_ids, published, using=self.db)
+            else:
+                # Выражение вместо значения - дельту не посчитать, пересчитываем теги
+                changed_ids = list(self.values_list('pk', flat=True))
+                rows = super().update(**kwargs)
+                Tag.objects.using(self.db).filter(
+                    pk__in=Tag.worksheets.through.objects.filter(
+                        worksheet_id__in=changed_ids
+                    ).values('tag_id')
+                ).update_usage_counts()
+        return rows
+
+
 class Worksheet(models.Model):
     """
     Рабочий лист - основная сущность приложения
@@ -104,15 +198,33 @@ class Worksheet(models.Model):
     # === ФАЙЛЫ ===
 
     pdf_file = models.FileField(
-        upload_to='worksheets/pdf/%Y/%m/',
+        upload_to='worksheets/pdf/',
+        storage=media_storage,
         validators=[FileExtensionValidator(['pdf'])],
         verbose_name='PDF файл',
         help_text='Рабочий лист в формате PDF для печати'
     )
 
+    # Размер и число страниц PDF, кэшируются manage.py scan_media,
+    # чтобы админка не обращалась к файловой системе при отрисовке
+    pdf_size = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Размер PDF, байт'
+    )
+
+    pdf_page_count = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Страниц в PDF'
+    )
+
     # Маленькое превью для каталога (автоматически генерируется)
     thumbnail = models.ImageField(
-        upload_to='worksheets/thumbnails/%Y/%m/',
+        upload_to='worksheets/thumbnails/',
+        storage=media_storage,
         blank=True,
         null=True,
         verbose_name='Миниатюра для каталога',
@@ -121,13 +233,48 @@ class Worksheet(models.Model):
 
     # Большое превью для карточки (автоматически генерируется)
     preview_image = models.ImageField(
-        upload_to='worksheets/previews/%Y/%m/',
+        upload_to='worksheets/previews/',
+        storage=media_storage,
         blank=True,
         null=True,
         verbose_name='Превью для карточки',
         help_text='Автоматически генерируется из PDF (800x1000px)'
     )
 
+    # Рендиции превью в разных форматах и плотностях (WebP/AVIF/PNG, 1x/2x):
+    # {'thumbnail': [{'format', 'width', 'height', 'name'}, ...], 'preview': [...]}
+    # PNG 1x - это файлы из полей thumbnail и preview_image
+    preview_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Рендиции превью'
+    )
+
+    # SHA-256 PDF, из которого сгенерированы превью: лист с тем же PDF
+    # берет готовые превью вместо повторного рендера
+    preview_pdf_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name='Хэш PDF превью'
+    )
+
+    # Состояние фоновой генерации превью (см. PreviewJob)
+    preview_status = models.CharField(
+        max_length=20,
+        choices=PreviewStatus.choices,
+        default=PreviewStatus.READY,
+        verbose_name='Статус превью',
+        help_text='Превью генерируются в фоне: manage.py run_preview_worker'
+    )
+
+    preview_error = models.TextField(
+        blank=True,
+        verbose_name='Ошибка генерации превью'
+    )
+
     # === SEO ===
 
     meta_title = models.CharField(
@@ -158,6 +305,16 @@ class Worksheet(models.Model):
         help_text='Увеличивается при скачивании PDF'
     )
 
+    # === ПОИСК ===
+
+    # Предвычисленный tsvector (PostgreSQL): название, описание, теги, категория
+    # Обновляется автоматически, см. apps/worksheets/search.py
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
+
     # === ФЛАГИ ===
 
     is_featured = models.BooleanField(
@@ -190,6 +347,8 @@ class Worksheet(models.Model):
         verbose_name='Дата публикации'
     )
 
+    objects = WorksheetQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Рабочий лист'
         verbose_name_plural = 'Рабочие листы'
@@ -209,7 +368,7 @@ class Worksheet(models.Model):
         """
         Переопределяем save для:
         1. Автоматической генерации slug
-        2. Генерации превью из PDF
+        2. Постановки генерации превью из PDF в очередь
         """
         # Генерируем slug из названия если не указан
         if not self.slug:
@@ -219,20 +378,22 @@ class Worksheet(models.Model):
         is_new = self.pk is None
         super().save(*args, **kwargs)
 
-        # Если PDF загружен и превью еще нет - генерируем
+        # Если PDF загружен и превью еще нет - ставим генерацию в очередь
+        # (рендер PDF занимает секунды, в запросе админки его не делаем)
         if self.pdf_file and (not self.thumbnail or not self.preview_image or is_new):
-            self.generate_previews()
+            from .jobs import enqueue_previews
 
-    def generate_previews(self):
+            enqueue_previews(self)
+
+    def generate_previews(self, force=False):
         """
-        Генерирует два превью изображения из первой страницы PDF:
-        1. Миниатюру для каталога (300x400px)
-        2. Большое превью для карточки (800x1000px)
+        Генерирует превью из PDF, печатая ошибку вместо исключения
+
+        Для фоновой очереди используется render_previews(),
+        который пробрасывает исключения (для повторных попыток)
 
-        ВАЖНО: Требует установки poppler-utils:
-        - macOS: brew install poppler
-        - Ubuntu: sudo apt-get install poppler-utils
-        - Windows: скачать бинарники poppler
+        Параметры:
+            force: рендерить заново, не беря готовые превью того же PDF
         """
         if not PDF2IMAGE_AVAILABLE:
             print("⚠️  Warning: pdf2image не установлен. Превью не будут генерироваться.")
@@ -241,80 +402,227 @@ class Worksheet(models.Model):
             return
 
         try:
-            # Получаем путь к PDF файлу
-            pdf_path = self.pdf_file.path
-
-            # Конвертируем первую страницу PDF в изображение
-            # dpi=200 для хорошего качества
-            images = convert_from_path(
-                pdf_path,
-                first_page=1,
-                last_page=1,
-                dpi=200
-            )
+            self.render_previews(force=force)
+            print(f"✅ Превью успешно сгенерированы для '{self.title}'")
 
-            if not images:
-                print(f"❌ Не удалось конвертировать PDF '{self.title}'")
-                return
+        except Exception as e:
+            print(f"❌ Ошибка при генерации превью для '{self.title}': {e}")
 
-            first_page = images[0]
+    def render_previews(self, force=False):
+        """
+        Генерирует два превью изображения из первой страницы PDF:
+        1. Миниатюру для каталога (300x400px)
+        2. Большое превью для карточки (800x1000px)
 
-            # === 1. Генерируем миниатюру для каталога (300x400) ===
-            thumbnail = first_page.copy()
-            thumbnail.thumbnail((300, 400), Image.Resampling.LANCZOS)
+        Если превью для PDF с таким же содержимым уже есть у другого
+        листа, они используются без рендера. force=True (явное
+        пересоздание превью) всегда рендерит PDF заново.
 
-            # Сохраняем в BytesIO
-            thumb_io = io.BytesIO()
-            thumbnail.save(thumb_io, format='PNG', optimize=True)
-            thumb_io.seek(0)
+        Рендер - в apps/worksheets/previews.py (требует poppler-utils)
 
-            # Генерируем имя файла
-            thumb_filename = f"{self.slug}_thumb.png"
+        Исключения:
+            RuntimeError: pdf2image не установлен или PDF не конвертировался
+        """
+        with self.pdf_file.open('rb') as pdf:
+            pdf_hash = file_digest(pdf)
 
-            # Сохраняем в поле модели
-            self.thumbnail.save(
-                thumb_filename,
-                ContentFile(thumb_io.read()),
-                save=False
-            )
+        if not force and self.reuse_previews(pdf_hash):
+            return
 
-            # === 2. Генерируем большое превью для карточки (800x1000) ===
-            preview = first_page.copy()
-            preview.thumbnail((800, 1000), Image.Resampling.LANCZOS)
+        images = render_preview_images(
+            self.pdf_file.path,
+            formats=get_formats(),
+            scales=RENDITION_SCALES
+        )
+        self.save_preview_images(images, pdf_hash=pdf_hash)
 
-            preview_io = io.BytesIO()
-            preview.save(preview_io, format='PNG', optimize=True)
-            preview_io.seek(0)
+    def reuse_previews(self, pdf_hash):
+        """
+        Взять готовые превью другого листа, сгенерированные из того же PDF
 
-            preview_filename = f"{self.slug}_preview.png"
+        Собственные превью листа не подходят: иначе пересоздание превью
+        оставило бы прежние картинки. Подходят только превью во всех текущих форматах и плотностях
+        (после смены PREVIEW_FORMATS превью рендерятся заново).
 
-            self.preview_image.save(
-                preview_filename,
-                ContentFile(preview_io.read()),
-                save=False
+        Возвращает:
+            bool: True если превью найдены и сохранены в этот лист
+        """
+        formats = set(get_formats())
+        donors = (
+            Worksheet.objects
+            .filter(preview_pdf_hash=pdf_hash, preview_status=PreviewStatus.READY)
+            .exclude(pk=self.pk)
+            .exclude(thumbnail='')
+            .exclude(preview_image='')
+            .only('thumbnail', 'preview_image', 'preview_renditions')
+        )
+        for donor in donors[:5]:
+            renditions = donor.preview_renditions or {}
+            if all(
+                {item['format'] for item in renditions.get(kind, [])} >= formats
+                and len({item['width'] for item in renditions.get(kind, [])}) >= len(RENDITION_SCALES)
+                for kind in ('thumbnail', 'preview')
+            ):
+                self._set_previews(donor.thumbnail.name, donor.preview_image.name, renditions, pdf_hash)
+                return True
+        return False
+
+    def save_preview_images(self, images, pdf_hash=None):
+        """
+        Сохранить сгенерированные рендиции превью
+
+        PNG 1x записывается в поля thumbnail / preview_image (как раньше),
+        остальные рендиции - в worksheets/renditions/, их список - в preview_renditions.
+        Файлы предыдущих рендиций удаляются, если на них не ссылаются другие листы.
+
+        Параметры:
+            images: dict {'thumbnail': [...], 'preview': [...]}
+                    (результат previews.render_preview_images)
+            pdf_hash: SHA-256 PDF (если не передан - считается по файлу)
+        """
+        if pdf_hash is None:
+            with self.pdf_file.open('rb') as pdf:
+                pdf_hash = file_digest(pdf)
+
+        folders = {'thumbnail': self.thumbnail.field.upload_to, 'preview': self.preview_image.field.upload_to}
+        suffixes = {'thumbnail': 'thumb', 'preview': 'preview'}
+        storage = self.thumbnail.storage
+
+        names = {}
+        renditions = {}
+        for kind, items in images.items():
+            renditions[kind] = []
+            for item in items:
+                is_field = item['format'] == 'png' and item['scale'] == 1
+                folder = folders[kind] if is_field else 'worksheets/renditions/'
+                # Имя задает только папку и расширение - хранилище
+                # сохранит файл под хэшем содержимого
+                name = storage.save(
+                    f"{folder}{self.slug}_{suffixes[kind]}_{item['width']}w.{item['format']}",
+                    ContentFile(item['data'])
+                )
+                if is_field:
+                    names[kind] = name
+                renditions[kind].append({
+                    'format': item['format'],
+                    'width': item['width'],
+                    'height': item['height'],
+                    'name': name,
+                })
+
+        self._set_previews(names['thumbnail'], names['preview'], renditions, pdf_hash)
+
+    def _set_previews(self, thumbnail, preview_image, renditions, pdf_hash):
+        """Записать превью в лист и удалить файлы прежних превью, ставшие ненужными"""
+        old_names = self.get_preview_file_names()
+
+        self.thumbnail.name = thumbnail
+        self.preview_image.name = preview_image
+        self.preview_renditions = renditions
+        self.preview_pdf_hash = pdf_hash
+        self.preview_status = PreviewStatus.READY
+        self.preview_error = ''
+        super().save(update_fields=[
+            'thumbnail', 'preview_image', 'preview_renditions', 'preview_pdf_hash',
+            'preview_status', 'preview_error', 'updated_at'
+        ])
+
+        self.delete_unused_files(old_names - self.get_preview_file_names())
+
+    def delete_unused_files(self, names):
+        """
+        Удалить файлы из хранилища, если на них не ссылается ни один лист
+
+        Одинаковые файлы хранятся один раз, поэтому файл прежнего превью
+        может быть и превью другого листа с тем же PDF
+        """
+        storage = self.thumbnail.storage
+        for name in names:
+            in_use = (
+                Worksheet.objects
+                .filter(
+                    models.Q(pdf_file=name) | models.Q(thumbnail=name)
+                    | models.Q(preview_image=name) | models.Q(preview_renditions__icontains=name)
+                )
+                .exists()
             )
+            if not in_use:
+                storage.delete(name)
+
+    def get_preview_file_names(self):
+        """Имена всех файлов превью в хранилище (поля + рендиции)"""
+        names = {self.thumbnail.name, self.preview_image.name}
+        for items in (self.preview_renditions or {}).values():
+            names.update(item['name'] for item in items)
+        names.discard(None)
+        names.discard('')
+        return names
+
+    def get_preview_renditions(self, kind):
+        """
+        Рендиции превью, сгруппированные по формату
 
-            # Сохраняем модель с новыми превью
-            super().save(update_fields=['thumbnail', 'preview_image'])
+        Параметры:
+            kind: 'thumbnail' или 'preview'
 
-            print(f"✅ Превью успешно сгенерированы для '{self.title}'")
+        Возвращает:
+            dict: {формат: [{'url', 'width', 'height'}, ...]} в порядке
+                  предпочтения форматов (avif, webp, png), внутри - по ширине.
+                  Для листов без рендиций - только PNG из поля модели.
+        """
+        items = (self.preview_renditions or {}).get(kind)
+        field = self.thumbnail if kind == 'thumbnail' else self.preview_image
+
+        if not items:
+            if not field:
+                return {}
+            return {'png': [{'url': self.get_file_url(field.name), 'width': None, 'height': None}]}
+
+        grouped = {}
+        for item in sorted(items, key=lambda item: item['width']):
+            grouped.setdefault(item['format'], []).append({
+                'url': self.get_file_url(item['name']),
+                'width': item['width'],
+                'height': item['height'],
+            })
+        return {name: grouped[name] for name in IMAGE_FORMATS if name in grouped}
+
+    def get_file_url(self, name):
+        """
+        URL файла листа, который можно кэшировать навсегда
 
-        except Exception as e:
-            print(f"❌ Ошибка при генерации превью для '{self.title}': {e}")
+        Имя файла из хранилища по хэшу уже содержит отпечаток содержимого.
+        Файлы со старыми именами (импорт, загрузки до хранилища по хэшу)
+        могут быть перезаписаны - к их URL добавляется версия ?v=<updated_at>,
+        которая меняется при каждом сохранении и импорте листа.
+        """
+        url = media_storage.url(name)
+        if get_name_digest(name) or self.updated_at is None:
+            return url
+        return f'{url}?v={int(self.updated_at.timestamp())}'
 
     def increment_views(self):
         """
         Увеличить счетчик просмотров (при открытии карточки)
+
+        Инкремент попадает в буфер (apps.worksheets.counters) и переносится
+        в worksheet пачкой через F() - без save() и UPDATE горячей строки.
         """
+        from . import counters
+
+        counters.increment(self.pk, 'views_count')
         self.views_count += 1
-        self.save(update_fields=['views_count'])
 
     def increment_downloads(self):
         """
         Увеличить счетчик скачиваний (при скачивании PDF)
+
+        Работает через тот же буфер, что и increment_views
         """
+        from . import counters
+
+        counters.increment(self.pk, 'downloads_count')
         self.downloads_count += 1
-        self.save(update_fields=['downloads_count'])
 
     def get_absolute_url(self):
         """
@@ -324,3 +632,259 @@ class Worksheet(models.Model):
             str: URL, например '/matematika/slozhenie/primery-do-10/'
         """
         return f"/{self.category.get_full_path()}/{self.slug}/"
+
+
+class CounterIncrement(models.Model):
+    """
+    Несброшенный инкремент счетчиков worksheet
+
+    Просмотр/скачивание добавляет строку, manage.py flush_counters
+    и воркеры переносят суммы в Worksheet (apps/worksheets/counters.py)
+    """
+
+    # Без FK-ограничения в базе: просмотр только что удаленного листа
+    # не должен падать, при сбросе такие строки просто не найдут worksheet
+    worksheet = models.ForeignKey(
+        Worksheet,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Рабочий лист'
+    )
+
+    views_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Просмотры'
+    )
+
+    downloads_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Скачивания'
+    )
+
+    batch = models.UUIDField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='Пачка сброса',
+        help_text='Заполняется процессом, который сейчас сбрасывает строку'
+    )
+
+    class Meta:
+        verbose_name = 'Инкремент счетчиков'
+        verbose_name_plural = 'Инкременты счетчиков'
+
+    def __str__(self):
+        return f"{self.worksheet_id}: +{self.views_count}/+{self.downloads_count}"
+
+
+class JobStatus(models.TextChoices):
+    """Состояние задания в очереди"""
+    PENDING = 'pending', 'Ожидает'
+    RUNNING = 'running', 'Выполняется'
+    DONE = 'done', 'Выполнено'
+    FAILED = 'failed', 'Ошибка'
+
+
+class PreviewJob(models.Model):
+    """
+    Задание на генерацию превью в очереди (очередь хранится в базе)
+
+    Создается при сохранении worksheet с новым PDF,
+    выполняется воркером: python manage.py run_preview_worker
+    При ошибке повторяется с увеличивающейся задержкой до max_attempts раз.
+    """
+
+    worksheet = models.ForeignKey(
+        Worksheet,
+        on_delete=models.CASCADE,
+        related_name='preview_jobs',
+        verbose_name='Рабочий лист'
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=JobStatus.choices,
+        default=JobStatus.PENDING,
+        verbose_name='Статус'
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3,
+        verbose_name='Максимум попыток'
+    )
+
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Выполнить после',
+        help_text='Для повторных попыток задание откладывается'
+    )
+
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Начало выполнения'
+    )
+
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Окончание выполнения'
+    )
+
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+
+    force = models.BooleanField(
+        default=False,
+        verbose_name='Рендерить заново',
+        help_text='Не брать готовые превью листов с тем же PDF (явное пересоздание превью)'
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+
+    class Meta:
+        verbose_name = 'Задание на генерацию превью'
+        verbose_name_plural = 'Задания на генерацию превью'
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.worksheet} ({self.get_status_display()})"
+
+
+class SimilarWorksheet(models.Model):
+    """
+    Предвычисленный индекс похожих рабочих листов
+
+    Для каждого опубликованного worksheet хранится до SIMILAR_LIMIT
+    похожих из той же категории в порядке position. Строится и
+    обновляется в apps/worksheets/similarity.py, полная перестройка:
+    python manage.py rebuild_similar
+    """
+
+    worksheet = models.ForeignKey(
+        Worksheet,
+        on_delete=models.CASCADE,
+        related_name='similar_links',
+        verbose_name='Рабочий лист'
+    )
+
+    similar = models.ForeignKey(
+        Worksheet,
+        on_delete=models.CASCADE,
+        related_name='similar_for',
+        verbose_name='Похожий рабочий лист'
+    )
+
+    position = models.PositiveSmallIntegerField(
+        verbose_name='Позиция'
+    )
+
+    score = models.PositiveIntegerField(
+        verbose_name='Оценка сходства',
+        help_text='Общие теги, класс и сложность (см. similarity.py)'
+    )
+
+    class Meta:
+        verbose_name = 'Похожий рабочий лист'
+        verbose_name_plural = 'Похожие рабочие листы'
+        ordering = ['worksheet', 'position']
+        constraints = [
+            # Заодно индекс для выборки похожих одного worksheet
+            models.UniqueConstraint(
+                fields=['worksheet', 'position'],
+                name='unique_similar_worksheet_position'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.worksheet} → {self.similar}"
+
+
+class WorksheetRecommendation(models.Model):
+    """
+    Рекомендации "Вам может понравиться" по пересечению тегов
+
+    В отличие от SimilarWorksheet не ограничены категорией. Строятся
+    пакетно для всего каталога: python manage.py build_recommendations
+    (apps/worksheets/recommendations.py)
+    """
+
+    worksheet = models.ForeignKey(
+        Worksheet,
+        on_delete=models.CASCADE,
+        related_name='recommendation_links',
+        verbose_name='Рабочий лист'
+    )
+
+    recommended = models.ForeignKey(
+        Worksheet,
+        on_delete=models.CASCADE,
+        related_name='recommended_for',
+        verbose_name='Рекомендуемый рабочий лист'
+    )
+
+    position = models.PositiveSmallIntegerField(
+        verbose_name='Позиция'
+    )
+
+    score = models.FloatField(
+        verbose_name='Сходство по тегам',
+        help_text='Косинус или коэффициент Жаккара, от 0 до 1'
+    )
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        ordering = ['worksheet', 'position']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['worksheet', 'position'],
+                name='unique_recommendation_position'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.worksheet} → {self.recommended}"
+
+
+class MediaAlias(models.Model):
+    """
+    Старое имя медиа файла -> имя по хэшу содержимого
+
+    Заполняется manage.py dedupe_media, который удаляет файлы со старыми
+    именами. Импорт (apps/worksheets/importer.py) заменяет старые имена
+    из JSON по этой таблице, иначе повторный импорт вернул бы в листы
+    ссылки на удаленные файлы.
+    """
+
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Старое имя'
+    )
+
+    hashed_name = models.CharField(
+        max_length=255,
+        verbose_name='Имя по хэшу'
+    )
+
+    class Meta:
+        verbose_name = 'Старое имя медиа файла'
+        verbose_name_plural = 'Старые имена медиа файлов'
+
+    def __str__(self):
+        return f"{self.name} → {self.hashed_name}"
@@ -2,9 +2,119 @@
 Пагинация для API списков рабочих листов
 """
 
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 
+from apps.core.cache import RESPONSE_CACHE_TIMEOUT, get_content_version
+
+
+def estimate_count(queryset):
+    """
+    Оценка количества строк по плану запроса (PostgreSQL EXPLAIN)
+
+    Возвращает:
+        int | None: оценка планировщика или None для других баз
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator, который кэширует COUNT(*) для каждой комбинации фильтров
+
+    Ключ - SQL запроса подсчета и версия контента (apps.core.cache):
+    публикация/снятие с публикации и любые изменения рабочих листов,
+    категорий и тегов меняют версию, и количество считается заново.
+    """
+
+    # Разрешить оценку по плану запроса вместо точного COUNT
+    estimate = False
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+
+        count_queryset = self.object_list.order_by().values('pk')
+        try:
+            sql, params = count_queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+
+        query_hash = hashlib.md5(repr((sql, params)).encode('utf-8')).hexdigest()
+        key = f'api:count:{get_content_version()}:{int(self.estimate)}:{query_hash}'
+
+        count = cache.get(key)
+        if count is None:
+            count = self.compute_count()
+            cache.set(key, count, RESPONSE_CACHE_TIMEOUT)
+        return count
+
+    def compute_count(self):
+        if self.estimate:
+            estimated = estimate_count(self.object_list)
+            # Маленькие таблицы COUNT считает быстро - там нужна точность
+            if estimated is not None and estimated >= settings.WORKSHEETS_ESTIMATED_COUNT_THRESHOLD:
+                return estimated
+        return self.object_list.count()
+
+
+class EstimatedCountPaginator(CachedCountPaginator):
+    """CachedCountPaginator с оценкой количества (для листинга без фильтров)"""
+
+    estimate = True
+
+
+class WorksheetCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) пагинация для бесконечной ленты
+
+    Страница выбирается условием по (created_at, id) вместо OFFSET
+    и без COUNT(*), поэтому глубокие страницы не медленнее первой.
+    Сортировка всегда хронологическая: ?ordering=created_at - от старых
+    к новым, любые другие значения ?ordering игнорируются
+    (курсор нельзя строить по часто меняющимся полям вроде views_count).
+    """
+
+    page_size = 21
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+
+    # Совпадает с индексом (-created_at), id - для стабильного порядка
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get('ordering') == 'created_at':
+            return ('created_at', 'id')
+        return self.ordering
+
+    def decode_cursor(self, request):
+        # Пустой ?cursor= - первая страница в режиме курсора
+        if not request.query_params.get(self.cursor_query_param):
+            return None
+        return super().decode_cursor(request)
+
 
 class WorksheetPagination(PageNumberPagination):
     """
@@ -13,11 +123,18 @@ class WorksheetPagination(PageNumberPagination):
     Параметры запроса:
     - page: номер страницы (по умолчанию 1)
     - page_size: количество элементов на странице (по умолчанию 21, максимум 100)
+    - cursor: включает keyset-пагинацию (WorksheetCursorPagination);
+      первая страница - ?cursor=, дальше - по ссылке next
+
+    count кэшируется для каждой комбинации фильтров (CachedCountPaginator).
+    Для листинга без фильтров при WORKSHEETS_ESTIMATED_COUNT = True
+    count - оценка планировщика PostgreSQL, а не точное значение.
 
     Примеры использования:
     - /api/worksheets/ -> первая страница, 21 элементов
     - /api/worksheets/?page=2 -> вторая страница
     - /api/worksheets/?page=1&page_size=30 -> первая страница, 30 элементов
+    - /api/worksheets/?cursor= -> первая страница ленты, next содержит курсор
     """
 
     # Количество элементов на странице по умолчанию (делится на 3 для красивого отображения)
@@ -32,6 +149,32 @@ class WorksheetPagination(PageNumberPagination):
     # Название параметра для номера страницы
     page_query_param = 'page'
 
+    # Параметр, включающий режим курсора
+    cursor_query_param = WorksheetCursorPagination.cursor_query_param
+
+    django_paginator_class = CachedCountPaginator
+
+    # Параметры, которые не фильтруют выборку
+    unfiltered_query_params = ('page', 'page_size', 'ordering', 'format')
+
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = WorksheetCursorPagination()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+        if settings.WORKSHEETS_ESTIMATED_COUNT and self.is_unfiltered(request, view):
+            self.django_paginator_class = EstimatedCountPaginator
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def is_unfiltered(self, request, view):
+        """Листинг без фильтров: ни query-параметров, ни параметров из URL"""
+        if view is not None and view.kwargs:
+            return False
+        return set(request.query_params) <= set(self.unfiltered_query_params)
+
     def get_paginated_response(self, data):
         """
         Кастомный формат ответа с пагинацией
@@ -46,7 +189,21 @@ class WorksheetPagination(PageNumberPagination):
             "previous": null,              // URL предыдущей страницы (или null)
             "results": [...]               // массив с данными
         }
+
+        В режиме курсора формат тот же, но count, total_pages
+        и current_page равны null (считать их - это и есть COUNT/OFFSET)
         """
+        if self.cursor_paginator is not None:
+            return Response({
+                'count': None,
+                'total_pages': None,
+                'current_page': None,
+                'page_size': self.cursor_paginator.page_size,
+                'next': self.cursor_paginator.get_next_link(),
+                'previous': self.cursor_paginator.get_previous_link(),
+                'results': data
+            })
+
         return Response({
             'count': self.page.paginator.count,
             'total_pages': self.page.paginator.num_pages,
@@ -0,0 +1,271 @@
+"""
+Рендер превью рабочих листов из PDF
+
+Первая страница растеризуется один раз - сразу в размере самой большой
+рендиции (poppler масштабирует до нужной ширины/высоты сам), а меньшие
+рендиции получаются уменьшением этого изображения. Раньше страница
+рендерилась в 200 DPI (~1650x2340 для A4) и затем дважды уменьшалась.
+
+Каждое превью (миниатюра и большое) сохраняется в нескольких
+плотностях (1x, 2x) и форматах: AVIF/WebP для современных браузеров
+и PNG как запасной вариант. Фронтенд выбирает файл через <picture>
+и srcset (см. rendition map в serializers.py).
+
+С рендициями 2x страница растеризуется под 1600x2000 - почти как
+прежние 200 DPI, поэтому основное время уходит не на poppler, а на
+уменьшение и кодирование. Поэтому:
+- каждая рендиция уменьшается из предыдущей (большей), а не из
+  полной страницы
+- PNG (запасной формат) сохраняется только в 1x, если есть WebP/AVIF:
+  PNG 1600x2000 с optimize кодировался дольше всех остальных вместе
+Замеры: manage.py benchmark_previews.
+
+Функции модуля не обращаются к базе и хранилищу: на вход путь к PDF,
+на выход байты изображений. Поэтому их можно вызывать в отдельных
+процессах (manage.py regenerate_previews), а сохранение файлов
+делает Worksheet.save_preview_images() в основном процессе.
+
+ВАЖНО: Требует установки poppler-utils:
+- macOS: brew install poppler
+- Ubuntu: sudo apt-get install poppler-utils
+- Windows: скачать бинарники poppler
+"""
+
+import io
+import re
+
+from django.conf import settings
+from PIL import Image, features
+
+# Для генерации превью из PDF
+try:
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    PDF2IMAGE_AVAILABLE = True
+except ImportError:
+    PDF2IMAGE_AVAILABLE = False
+
+# AVIF в Pillow < 11.2 добавляет плагин pillow-avif-plugin
+try:
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+Image.init()
+WEBP_AVAILABLE = features.check('webp')
+AVIF_AVAILABLE = 'AVIF' in Image.SAVE
+
+# Миниатюра для каталога
+THUMBNAIL_SIZE = (300, 400)
+
+# Большое превью для карточки
+PREVIEW_SIZE = (800, 1000)
+
+# Виды превью: ключ -> размер при плотности 1x
+RENDITION_BOXES = {
+    'thumbnail': THUMBNAIL_SIZE,
+    'preview': PREVIEW_SIZE,
+}
+
+# Плотности экрана, для которых сохраняются рендиции
+RENDITION_SCALES = (1, 2)
+
+# Плотности запасного PNG, если есть современный формат
+FALLBACK_SCALES = (1,)
+
+# Форматы в порядке предпочтения: формат Pillow, MIME, параметры сохранения
+IMAGE_FORMATS = {
+    'avif': {'format': 'AVIF', 'mime': 'image/avif', 'options': {'quality': 60}},
+    'webp': {'format': 'WEBP', 'mime': 'image/webp', 'options': {'quality': 80}},
+    'png': {'format': 'PNG', 'mime': 'image/png', 'options': {'optimize': True}},
+}
+
+
+def get_formats():
+    """
+    Форматы рендиций из настройки PREVIEW_FORMATS
+
+    Неподдерживаемые текущей сборкой Pillow форматы пропускаются,
+    PNG добавляется всегда - это запасной вариант для старых браузеров
+    и файл в полях thumbnail / preview_image.
+
+    Возвращает:
+        tuple: ключи IMAGE_FORMATS в порядке предпочтения
+    """
+    available = {'avif': AVIF_AVAILABLE, 'webp': WEBP_AVAILABLE, 'png': True}
+    requested = {
+        name.strip().lower()
+        for name in getattr(settings, 'PREVIEW_FORMATS', ('webp', 'png'))
+    }
+    requested.add('png')
+
+    return tuple(
+        name for name in IMAGE_FORMATS
+        if name in requested and available[name]
+    )
+
+
+def get_page_size(pdf_path):
+    """
+    Размер первой страницы PDF в пунктах (с учетом поворота)
+
+    Возвращает:
+        tuple | None: (ширина, высота) или None, если pdfinfo не смог его определить
+    """
+    try:
+        info = pdfinfo_from_path(pdf_path)
+    except Exception:
+        return None
+
+    # Например: "595.276 x 841.89 pts (A4)"
+    match = re.match(r'\s*([\d.]+)\s*x\s*([\d.]+)', info.get('Page size', ''))
+    if not match:
+        return None
+
+    width, height = float(match.group(1)), float(match.group(2))
+    if str(info.get('Page rot', '0')).strip() in ('90', '270'):
+        width, height = height, width
+    return width, height
+
+
+def get_page_count(pdf_path):
+    """
+    Количество страниц PDF по данным pdfinfo
+
+    Возвращает:
+        int | None: число страниц или None, если pdfinfo недоступен или PDF не читается
+    """
+    if not PDF2IMAGE_AVAILABLE:
+        return None
+    try:
+        return int(pdfinfo_from_path(pdf_path)['Pages'])
+    except Exception:
+        return None
+
+
+def get_render_size(page_size, box):
+    """
+    Параметр size для pdf2image, чтобы страница сразу вписалась в box
+
+    pdftoppm масштабирует по одной стороне (-scale-to-x / -scale-to-y),
+    вторая сторона считается с сохранением пропорций.
+    Если размер страницы неизвестен - вписываем длинную сторону (-scale-to).
+
+    Возвращает:
+        tuple | int: (ширина, None), (None, высота) или max(box)
+    """
+    if not page_size:
+        return max(box)
+
+    width, height = page_size
+    if width / height >= box[0] / box[1]:
+        return (box[0], None)
+    return (None, box[1])
+
+
+def render_first_page(pdf_path, box=PREVIEW_SIZE):
+    """
+    Растеризовать первую страницу PDF сразу в размере box
+
+    Исключения:
+        RuntimeError: pdf2image не установлен или PDF не конвертировался
+    """
+    if not PDF2IMAGE_AVAILABLE:
+        raise RuntimeError('pdf2image не установлен')
+
+    images = convert_from_path(
+        pdf_path,
+        first_page=1,
+        last_page=1,
+        size=get_render_size(get_page_size(pdf_path), box)
+    )
+
+    if not images:
+        raise RuntimeError(f"Не удалось конвертировать PDF '{pdf_path}'")
+
+    return images[0]
+
+
+def resize(image, size):
+    """Уменьшенная копия изображения, вписанная в size"""
+    resized = image.copy()
+    # Если изображение уже вписано в size - thumbnail() ничего не делает
+    resized.thumbnail(size, Image.Resampling.LANCZOS)
+    return resized
+
+
+def encode(image, image_format):
+    """Сохранить изображение в байты в формате image_format (ключ IMAGE_FORMATS)"""
+    spec = IMAGE_FORMATS[image_format]
+    output = io.BytesIO()
+    image.save(output, format=spec['format'], **spec['options'])
+    return output.getvalue()
+
+
+def resize_to_png(image, size):
+    """Уменьшить копию изображения до size и сохранить в PNG"""
+    return encode(resize(image, size), 'png')
+
+
+def render_preview_images(pdf_path, formats=('png',), scales=(1,)):
+    """
+    Сгенерировать рендиции миниатюры и большого превью из первой страницы PDF
+
+    Страница рендерится один раз в размере самой большой рендиции
+    (большое превью в максимальной плотности), остальные получаются
+    ее уменьшением (см. build_renditions).
+
+    Параметры:
+        formats: ключи IMAGE_FORMATS (обычно get_formats())
+        scales: плотности экрана (обычно RENDITION_SCALES)
+
+    Возвращает:
+        dict: {'thumbnail': [...], 'preview': [...]}, где элемент списка -
+              {'format', 'scale', 'width', 'height', 'data': bytes}
+    """
+    max_scale = max(scales)
+    first_page = render_first_page(
+        pdf_path,
+        box=(PREVIEW_SIZE[0] * max_scale, PREVIEW_SIZE[1] * max_scale)
+    )
+    return build_renditions(first_page, formats, scales)
+
+
+def build_renditions(first_page, formats=('png',), scales=(1,)):
+    """
+    Рендиции из растеризованной страницы (см. render_preview_images)
+
+    Размеры обходятся от большего к меньшему, и каждый получается
+    уменьшением предыдущего: LANCZOS по изображению 1600x2000 для
+    каждой из четырех рендиций стоил дороже самого рендера.
+    PNG при наличии WebP/AVIF кодируется только в FALLBACK_SCALES.
+    """
+    has_modern = any(image_format != 'png' for image_format in formats)
+    sizes = sorted(
+        (
+            (kind, scale, (box[0] * scale, box[1] * scale))
+            for kind, box in RENDITION_BOXES.items()
+            for scale in scales
+        ),
+        key=lambda item: item[2][0] * item[2][1],
+        reverse=True
+    )
+
+    images = {kind: [] for kind in RENDITION_BOXES}
+    source = first_page
+    for kind, scale, size in sizes:
+        source = resize(source, size)
+        for image_format in formats:
+            if image_format == 'png' and has_modern and scale not in FALLBACK_SCALES:
+                continue
+            images[kind].append({
+                'format': image_format,
+                'scale': scale,
+                'width': source.width,
+                'height': source.height,
+                'data': encode(source, image_format),
+            })
+
+    # Внутри вида - по возрастанию плотности, как раньше
+    for items in images.values():
+        items.sort(key=lambda item: item['scale'])
+    return images
@@ -0,0 +1,288 @@
+"""
+Рекомендации "Вам может понравиться" по пересечению тегов
+
+В отличие от индекса похожих (similarity.py) не ограничены категорией:
+лист по сложению может порекомендовать лист по вычитанию с теми же
+тегами. Строятся пакетно для всего каталога (cron):
+    python manage.py build_recommendations
+
+Алгоритм (NumPy/SciPy, без циклов Python по парам листов):
+1. Из промежуточной таблицы Worksheet.tags строится разреженная
+   бинарная матрица X: опубликованные worksheets × теги.
+2. Листы с одинаковым набором тегов имеют одинаковых соседей, поэтому
+   считаем по уникальным наборам ("профилям") - их намного меньше,
+   чем листов, когда тегов немного.
+3. Число общих тегов профилей - произведение P @ P.T (блоками строк,
+   чтобы не держать в памяти всю матрицу P x P), из него - косинус
+   |A∩B| / sqrt(|A|·|B|) или коэффициент Жаккара |A∩B| / |A∪B|.
+4. Для каждого профиля - top-k листов по сходству, при равном
+   сходстве выше более новые; сам лист из своих рекомендаций исключается.
+
+Бенчмарк на синтетических данных: python manage.py benchmark_recommendations
+"""
+
+import numpy as np
+from scipy import sparse
+
+from django.db import transaction
+
+from .models import Worksheet, WorksheetRecommendation
+
+# Сколько рекомендаций хранится для одного worksheet
+RECOMMENDATIONS_LIMIT = 8
+
+# Поддерживаемые меры сходства
+METRICS = ('cosine', 'jaccard')
+
+# Сколько чисел в плотном блоке сходств профилей (float32, ~32 МБ)
+BLOCK_ELEMENTS = 8 * 1024 * 1024
+
+# Размер пачки при записи в базу
+WRITE_BATCH_SIZE = 2000
+
+
+def build_tag_matrix(rows, cols, shape):
+    """
+    Бинарная разреженная матрица worksheets × теги
+
+    Параметры:
+        rows, cols: индексы worksheet и тега для каждой связи
+        shape: (количество worksheets, количество тегов)
+
+    Возвращает:
+        scipy.sparse.csr_matrix: 1.0 там, где у worksheet есть тег
+    """
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=shape
+    )
+    # Повторяющиеся связи сложились - снова делаем матрицу бинарной
+    matrix.data[:] = 1
+    return matrix
+
+
+def group_profiles(matrix):
+    """
+    Сгруппировать строки матрицы с одинаковым набором тегов
+
+    Возвращает:
+        tuple: (profile_of, profiles), где profile_of[i] - номер профиля
+               строки i (-1 для строк без тегов), profiles - матрица
+               уникальных непустых строк
+    """
+    matrix.sort_indices()
+    keys = np.array([
+        matrix.indices[start:end].tobytes()
+        for start, end in zip(matrix.indptr[:-1], matrix.indptr[1:])
+    ], dtype=object)
+
+    _, first_rows, profile_of = np.unique(keys, return_index=True, return_inverse=True)
+    profile_of = profile_of.ravel()
+
+    # Профиль без тегов не участвует в рекомендациях
+    empty = np.flatnonzero(np.diff(matrix.indptr) == 0)
+    if len(empty):
+        empty_profile = profile_of[empty[0]]
+        first_rows = np.delete(first_rows, empty_profile)
+        profile_of = np.where(
+            profile_of == empty_profile, -1,
+            profile_of - (profile_of > empty_profile)
+        )
+
+    return profile_of, matrix[first_rows]
+
+
+def compute_recommendations(matrix, limit=RECOMMENDATIONS_LIMIT, metric='cosine'):
+    """
+    Top-k соседей каждой строки матрицы worksheets × теги
+
+    Строки матрицы должны идти от новых к старым: при равном сходстве
+    выше строка с меньшим номером.
+
+    Параметры:
+        matrix: результат build_tag_matrix
+        limit: сколько соседей на строку
+        metric: 'cosine' или 'jaccard'
+
+    Возвращает:
+        tuple: массивы (строка, сосед, позиция, сходство) одинаковой длины
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Неизвестная мера сходства '{metric}'")
+
+    profile_of, profiles = group_profiles(matrix)
+    profile_count = profiles.shape[0]
+    if not profile_count:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty, np.array([], dtype=np.float32)
+
+    sizes = np.asarray(profiles.sum(axis=1), dtype=np.float32).ravel()
+    profiles_t = profiles.T.tocsr()
+
+    # Строки, сгруппированные по профилю, внутри профиля - от новых к старым
+    tagged = np.flatnonzero(profile_of >= 0)
+    members = tagged[np.argsort(profile_of[tagged], kind='stable')]
+    member_counts = np.bincount(profile_of[tagged], minlength=profile_count)
+    member_starts = np.concatenate(([0], np.cumsum(member_counts)[:-1]))
+    # Из одного профиля нужно не больше limit + 1 листов (с запасом на себя)
+    taken_counts = np.minimum(member_counts, limit + 1)
+
+    sources, targets, positions, scores = [], [], [], []
+
+    # Строк в блоке столько, чтобы плотный блок сходств занимал ~BLOCK_ELEMENTS чисел
+    block_size = max(1, BLOCK_ELEMENTS // profile_count)
+    for block_start in range(0, profile_count, block_size):
+        block = slice(block_start, min(block_start + block_size, profile_count))
+        shared = (profiles[block] @ profiles_t).toarray()
+
+        if metric == 'cosine':
+            similarity = shared / np.sqrt(sizes[block, None] * sizes[None, :])
+        else:
+            similarity = shared / (sizes[block, None] + sizes[None, :] - shared)
+
+        rows, ranked, ranked_scores = _rank_block(
+            similarity, members, member_starts, taken_counts, limit
+        )
+        bounds = np.searchsorted(rows, np.arange(similarity.shape[0] + 1))
+        for offset in range(similarity.shape[0]):
+            profile = block_start + offset
+            ranked_slice = slice(bounds[offset], bounds[offset + 1])
+            _append_neighbours(
+                members[member_starts[profile]:member_starts[profile] + member_counts[profile]],
+                ranked[ranked_slice], ranked_scores[ranked_slice], limit,
+                sources, targets, positions, scores
+            )
+
+    if not sources:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty, np.array([], dtype=np.float32)
+
+    return (
+        np.concatenate(sources),
+        np.concatenate(targets),
+        np.concatenate(positions),
+        np.concatenate(scores),
+    )
+
+
+def _rank_block(similarity, members, member_starts, taken_counts, limit):
+    """
+    Лучшие limit + 1 листов для каждой строки блока сходств с профилями
+
+    Лист из top-(limit + 1) может быть только в профиле, чье сходство
+    не меньше (limit + 1)-го по величине в строке: каждый профиль выше
+    него по (сходство, новизна) дает свой лист выше. Поэтому берем
+    профили не ниже этого порога (np.partition по всему блоку сразу),
+    раскрываем их в листы и сортируем по (строка, сходство, новизна).
+
+    Возвращает:
+        tuple: (строка блока, лист, сходство), отсортированные по строке и рейтингу
+    """
+    wanted = limit + 1
+    block_rows, profile_count = similarity.shape
+    if profile_count > wanted:
+        threshold = np.partition(similarity, profile_count - wanted, axis=1)[:, profile_count - wanted]
+    else:
+        threshold = np.zeros(block_rows, dtype=similarity.dtype)
+
+    rows, chosen = np.nonzero((similarity >= threshold[:, None]) & (similarity > 0))
+
+    counts = taken_counts[chosen]
+    starts = np.repeat(member_starts[chosen], counts)
+    inner = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    candidates = members[starts + inner]
+    candidate_rows = np.repeat(rows, counts)
+    candidate_scores = np.repeat(similarity[rows, chosen], counts)
+
+    # По строке, затем по сходству (убывание), при равенстве - более новые (меньший номер)
+    order = np.lexsort((candidates, -candidate_scores, candidate_rows))
+    candidate_rows = candidate_rows[order]
+    candidates = candidates[order]
+    candidate_scores = candidate_scores[order]
+
+    rank = np.arange(len(order)) - np.searchsorted(candidate_rows, candidate_rows)
+    keep = rank < wanted
+    return candidate_rows[keep], candidates[keep], candidate_scores[keep]
+
+
+def _append_neighbours(profile_members, ranked, ranked_scores, limit,
+                       sources, targets, positions, scores):
+    """Рекомендации для всех листов профиля: общий рейтинг без самого листа"""
+    if not len(ranked):
+        return
+
+    top = ranked[:limit]
+    in_top = np.isin(profile_members, top)
+
+    # Листы профиля, которых нет в общем top-k, получают его целиком
+    others = profile_members[~in_top]
+    if len(others):
+        sources.append(np.repeat(others, len(top)))
+        targets.append(np.tile(top, len(others)))
+        positions.append(np.tile(np.arange(len(top)), len(others)))
+        scores.append(np.tile(ranked_scores[:limit], len(others)))
+
+    # Лист, попавший в свой же top-k, заменяется следующим кандидатом
+    for member in profile_members[in_top]:
+        keep = ranked != member
+        neighbours = ranked[keep][:limit]
+        sources.append(np.full(len(neighbours), member))
+        targets.append(neighbours)
+        positions.append(np.arange(len(neighbours)))
+        scores.append(ranked_scores[keep][:limit])
+
+
+def rebuild(limit=RECOMMENDATIONS_LIMIT, metric='cosine', using='default'):
+    """
+    Пересчитать рекомендации для всех опубликованных worksheets
+
+    Возвращает:
+        int: сколько worksheets получили рекомендации
+    """
+    worksheet_ids = np.fromiter(
+        Worksheet.objects.using(using)
+        .filter(is_published=True)
+        .order_by('-created_at', '-id')
+        .values_list('id', flat=True),
+        dtype=np.int64
+    )
+    links = np.array(
+        list(
+            Worksheet.tags.through.objects.using(using)
+            .filter(worksheet__is_published=True)
+            .values_list('worksheet_id', 'tag_id')
+        ),
+        dtype=np.int64
+    ).reshape(-1, 2)
+
+    # id из базы -> номера строк (от новых к старым) и столбцов
+    row_of = {worksheet_id: row for row, worksheet_id in enumerate(worksheet_ids.tolist())}
+    rows = np.array([row_of[worksheet_id] for worksheet_id in links[:, 0].tolist()], dtype=np.int64)
+    tag_ids, cols = np.unique(links[:, 1], return_inverse=True)
+
+    matrix = build_tag_matrix(rows, cols.ravel(), (len(worksheet_ids), len(tag_ids)))
+    sources, targets, positions, scores = compute_recommendations(matrix, limit, metric)
+
+    source_ids = worksheet_ids[sources].tolist()
+    target_ids = worksheet_ids[targets].tolist()
+    positions = positions.tolist()
+    scores = scores.tolist()
+
+    with transaction.atomic(using=using):
+        WorksheetRecommendation.objects.using(using).all().delete()
+        for start in range(0, len(source_ids), WRITE_BATCH_SIZE):
+            end = start + WRITE_BATCH_SIZE
+            WorksheetRecommendation.objects.using(using).bulk_create([
+                WorksheetRecommendation(
+                    worksheet_id=source_id,
+                    recommended_id=target_id,
+                    position=position,
+                    score=round(score, 6),
+                )
+                for source_id, target_id, position, score in zip(
+                    source_ids[start:end], target_ids[start:end],
+                    positions[start:end], scores[start:end]
+                )
+            ])
+
+    return len(set(source_ids))
@@ -0,0 +1,235 @@
+"""
+Полнотекстовый поиск по рабочим листам
+
+Индексируются: название, описание, названия тегов и категории.
+
+Два движка, выбираются по базе данных:
+- PostgreSQL: предвычисленный tsvector в Worksheet.search_vector
+  (GIN индекс, русская морфология, ранжирование через ts_rank)
+- SQLite (dev): виртуальная таблица FTS5 worksheets_worksheet_fts
+  с ранжированием bm25 и префиксным поиском вместо стемминга
+
+Индекс обновляется сигналами (см. signals.py), полная перестройка:
+    python manage.py rebuild_search_index
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# Конфигурация текстового поиска PostgreSQL (стемминг русского языка)
+SEARCH_CONFIG = 'russian'
+
+# Таблица FTS5 для SQLite (rowid = id рабочего листа)
+FTS_TABLE = 'worksheets_worksheet_fts'
+
+# Веса колонок FTS5 для bm25: title, tags, category, description
+FTS_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+
+
+def get_document(worksheet):
+    """
+    Собрать индексируемые тексты рабочего листа
+
+    Возвращает:
+        dict: title, tags, category, description
+    """
+    return {
+        'title': worksheet.title or '',
+        'tags': ' '.join(tag.name for tag in worksheet.tags.all()),
+        'category': worksheet.category.name if worksheet.category_id else '',
+        'description': worksheet.description or '',
+    }
+
+
+def update_index(queryset):
+    """
+    Пересчитать поисковый индекс для worksheets из queryset
+
+    Принимает queryset (в том числе исторической модели в миграциях)
+    """
+    worksheets = list(queryset.select_related('category').prefetch_related('tags'))
+    if not worksheets:
+        return 0
+
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        _update_postgres(connection, worksheets)
+    elif connection.vendor == 'sqlite':
+        _update_sqlite(connection, worksheets)
+
+    return len(worksheets)
+
+
+def remove_from_index(worksheet_ids, using='default'):
+    """Удалить worksheets из индекса (для SQLite; в PostgreSQL вектор живет в строке)"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not worksheet_ids:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(pk,) for pk in worksheet_ids]
+        )
+
+
+def search_worksheets(queryset, query, order_by_rank=True):
+    """
+    Отфильтровать queryset по поисковому запросу
+
+    Параметры:
+        queryset: исходный queryset рабочих листов
+        query: строка поиска
+        order_by_rank: сортировать ли по релевантности
+            (False - оставить сортировку queryset, например ?ordering=)
+
+    Возвращает:
+        QuerySet: найденные worksheets
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, query, order_by_rank)
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, query, order_by_rank)
+    return _search_fallback(queryset, query)
+
+
+# === PostgreSQL ===
+
+def _update_postgres(connection, worksheets):
+    """
+    Один UPDATE на все worksheets: тексты передаются массивами
+    и разворачиваются через unnest() в таблицу для JOIN
+    """
+    model = type(worksheets[0])
+    table = connection.ops.quote_name(model._meta.db_table)
+
+    columns = {'id': [], 'title': [], 'tags': [], 'category': [], 'description': []}
+    for worksheet in worksheets:
+        document = get_document(worksheet)
+        columns['id'].append(worksheet.pk)
+        for name in ('title', 'tags', 'category', 'description'):
+            columns[name].append(document[name])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            UPDATE {table} AS w SET search_vector =
+                setweight(to_tsvector(%(config)s::regconfig, d.title), 'A')
+                || setweight(to_tsvector(%(config)s::regconfig, d.tags), 'B')
+                || setweight(to_tsvector(%(config)s::regconfig, d.category), 'B')
+                || setweight(to_tsvector(%(config)s::regconfig, d.description), 'C')
+            FROM unnest(
+                %(id)s::bigint[], %(title)s::text[], %(tags)s::text[],
+                %(category)s::text[], %(description)s::text[]
+            ) AS d(id, title, tags, category, description)
+            WHERE w.id = d.id
+            ''',
+            {'config': SEARCH_CONFIG, **columns}
+        )
+
+
+def _search_postgres(queryset, query, order_by_rank):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    queryset = queryset.filter(search_vector=search_query)
+
+    if order_by_rank:
+        queryset = queryset.annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', '-created_at')
+
+    return queryset
+
+
+# === SQLite FTS5 ===
+
+def _update_sqlite(connection, worksheets):
+    rows = []
+    for worksheet in worksheets:
+        document = get_document(worksheet)
+        rows.append((
+            worksheet.pk,
+            document['title'],
+            document['tags'],
+            document['category'],
+            document['description'],
+        ))
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(row[0],) for row in rows]
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, tags, category, description) '
+            f'VALUES (%s, %s, %s, %s, %s)',
+            rows
+        )
+
+
+def build_fts_query(query):
+    """
+    Преобразовать пользовательский запрос в выражение FTS5 MATCH
+
+    У FTS5 нет русского стеммера, поэтому длинные слова
+    обрезаются и ищутся по префиксу: "сложение" -> "сложени"*,
+    что находит и "сложения", и "сложением".
+
+    Возвращает:
+        str: выражение MATCH или '' если в запросе нет слов
+    """
+    terms = []
+    for word in re.findall(r'\w+', query.lower()):
+        if len(word) >= 7:
+            word = word[:-2]
+        elif len(word) >= 5:
+            word = word[:-1]
+        terms.append(f'"{word}"*')
+    return ' '.join(terms)
+
+
+def _search_sqlite(queryset, query, order_by_rank):
+    """
+    Совпадения FTS5 - подзапрос внутри запроса worksheets, поэтому
+    количество и страницы (LIMIT/OFFSET) считает сама база, без
+    выгрузки всех id в Python и без ограничения числа результатов
+    """
+    match = build_fts_query(query)
+    if not match:
+        return queryset.none()
+
+    queryset = queryset.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+    )
+
+    if order_by_rank:
+        # bm25 тем меньше, чем релевантнее; rowid = ... FTS5 ищет по индексу
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        pk_column = f'{queryset.model._meta.db_table}.{queryset.model._meta.pk.column}'
+        queryset = queryset.annotate(
+            search_rank=RawSQL(
+                f'SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = {pk_column}',
+                [match],
+                output_field=FloatField(),
+            )
+        ).order_by('search_rank', '-created_at')
+
+    return queryset
+
+
+# === Другие базы ===
+
+def _search_fallback(queryset, query):
+    return queryset.filter(
+        Q(title__icontains=query) | Q(description__icontains=query)
+    )
@@ -4,8 +4,56 @@ Serializers для API рабочих листов
 
 from rest_framework import serializers
 from .models import Worksheet
+from .previews import IMAGE_FORMATS
 from apps.tags.serializers import TagSerializer
-from apps.categories.serializers import CategorySerializer
+from apps.categories.serializers import CategoryParentSerializer, CategorySerializer
+
+
+def build_picture_sources(worksheet, kind, request=None):
+    """
+    Источники для <picture>: по одному на формат, в порядке предпочтения
+
+    Пример элемента:
+        {'type': 'image/webp', 'srcset': '.../a_300w.webp 300w, .../a_600w.webp 600w',
+         'width': 300, 'height': 400}
+
+    width/height - размер 1x (чтобы зарезервировать место под картинку).
+    Последний элемент всегда PNG - запасной вариант для <img>.
+    """
+    sources = []
+    for image_format, variants in worksheet.get_preview_renditions(kind).items():
+        candidates = []
+        for variant in variants:
+            url = variant['url']
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            candidates.append(f"{url} {variant['width']}w" if variant['width'] else url)
+
+        sources.append({
+            'type': IMAGE_FORMATS[image_format]['mime'],
+            'srcset': ', '.join(candidates),
+            'width': variants[0]['width'],
+            'height': variants[0]['height'],
+        })
+    return sources
+
+
+class FingerprintedImageField(serializers.ImageField):
+    """
+    URL картинки с отпечатком содержимого (см. Worksheet.get_file_url):
+    при перегенерации превью URL меняется, поэтому nginx и браузеры
+    кэшируют картинки на год
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+
+        url = value.instance.get_file_url(value.name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
 
 
 class WorksheetListSerializer(serializers.ModelSerializer):
@@ -26,6 +74,8 @@ class WorksheetListSerializer(serializers.ModelSerializer):
     category_slug = serializers.CharField(source='category.slug', read_only=True)
     category_path = serializers.CharField(source='category.get_full_path', read_only=True)
     download_url = serializers.SerializerMethodField()
+    thumbnail = FingerprintedImageField(read_only=True)
+    thumbnail_sources = serializers.SerializerMethodField()
 
     class Meta:
         model = Worksheet
@@ -40,6 +90,7 @@ class WorksheetListSerializer(serializers.ModelSerializer):
             'grade_level',
             'difficulty',
             'thumbnail',           # Маленькое превью для каталога
+            'thumbnail_sources',   # Оно же в WebP/AVIF/PNG, 1x/2x (для <picture>)
             'tags',
             'views_count',
             'downloads_count',
@@ -51,6 +102,10 @@ class WorksheetListSerializer(serializers.ModelSerializer):
         """URL для скачивания PDF"""
         return f"/api/worksheets/{obj.id}/download/"
 
+    def get_thumbnail_sources(self, obj):
+        """Рендиции миниатюры для <picture> / srcset"""
+        return build_picture_sources(obj, 'thumbnail', self.context.get('request'))
+
 
 class WorksheetDetailSerializer(serializers.ModelSerializer):
     """
@@ -68,6 +123,10 @@ class WorksheetDetailSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     download_url = serializers.SerializerMethodField()
     absolute_url = serializers.CharField(source='get_absolute_url', read_only=True)
+    preview_image = FingerprintedImageField(read_only=True)
+    preview_sources = serializers.SerializerMethodField()
+    thumbnail = FingerprintedImageField(read_only=True)
+    thumbnail_sources = serializers.SerializerMethodField()
 
     class Meta:
         model = Worksheet
@@ -80,7 +139,9 @@ class WorksheetDetailSerializer(serializers.ModelSerializer):
             'grade_level',
             'difficulty',
             'preview_image',       # Большое превью для карточки
+            'preview_sources',     # Оно же в WebP/AVIF/PNG, 1x/2x (для <picture>)
             'thumbnail',           # Маленькое тоже (на случай если нужно)
+            'thumbnail_sources',
             'tags',
             'views_count',
             'downloads_count',
@@ -95,3 +156,27 @@ class WorksheetDetailSerializer(serializers.ModelSerializer):
     def get_download_url(self, obj):
         """URL для скачивания PDF"""
         return f"/api/worksheets/{obj.id}/download/"
+
+    def get_preview_sources(self, obj):
+        """Рендиции большого превью для <picture> / srcset"""
+        return build_picture_sources(obj, 'preview', self.context.get('request'))
+
+    def get_thumbnail_sources(self, obj):
+        """Рендиции миниатюры для <picture> / srcset"""
+        return build_picture_sources(obj, 'thumbnail', self.context.get('request'))
+
+
+class WorksheetBundleSerializer(serializers.Serializer):
+    """
+    Все данные страницы рабочего листа одним ответом
+
+    Используется:
+    - GET /api/worksheets/<slug>/bundle/ (WorksheetBundleView)
+
+    Сериализует dict: worksheet (карточка), similar (похожие),
+    breadcrumbs (категории от корня до категории листа)
+    """
+
+    worksheet = WorksheetDetailSerializer(read_only=True)
+    similar = WorksheetListSerializer(many=True, read_only=True)
+    breadcrumbs = CategoryParentSerializer(many=True, read_only=True)
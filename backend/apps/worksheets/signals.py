@@ -2,33 +2,218 @@
 Сигналы для автоматического обновления данных
 """
 
-from django.db.models.signals import m2m_changed
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
+
 from .models import Worksheet
+from . import search, similarity
+from .cards import bump_cards_version
+
+# Поля worksheet, изменение которых требует переиндексации для поиска
+SEARCH_INDEXED_FIELDS = {'title', 'description', 'category'}
 
 
 @receiver(m2m_changed, sender=Worksheet.tags.through)
-def update_tag_usage_count(sender, instance, action, **kwargs):
+def update_tag_usage_count(sender, instance, action, reverse, pk_set, using, **kwargs):
     """
     Автоматически обновляем счетчик usage_count у тегов
     при добавлении/удалении тегов у worksheet
 
-    Вызывается когда:
-    - Добавляется тег к worksheet
-    - Удаляется тег из worksheet
-    - Очищаются все теги у worksheet
-    """
-    if action in ['post_add', 'post_remove', 'post_clear']:
-        # Обновляем счетчики для всех тегов этого worksheet
-        for tag in instance.tags.all():
-            tag.update_usage_count()
-
-        # Если были удалены теги, обновляем и их
-        if action == 'post_remove' and 'pk_set' in kwargs:
-            from apps.tags.models import Tag
-            for tag_id in kwargs['pk_set']:
-                try:
-                    tag = Tag.objects.get(pk=tag_id)
-                    tag.update_usage_count()
-                except Tag.DoesNotExist:
-                    pass
+    Пересчитываются только затронутые теги, одним UPDATE
+    и не чаще раза за транзакцию (см. apps/tags/usage.py)
+    """
+    from apps.tags.usage import schedule_usage_count_update
+
+    if action == 'pre_clear' and not reverse:
+        # После clear() pk_set пустой - запоминаем теги заранее
+        instance._cleared_tag_ids = set(
+            sender.objects.filter(worksheet=instance).values_list('tag_id', flat=True)
+        )
+        return
+
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+
+    if reverse:
+        # tag.worksheets.add(...) - instance это сам тег
+        tag_ids = {instance.pk}
+    elif action == 'post_clear':
+        tag_ids = instance.__dict__.pop('_cleared_tag_ids', set())
+    else:
+        tag_ids = pk_set
+
+    schedule_usage_count_update(tag_ids, using=using)
+
+
+@receiver(pre_save, sender=Worksheet)
+def remember_publish_change(sender, instance, update_fields=None, using=None, **kwargs):
+    """
+    Запоминаем, меняется ли is_published и поля индекса похожих (сравниваем с базой)
+
+    Счетчики тегов учитывают только опубликованные worksheets,
+    похожие подбираются по категории, классу и сложности
+    """
+    instance._publish_changed = False
+    instance._similarity_changed = instance.pk is None
+    instance._old_category_id = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not (set(update_fields) & similarity.SIMILARITY_FIELDS):
+        return
+
+    old = (
+        Worksheet.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list('is_published', 'category_id', 'grade_level', 'difficulty')
+        .first()
+    )
+    if old is None:
+        return
+
+    instance._publish_changed = old[0] != instance.is_published
+    instance._similarity_changed = old != (
+        instance.is_published, instance.category_id, instance.grade_level, instance.difficulty
+    )
+    instance._old_category_id = old[1]
+
+
+@receiver(post_save, sender=Worksheet)
+def update_tag_usage_count_on_publish(sender, instance, created, using, **kwargs):
+    """+1/-1 к usage_count тегов при публикации/снятии с публикации"""
+    from apps.tags.usage import apply_publish_deltas
+
+    if instance.__dict__.pop('_publish_changed', False):
+        apply_publish_deltas([instance.pk], instance.is_published, using=using)
+
+
+@receiver(pre_delete, sender=Worksheet)
+def update_tag_usage_count_on_delete(sender, instance, using, **kwargs):
+    """
+    Связи с тегами удаляются каскадом без m2m_changed -
+    вычитаем опубликованный worksheet из счетчиков заранее
+    """
+    from apps.tags.usage import apply_publish_deltas
+
+    if instance.is_published:
+        apply_publish_deltas([instance.pk], False, using=using)
+
+
+# === ПОИСКОВЫЙ ИНДЕКС ===
+
+@receiver(post_save, sender=Worksheet)
+def update_worksheet_search_index(sender, instance, update_fields=None, **kwargs):
+    """
+    Переиндексируем worksheet после сохранения
+
+    Сохранения только служебных полей (превью, счетчики) пропускаем
+    """
+    if update_fields and not (set(update_fields) & SEARCH_INDEXED_FIELDS):
+        return
+    search.update_index(Worksheet.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Worksheet)
+def remove_worksheet_from_search_index(sender, instance, **kwargs):
+    """Удаляем worksheet из поискового индекса"""
+    search.remove_from_index([instance.pk])
+
+
+@receiver(m2m_changed, sender=Worksheet.tags.through)
+def update_search_index_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Названия тегов входят в индекс - переиндексируем при изменении тегов"""
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+
+    if reverse:
+        # tag.worksheets.add(...) - instance это тег, pk_set - id worksheets
+        if pk_set:
+            search.update_index(Worksheet.objects.filter(pk__in=pk_set))
+    else:
+        search.update_index(Worksheet.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender='categories.Category')
+def update_search_index_on_category_save(sender, instance, created, update_fields=None, **kwargs):
+    """Название категории входит в индекс ее worksheets"""
+    if created or (update_fields and 'name' not in update_fields):
+        return
+    search.update_index(Worksheet.objects.filter(category=instance))
+
+
+@receiver(post_save, sender='tags.Tag')
+def update_search_index_on_tag_save(sender, instance, created, update_fields=None, **kwargs):
+    """Название тега входит в индекс его worksheets (usage_count пропускаем)"""
+    if created or (update_fields and 'name' not in update_fields):
+        return
+    search.update_index(Worksheet.objects.filter(tags=instance))
+
+
+# === ПОХОЖИЕ РАБОЧИЕ ЛИСТЫ ===
+
+@receiver(post_save, sender=Worksheet)
+def update_similar_index(sender, instance, using, **kwargs):
+    """Обновляем индекс похожих после коммита, если изменились категория/класс/сложность/публикация"""
+    if not instance.__dict__.pop('_similarity_changed', False):
+        return
+    similarity.schedule_similar_refresh(
+        [instance.pk],
+        [instance.category_id, instance.__dict__.pop('_old_category_id', None)],
+        using=using
+    )
+
+
+@receiver(post_delete, sender=Worksheet)
+def update_similar_index_on_delete(sender, instance, using, **kwargs):
+    """Строки индекса удалены каскадом - дополняем списки, где был этот лист"""
+    similarity.schedule_similar_refresh([instance.pk], [instance.category_id], using=using)
+
+
+@receiver(m2m_changed, sender=Worksheet.tags.through)
+def update_similar_index_on_tags_change(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """Общие теги - главная часть оценки сходства"""
+    if action == 'pre_clear' and reverse:
+        # tag.worksheets.clear(): после очистки pk_set пустой
+        instance._cleared_worksheet_ids = set(
+            sender.objects.filter(tag=instance).values_list('worksheet_id', flat=True)
+        )
+        return
+
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+
+    if not reverse:
+        worksheet_ids = [instance.pk]
+    elif action == 'post_clear':
+        worksheet_ids = instance.__dict__.pop('_cleared_worksheet_ids', set())
+    else:
+        worksheet_ids = pk_set
+
+    similarity.schedule_similar_refresh(worksheet_ids, using=using)
+
+
+# === КАРТОЧКИ СПИСКОВ ===
+
+@receiver(m2m_changed, sender=Worksheet.tags.through)
+def touch_worksheet_on_tags_change(sender, instance, action, reverse, using, **kwargs):
+    """
+    Теги есть в карточке, а ключ карточки включает updated_at листа
+    (apps/worksheets/cards.py) - сдвигаем updated_at при смене тегов
+    """
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+
+    if reverse:
+        # tag.worksheets.add(...) - затронутые листы известны не всегда
+        bump_cards_version()
+    else:
+        Worksheet.objects.using(using).filter(pk=instance.pk).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender='categories.Category')
+@receiver(post_delete, sender='categories.Category')
+@receiver(post_save, sender='tags.Tag')
+@receiver(post_delete, sender='tags.Tag')
+def reset_cards_on_category_or_tag_change(sender, **kwargs):
+    """Название и путь категории, названия тегов есть в карточках многих листов"""
+    bump_cards_version()
@@ -0,0 +1,262 @@
+"""
+Индекс похожих рабочих листов (блок "Вам может понравиться")
+
+Раньше /similar/ выбирал 4 случайных листа категории через ORDER BY
+RANDOM() - полная сортировка категории на каждый просмотр карточки
+и каждый раз другой результат. Теперь похожие предвычисляются и
+хранятся в SimilarWorksheet, а /similar/ читает их одним запросом.
+
+Похожие ищутся среди опубликованных листов той же категории,
+оценка сходства:
+    SCORE_TAG * общих тегов + SCORE_GRADE (тот же класс) + SCORE_DIFFICULTY (та же сложность)
+При равной оценке выше более новые листы - результат стабилен.
+
+Обновление инкрементальное: сигналы и WorksheetQuerySet.update()
+передают id измененных worksheets в schedule_similar_refresh(),
+после коммита пересчитываются только списки, которые могли измениться
+(см. refresh()). Полная перестройка: python manage.py rebuild_similar
+"""
+
+import heapq
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.db import transaction
+
+from .models import SimilarWorksheet, Worksheet
+
+# Сколько похожих хранится и отдается для одного worksheet
+SIMILAR_LIMIT = 4
+
+# Веса оценки сходства
+SCORE_TAG = 4
+SCORE_GRADE = 2
+SCORE_DIFFICULTY = 1
+
+# Если изменилось больше 1/FULL_REFRESH_RATIO листов категории -
+# пересчитывается вся категория
+FULL_REFRESH_RATIO = 10
+
+# Поля worksheet, от которых зависит индекс
+SIMILARITY_FIELDS = {'category', 'category_id', 'grade_level', 'difficulty', 'is_published'}
+
+_state = threading.local()
+
+
+class CategoryIndex:
+    """
+    Опубликованные worksheets одной категории в памяти: теги, класс,
+    сложность и списки по убыванию новизны для быстрого подбора кандидатов
+    """
+
+    def __init__(self, category_id, using='default'):
+        self.rows = {}
+        self.tags = defaultdict(set)
+        # Тег -> worksheets категории с этим тегом
+        self.postings = defaultdict(list)
+
+        worksheets = (
+            Worksheet.objects.using(using)
+            .filter(category_id=category_id, is_published=True)
+            .order_by('-created_at', '-id')
+            .values_list('id', 'grade_level', 'difficulty', 'created_at')
+        )
+        # Ключ сортировки при равной оценке: чем новее, тем больше
+        self.recency = {}
+        for rank, (worksheet_id, grade_level, difficulty, _) in enumerate(worksheets):
+            self.rows[worksheet_id] = (grade_level, difficulty)
+            self.recency[worksheet_id] = -rank
+
+        for worksheet_id, tag_id in (
+            Worksheet.tags.through.objects.using(using)
+            .filter(worksheet__category_id=category_id, worksheet__is_published=True)
+            .values_list('worksheet_id', 'tag_id')
+        ):
+            self.tags[worksheet_id].add(tag_id)
+            self.postings[tag_id].append(worksheet_id)
+
+        # Самые новые в группах: запасные кандидаты без общих тегов
+        self.newest = defaultdict(list)
+        for worksheet_id, (grade_level, difficulty) in self.rows.items():
+            for key in ((grade_level, difficulty), (grade_level, None), (None, difficulty), None):
+                if len(self.newest[key]) <= SIMILAR_LIMIT:
+                    self.newest[key].append(worksheet_id)
+
+    def score(self, worksheet_id, other_id):
+        grade_level, difficulty = self.rows[worksheet_id]
+        other_grade_level, other_difficulty = self.rows[other_id]
+        return (
+            SCORE_TAG * len(self.tags[worksheet_id] & self.tags[other_id])
+            + SCORE_GRADE * (grade_level == other_grade_level)
+            + SCORE_DIFFICULTY * (difficulty == other_difficulty)
+        )
+
+    def rank_key(self, worksheet_id, other_id):
+        """Ключ для сравнения кандидатов: оценка, затем новизна"""
+        return (self.score(worksheet_id, other_id), self.recency[other_id])
+
+    def get_similar(self, worksheet_id):
+        """
+        Похожие для одного worksheet
+
+        Кандидаты - листы с общими тегами плюс самые новые листы с тем же
+        классом/сложностью: лучший лист без общих тегов всегда среди них.
+
+        Возвращает:
+            list: [(id похожего, оценка)] по убыванию сходства
+        """
+        candidates = set()
+        for tag_id in self.tags[worksheet_id]:
+            candidates.update(self.postings[tag_id])
+
+        grade_level, difficulty = self.rows[worksheet_id]
+        for key in ((grade_level, difficulty), (grade_level, None), (None, difficulty), None):
+            candidates.update(self.newest[key])
+        candidates.discard(worksheet_id)
+
+        best = heapq.nlargest(
+            SIMILAR_LIMIT,
+            candidates,
+            key=lambda other_id: self.rank_key(worksheet_id, other_id)
+        )
+        return [(other_id, self.score(worksheet_id, other_id)) for other_id in best]
+
+
+def refresh(category_id, changed_ids=None, using='default'):
+    """
+    Пересчитать индекс похожих в категории
+
+    Параметры:
+        category_id: категория
+        changed_ids: id измененных worksheets (в этой категории или
+            ушедших из нее); None - пересчитать всю категорию
+
+    Пересчитываются списки измененных worksheets и тех, у кого
+    измененный лист был в списке или может в него попасть
+    (его оценка не ниже худшей в списке). Остальные не меняются.
+
+    Возвращает:
+        int: сколько списков пересчитано
+    """
+    index = CategoryIndex(category_id, using=using)
+    in_category = Worksheet.objects.using(using).filter(category_id=category_id)
+
+    if changed_ids is not None:
+        changed_ids = set(changed_ids)
+        changed_here = changed_ids & set(index.rows)
+        # Много изменений - проще пересчитать всю категорию
+        if len(changed_here) * FULL_REFRESH_RATIO > len(index.rows):
+            changed_ids = None
+
+    if changed_ids is None:
+        targets = set(index.rows)
+        stale_ids = set(in_category.values_list('pk', flat=True))
+    else:
+        targets = set(changed_here)
+        # Списки измененных листов категории пересоздаются или удаляются
+        # (сняты с публикации). Перенесенные в другую категорию
+        # обновит пересчет той категории.
+        stale_ids = set(in_category.filter(pk__in=changed_ids).values_list('pk', flat=True))
+
+        current = defaultdict(list)
+        for worksheet_id, similar_id in (
+            SimilarWorksheet.objects.using(using)
+            .filter(worksheet__category_id=category_id)
+            .order_by('position')
+            .values_list('worksheet_id', 'similar_id')
+        ):
+            current[worksheet_id].append(similar_id)
+
+        for worksheet_id in index.rows:
+            if worksheet_id in changed_here:
+                continue
+            similar_ids = current[worksheet_id]
+            if (
+                len(similar_ids) < SIMILAR_LIMIT
+                or not all(similar_id in index.rows for similar_id in similar_ids)
+                or changed_ids.intersection(similar_ids)
+                or any(
+                    index.rank_key(worksheet_id, changed_id)
+                    > index.rank_key(worksheet_id, similar_ids[-1])
+                    for changed_id in changed_here
+                )
+            ):
+                targets.add(worksheet_id)
+
+    stale_ids |= targets
+    links = [
+        SimilarWorksheet(worksheet_id=worksheet_id, similar_id=similar_id, position=position, score=score)
+        for worksheet_id in targets
+        for position, (similar_id, score) in enumerate(index.get_similar(worksheet_id))
+    ]
+
+    with transaction.atomic(using=using):
+        stale_ids = list(stale_ids)
+        for start in range(0, len(stale_ids), 500):
+            SimilarWorksheet.objects.using(using).filter(
+                worksheet_id__in=stale_ids[start:start + 500]
+            ).delete()
+        SimilarWorksheet.objects.using(using).bulk_create(links, batch_size=500)
+
+    return len(targets)
+
+
+def rebuild(using='default'):
+    """
+    Перестроить индекс похожих для всех категорий
+
+    Возвращает:
+        int: сколько списков построено
+    """
+    category_ids = (
+        Worksheet.objects.using(using)
+        .order_by()
+        .values_list('category_id', flat=True)
+        .distinct()
+    )
+    with transaction.atomic(using=using):
+        return sum(refresh(category_id, using=using) for category_id in list(category_ids))
+
+
+def _get_pending():
+    """Отложенные изменения текущего потока: {alias базы: {'worksheets', 'categories'}}"""
+    if not hasattr(_state, 'pending'):
+        _state.pending = {}
+    return _state.pending
+
+
+def schedule_similar_refresh(worksheet_ids, category_ids=(), using='default'):
+    """
+    Запланировать обновление индекса после коммита транзакции
+
+    Параметры:
+        worksheet_ids: id измененных worksheets
+        category_ids: категории, откуда worksheets могли уйти
+            (прежняя категория, категория удаленного листа)
+    """
+    if not worksheet_ids:
+        return
+
+    pending = _get_pending().setdefault(using, {'worksheets': set(), 'categories': set()})
+    pending['worksheets'].update(worksheet_ids)
+    pending['categories'].update(category_id for category_id in category_ids if category_id)
+
+    # Повторные вызовы в той же транзакции найдут пустой набор и ничего не сделают
+    transaction.on_commit(partial(flush, using), using=using)
+
+
+def flush(using='default'):
+    """Обновить индекс для всех отложенных изменений"""
+    pending = _get_pending().pop(using, None)
+    if not pending:
+        return
+
+    worksheet_ids = pending['worksheets']
+    category_ids = pending['categories'] | set(
+        Worksheet.objects.using(using)
+        .filter(pk__in=worksheet_ids)
+        .values_list('category_id', flat=True)
+    )
+    for category_id in category_ids:
+        refresh(category_id, worksheet_ids, using=using)
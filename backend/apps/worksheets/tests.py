@@ -0,0 +1,414 @@
+"""
+Тесты рабочих листов
+
+Запуск: cd backend && pytest
+"""
+
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from apps.categories.models import Category
+from apps.core.cache import get_content_version
+from apps.core.storage import file_digest
+from apps.tags.models import Tag
+
+from . import counters, jobs, similarity
+from .importer import WorksheetImporter
+from .models import CounterIncrement, MediaAlias, PreviewStatus, SimilarWorksheet, Worksheet, media_storage
+
+
+def create_worksheet(category, number, **kwargs):
+    return Worksheet.objects.create(
+        title=f'Рабочий лист {number}',
+        slug=f'list-{category.slug}-{number}',
+        description='Описание',
+        category=category,
+        grade_level='grade1',
+        pdf_file=f'worksheets/pdf/list-{number}.pdf',
+        **kwargs
+    )
+
+
+class CounterBufferTests(TransactionTestCase):
+    """Буфер счетчиков: инкременты из разных потоков не теряются"""
+
+    THREADS = 8
+    INCREMENTS = 50
+
+    def setUp(self):
+        category = Category.objects.create(name='Математика', slug='matematika')
+        self.worksheets = [create_worksheet(category, number) for number in range(3)]
+
+    def run_threads(self, target):
+        errors = []
+
+        def worker(number):
+            try:
+                target(number)
+            except Exception as e:  # ошибка в потоке не видна тесту без этого
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(number,)) for number in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_increments_and_flushes(self):
+        """Потоки одновременно увеличивают счетчики и сбрасывают буфер"""
+        def target(number):
+            for step in range(self.INCREMENTS):
+                worksheet = self.worksheets[step % len(self.worksheets)]
+                counters.increment(worksheet.pk, 'views_count')
+                if step % 2:
+                    counters.increment(worksheet.pk, 'downloads_count')
+                if step % 10 == number % 10:
+                    counters.flush()
+
+        self.run_threads(target)
+        counters.flush()
+
+        total_views = self.THREADS * self.INCREMENTS
+        total_downloads = self.THREADS * (self.INCREMENTS // 2)
+        worksheets = Worksheet.objects.order_by('pk')
+        self.assertEqual(sum(worksheet.views_count for worksheet in worksheets), total_views)
+        self.assertEqual(sum(worksheet.downloads_count for worksheet in worksheets), total_downloads)
+        self.assertFalse(CounterIncrement.objects.exists())
+
+    def test_flush_command_drains_increments_of_all_workers(self):
+        """manage.py flush_counters сбрасывает инкременты, сделанные в других процессах"""
+        worksheet = self.worksheets[0]
+        # Буфер другого воркера: у команды свой объект буфера
+        worker_buffer = counters.CounterBuffer()
+
+        def target(number):
+            for _ in range(self.INCREMENTS):
+                worker_buffer.increment(worksheet.pk, 'views_count')
+
+        self.run_threads(target)
+
+        total = self.THREADS * self.INCREMENTS
+        self.assertEqual(counters.pending([worksheet.pk]), {worksheet.pk: {'views_count': total}})
+
+        call_command('flush_counters', stdout=StringIO())
+
+        worksheet.refresh_from_db()
+        self.assertEqual(worksheet.views_count, total)
+        self.assertEqual(counters.pending([worksheet.pk]), {})
+
+
+class WorksheetListQueryCountTests(TestCase):
+    """
+    Список /api/worksheets/ отдается за постоянное число запросов
+
+    Без кэша: COUNT + выборка id страницы + карточки (категория с родителем
+    одним JOIN) + prefetch тегов + несброшенные счетчики + usage_count
+    тегов (6 запросов). С кэшем карточек и COUNT: id страницы + счетчики
+    + usage_count (3 запроса). Число запросов не зависит от размера страницы.
+    """
+
+    WORKSHEETS = 25
+
+    def setUp(self):
+        parent = Category.objects.create(name='Математика', slug='matematika')
+        categories = [
+            Category.objects.create(name=f'Раздел {number}', slug=f'razdel-{number}', parent=parent)
+            for number in range(3)
+        ]
+        tags = [Tag.objects.create(name=f'Тег {number}', slug=f'teg-{number}') for number in range(4)]
+        for number in range(self.WORKSHEETS):
+            worksheet = create_worksheet(categories[number % len(categories)], number, is_published=True)
+            worksheet.tags.set(tags[:number % len(tags) + 1])
+        counters.increment(worksheet.pk, 'views_count')
+        cache.clear()
+
+    def assert_list_queries(self, page_size):
+        url = f'/api/worksheets/?page_size={page_size}'
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), page_size)
+        self.assertTrue(all(card['tags'] for card in results))
+        self.assertTrue(all(card['category_path'].startswith('matematika/') for card in results))
+
+        # Повторный запрос: карточки и COUNT из кэша
+        with self.assertNumQueries(3):
+            cached_response = self.client.get(url)
+        self.assertEqual(cached_response.json(), response.json())
+
+    def test_small_page(self):
+        self.assert_list_queries(5)
+
+    def test_large_page(self):
+        self.assert_list_queries(20)
+
+
+class CardCacheTests(TestCase):
+    """Изменение листа сбрасывает только его карточку"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Математика', slug='matematika')
+        self.tag = Tag.objects.create(name='Сложение', slug='slozhenie')
+        self.worksheets = [create_worksheet(self.category, number, is_published=True) for number in range(5)]
+        cache.clear()
+        self.client.get('/api/worksheets/')
+
+    def get_cards(self):
+        return {card['id']: card for card in self.client.get('/api/worksheets/').json()['results']}
+
+    def test_worksheet_save_refreshes_only_its_card(self):
+        worksheet = self.worksheets[0]
+        worksheet.title = 'Новое название'
+        worksheet.save()
+
+        # COUNT пересчитывается по новой версии контента, сериализуется
+        # одна карточка (у листов нет тегов - usage_count не запрашивается)
+        with self.assertNumQueries(5) as queries:
+            cards = self.get_cards()
+        self.assertEqual(cards[worksheet.pk]['title'], 'Новое название')
+        self.assertIn(f'"worksheets_worksheet"."id" IN ({worksheet.pk})', queries.captured_queries[2]['sql'])
+
+        with self.assertNumQueries(2):
+            self.get_cards()
+
+    def test_tags_change_refreshes_card(self):
+        worksheet = self.worksheets[1]
+        # usage_count пересчитывается после коммита
+        with self.captureOnCommitCallbacks(execute=True):
+            worksheet.tags.add(self.tag)
+
+        cards = self.get_cards()
+        self.assertEqual([tag['slug'] for tag in cards[worksheet.pk]['tags']], ['slozhenie'])
+        self.assertEqual(cards[worksheet.pk]['tags'][0]['usage_count'], 1)
+
+    def test_category_rename_refreshes_all_cards(self):
+        self.category.name = 'Арифметика'
+        self.category.save()
+
+        cards = self.get_cards()
+        self.assertEqual({card['category_name'] for card in cards.values()}, {'Арифметика'})
+
+
+class DownloadAccelTests(TestCase):
+    """Скачивание PDF через nginx (X-Accel-Redirect)"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Математика', slug='matematika')
+        self.worksheet = create_worksheet(category, 1, is_published=True)
+        self.worksheet.pdf_file.save('list-1.pdf', ContentFile(b'%PDF-1.4 test'), save=True)
+
+    @override_settings(WORKSHEETS_DOWNLOAD_ACCEL=True, WORKSHEETS_DOWNLOAD_ACCEL_PREFIX='/protected-media/')
+    def test_accel_redirect_path(self):
+        response = self.client.get(f'/api/worksheets/{self.worksheet.pk}/download/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        accel_path = response['X-Accel-Redirect']
+        self.assertTrue(accel_path.startswith('/protected-media/worksheets/pdf/'), accel_path)
+        self.assertEqual(accel_path, f'/protected-media/{self.worksheet.pdf_file.name}')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(
+            response['Content-Disposition'],
+            f'attachment; filename="{self.worksheet.slug}.pdf"'
+        )
+        self.assertEqual(counters.pending([self.worksheet.pk]), {self.worksheet.pk: {'downloads_count': 1}})
+
+    @override_settings(WORKSHEETS_DOWNLOAD_ACCEL=False)
+    def test_without_accel_django_streams_file(self):
+        response = self.client.get(f'/api/worksheets/{self.worksheet.pk}/download/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Accel-Redirect', response)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 test')
+
+
+class DedupeMediaTests(TestCase):
+    """manage.py dedupe_media и повторный импорт со старыми именами"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Математика', slug='matematika')
+        # Файл из старого импорта: имя без хэша
+        self.legacy_name = FileSystemStorage().save('worksheets/pdf/old-list.pdf', ContentFile(b'%PDF-1.4 old'))
+        self.worksheet = create_worksheet(self.category, 1)
+        Worksheet.objects.filter(pk=self.worksheet.pk).update(pdf_file=self.legacy_name)
+
+    def test_reimport_keeps_hashed_name(self):
+        call_command('dedupe_media', stdout=StringIO())
+
+        self.worksheet.refresh_from_db()
+        hashed_name = self.worksheet.pdf_file.name
+        self.assertNotEqual(hashed_name, self.legacy_name)
+        self.assertFalse(media_storage.exists(self.legacy_name))
+        self.assertEqual(MediaAlias.objects.get(name=self.legacy_name).hashed_name, hashed_name)
+
+        importer = WorksheetImporter(log=lambda message: None)
+        importer.import_rows([{
+            'title': self.worksheet.title,
+            'slug': self.worksheet.slug,
+            'description': 'Описание',
+            'category_slug': self.category.slug,
+            'grade_level': 'grade1',
+            'difficulty': 'easy',
+            'pdf_file': self.legacy_name,
+        }])
+        importer.finish()
+
+        self.worksheet.refresh_from_db()
+        self.assertEqual(self.worksheet.pdf_file.name, hashed_name)
+        self.assertEqual(importer.stats['files_missing'], 0)
+
+    def test_bumps_content_version(self):
+        version = get_content_version()
+        call_command('dedupe_media', stdout=StringIO())
+        self.assertNotEqual(get_content_version(), version)
+
+
+class WorksheetImporterTests(TestCase):
+    """Теги и индекс похожих пересчитываются один раз, а не на каждую пачку"""
+
+    def setUp(self):
+        self.algebra = Category.objects.create(name='Алгебра', slug='algebra')
+        self.geometry = Category.objects.create(name='Геометрия', slug='geometriya')
+        self.tag = Tag.objects.create(name='Уравнения', slug='uravneniya')
+
+    def make_row(self, number, category, is_published=True):
+        return {
+            'title': f'Рабочий лист {number}',
+            'slug': f'list-{number}',
+            'description': 'Описание',
+            'category_slug': category.slug,
+            'grade_level': 'grade1',
+            'difficulty': 'easy',
+            'pdf_file': f'worksheets/pdf/list-{number}.pdf',
+            'tag_slugs': self.tag.slug,
+            'is_published': is_published,
+        }
+
+    def run_import(self, batches):
+        importer = WorksheetImporter(check_files=False, log=lambda message: None)
+        with self.captureOnCommitCallbacks(execute=True):
+            for rows in batches:
+                importer.import_rows(rows)
+                importer.flush()
+            importer.finish()
+        return importer
+
+    def test_tag_counts_recounted_once(self):
+        self.run_import([[self.make_row(number, self.algebra) for number in range(4)]])
+
+        recount = mock.patch.object(
+            type(Tag.objects.all()), 'update_usage_counts', autospec=True,
+            side_effect=type(Tag.objects.all()).update_usage_counts
+        )
+        with recount as update_usage_counts:
+            # Обновление двумя пачками: два листа снимаются с публикации
+            self.run_import([
+                [self.make_row(0, self.algebra, is_published=False), self.make_row(1, self.algebra)],
+                [self.make_row(2, self.algebra, is_published=False), self.make_row(3, self.algebra)],
+            ])
+
+        self.assertEqual(update_usage_counts.call_count, 1)
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.usage_count, 2)
+
+    def test_moved_worksheet_leaves_old_category_similar(self):
+        self.run_import([[self.make_row(number, self.algebra) for number in range(3)]])
+        moved = Worksheet.objects.get(slug='list-0')
+        self.assertTrue(SimilarWorksheet.objects.filter(similar=moved).exists())
+
+        with mock.patch.object(similarity, 'refresh', wraps=similarity.refresh) as refresh:
+            self.run_import([[self.make_row(0, self.geometry)]])
+
+        self.assertEqual(
+            sorted(call.args[0] for call in refresh.call_args_list),
+            sorted([self.algebra.pk, self.geometry.pk])
+        )
+        self.assertFalse(
+            SimilarWorksheet.objects.filter(similar=moved, worksheet__category=self.algebra).exists()
+        )
+
+
+def fake_preview_images(*args, **kwargs):
+    """Результат previews.render_preview_images без poppler: PNG 1x обоих видов"""
+    return {
+        kind: [{'format': 'png', 'scale': 1, 'width': width, 'height': width, 'data': f'{kind} new'.encode()}]
+        for kind, width in (('thumbnail', 300), ('preview', 800))
+    }
+
+
+@mock.patch('apps.worksheets.models.render_preview_images', side_effect=fake_preview_images)
+class RegeneratePreviewsTests(TestCase):
+    """Явное пересоздание превью рендерит PDF, а не берет готовые превью"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Математика', slug='matematika')
+        self.worksheet = create_worksheet(category, 1)
+        self.worksheet.pdf_file.save('list-1.pdf', ContentFile(b'%PDF-1.4 test'), save=False)
+        with self.worksheet.pdf_file.open('rb') as pdf:
+            pdf_hash = file_digest(pdf)
+
+        # Готовые превью во всех форматах и плотностях - их можно было бы взять без рендера
+        renditions = {
+            kind: [
+                {'format': image_format, 'width': width * scale, 'height': width * scale, 'name': f'old-{kind}'}
+                for image_format in ('png', 'webp', 'avif', 'jpeg')
+                for scale in (1, 2, 3)
+            ]
+            for kind, width in (('thumbnail', 300), ('preview', 800))
+        }
+        Worksheet.objects.filter(pk=self.worksheet.pk).update(
+            pdf_file=self.worksheet.pdf_file.name,
+            thumbnail=media_storage.save('worksheets/thumbnails/old.png', ContentFile(b'old thumbnail')),
+            preview_image=media_storage.save('worksheets/previews/old.png', ContentFile(b'old preview')),
+            preview_renditions=renditions,
+            preview_pdf_hash=pdf_hash,
+            preview_status=PreviewStatus.READY,
+        )
+        self.worksheet.refresh_from_db()
+        self.old_thumbnail = self.worksheet.thumbnail.name
+
+    def assert_rendered(self, render):
+        render.assert_called_once()
+        self.worksheet.refresh_from_db()
+        self.assertNotEqual(self.worksheet.thumbnail.name, self.old_thumbnail)
+        self.assertEqual(self.worksheet.thumbnail.read(), b'thumbnail new')
+        self.assertEqual(self.worksheet.preview_status, PreviewStatus.READY)
+
+    @override_settings(PREVIEW_GENERATION_ASYNC=False)
+    def test_sync_regenerate_renders_ready_worksheet(self, render):
+        jobs.enqueue_many(Worksheet.objects.filter(pk=self.worksheet.pk), force=True)
+        self.assert_rendered(render)
+
+    @override_settings(PREVIEW_GENERATION_ASYNC=True)
+    def test_queued_regenerate_renders_ready_worksheet(self, render):
+        """Превью другого листа с тем же PDF (например, старого рендера) не берутся"""
+        donor = create_worksheet(self.worksheet.category, 2)
+        previews = Worksheet.objects.filter(pk=self.worksheet.pk).values(
+            'pdf_file', 'thumbnail', 'preview_image', 'preview_renditions',
+            'preview_pdf_hash', 'preview_status'
+        ).get()
+        Worksheet.objects.filter(pk=donor.pk).update(**previews)
+        jobs.enqueue_many(Worksheet.objects.filter(pk=self.worksheet.pk), force=True)
+        job = jobs.claim_next_job()
+        self.assertTrue(job.force)
+        self.assertTrue(jobs.run_job(job))
+        self.assert_rendered(render)
+
+    @override_settings(PREVIEW_GENERATION_ASYNC=False)
+    def test_own_previews_are_not_reused(self, render):
+        """Без force лист не берет превью у самого себя"""
+        jobs.enqueue_previews(self.worksheet)
+        self.assert_rendered(render)
@@ -28,7 +28,15 @@ urlpatterns = [
     # GET /api/worksheets/slozhenie-v-predelah-10/
     path('<slug:slug>/', views.WorksheetDetailView.as_view(), name='detail'),
 
+    # Страница worksheet одним запросом: карточка + похожие + хлебные крошки
+    # GET /api/worksheets/slozhenie-v-predelah-10/bundle/
+    path('<slug:slug>/bundle/', views.WorksheetBundleView.as_view(), name='bundle'),
+
     # Похожие worksheet
     # GET /api/worksheets/slozhenie-v-predelah-10/similar/
     path('<slug:slug>/similar/', views.WorksheetSimilarView.as_view(), name='similar'),
+
+    # Рекомендации по общим тегам
+    # GET /api/worksheets/slozhenie-v-predelah-10/recommendations/
+    path('<slug:slug>/recommendations/', views.WorksheetRecommendationsView.as_view(), name='recommendations'),
 ]
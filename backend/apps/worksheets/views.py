@@ -5,7 +5,8 @@ Views для API рабочих листов
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.http import FileResponse, Http404
+from django.http import Http404
+from django.db.models import prefetch_related_objects
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet, CharFilter
 from rest_framework import filters
@@ -13,9 +14,14 @@ from rest_framework import filters
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 
-from .models import Worksheet
-from .serializers import WorksheetListSerializer, WorksheetDetailSerializer
+from apps.categories.models import Category
+
+from .cards import CachedCardsMixin
+from .downloads import build_download_response
+from .models import LIST_FIELDS, Worksheet
+from .serializers import WorksheetBundleSerializer, WorksheetListSerializer, WorksheetDetailSerializer
 from .pagination import WorksheetPagination
+from .search import search_worksheets
 
 
 class WorksheetFilter(FilterSet):
@@ -32,8 +38,6 @@ class WorksheetFilter(FilterSet):
         if not value:
             return queryset
 
-        from apps.categories.models import Category
-
         try:
             category = Category.objects.get(slug=value, is_active=True)
 
@@ -55,6 +59,23 @@ class WorksheetFilter(FilterSet):
         return queryset.filter(category__slug__in=slugs)
 
 
+class WorksheetSearchFilter(filters.SearchFilter):
+    """
+    Полнотекстовый поиск по ?search= через apps.worksheets.search
+
+    Если сортировка не задана явно (?ordering=), результаты
+    сортируются по релевантности. Должен стоять после OrderingFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+
+        order_by_rank = not request.query_params.get(filters.OrderingFilter.ordering_param)
+        return search_worksheets(queryset, query, order_by_rank=order_by_rank)
+
+
 @extend_schema(
     tags=['Рабочие листы'],
     summary='Список рабочих листов',
@@ -62,7 +83,8 @@ class WorksheetFilter(FilterSet):
     Получить список всех опубликованных рабочих листов с пагинацией.
 
     Поддерживает фильтрацию по категории, уровню обучения, сложности,
-    поиск по названию и описанию, а также сортировку по различным полям.
+    полнотекстовый поиск (название, описание, теги, категория) с ранжированием
+    по релевантности, а также сортировку по различным полям.
     ''',
     parameters=[
         OpenApiParameter(
@@ -79,6 +101,14 @@ class WorksheetFilter(FilterSet):
             description='Количество элементов на странице (по умолчанию 20, максимум 100)',
             required=False,
         ),
+        OpenApiParameter(
+            name='cursor',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description='Keyset-пагинация для бесконечной ленты: пустое значение - первая страница, '
+                        'дальше - ссылка next. Без count/total_pages, сортировка по дате создания',
+            required=False,
+        ),
         OpenApiParameter(
             name='category',
             type=OpenApiTypes.INT,
@@ -104,7 +134,7 @@ class WorksheetFilter(FilterSet):
             name='search',
             type=OpenApiTypes.STR,
             location=OpenApiParameter.QUERY,
-            description='Поиск по названию и описанию',
+            description='Полнотекстовый поиск по названию, описанию, тегам и категории (с ранжированием)',
             required=False,
         ),
         OpenApiParameter(
@@ -133,16 +163,15 @@ class WorksheetFilter(FilterSet):
         ),
     ],
 )
-class WorksheetListView(generics.ListAPIView):
+class WorksheetListView(CachedCardsMixin, generics.ListAPIView):
     """
     Список всех рабочих листов для каталога с пагинацией
     """
-    queryset = Worksheet.objects.filter(is_published=True).select_related('category').prefetch_related('tags')
+    queryset = Worksheet.objects.filter(is_published=True).for_list()
     serializer_class = WorksheetListSerializer
     pagination_class = WorksheetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, WorksheetSearchFilter]
     filterset_class = WorksheetFilter
-    search_fields = ['title', 'description']
     ordering_fields = ['created_at', 'views_count', 'downloads_count', 'title']
     ordering = ['-created_at']
 
@@ -185,14 +214,77 @@ class WorksheetDetailView(generics.RetrieveAPIView):
         return Response(serializer.data)
 
 
+@extend_schema(
+    tags=['Рабочие листы'],
+    summary='Страница рабочего листа одним запросом',
+    description='''
+    Карточка рабочего листа, похожие листы и хлебные крошки категорий в одном ответе.
+
+    Заменяет запросы /api/worksheets/{slug}/ + /similar/ на странице worksheet:
+    лист ищется один раз, теги листа и похожих загружаются одним запросом.
+    Как и детальный endpoint, увеличивает счетчик просмотров.
+    ''',
+    parameters=[
+        OpenApiParameter(
+            name='slug',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.PATH,
+            description='Уникальный slug рабочего листа',
+            required=True,
+        ),
+    ],
+)
+class WorksheetBundleView(generics.GenericAPIView):
+    """
+    Данные страницы рабочего листа: карточка + похожие + хлебные крошки
+    """
+    serializer_class = WorksheetBundleSerializer
+
+    def get(self, request, slug):
+        worksheet = get_object_or_404(Worksheet.objects.filter(is_published=True), slug=slug)
+
+        # Категория с количеством листов в аннотации (без запросов count в сериализаторе)
+        worksheet.category = (
+            Category.objects.with_worksheets_count()
+            .select_related('parent')
+            .get(pk=worksheet.category_id)
+        )
+
+        similar = list(
+            Worksheet.objects.filter(
+                is_published=True,
+                similar_for__worksheet=worksheet,
+            ).select_related('category__parent').only(*LIST_FIELDS).order_by('similar_for__position')
+        )
+        # Теги листа и всех похожих - одним запросом
+        prefetch_related_objects([worksheet, *similar], 'tags')
+
+        worksheet.increment_views()
+
+        breadcrumbs = [worksheet.category]
+        if worksheet.category.parent:
+            breadcrumbs.insert(0, worksheet.category.parent)
+
+        serializer = self.get_serializer({
+            'worksheet': worksheet,
+            'similar': similar,
+            'breadcrumbs': breadcrumbs,
+        })
+        return Response(serializer.data)
+
+
 @extend_schema(
     tags=['Рабочие листы'],
     summary='Скачать PDF файл',
     description='''
     Скачать PDF файл рабочего листа по его ID.
 
-    При каждом скачивании автоматически увеличивается счетчик downloads_count.
+    При каждом скачивании автоматически увеличивается счетчик downloads_count
+    (один раз на скачивание: куски докачки и ответы 304 не считаются).
     Возвращает PDF файл с правильным именем для скачивания.
+
+    Поддерживает докачку (Range -> 206) и условные запросы
+    (ETag / Last-Modified -> 304).
     ''',
     parameters=[
         OpenApiParameter(
@@ -209,6 +301,14 @@ class WorksheetDetailView(generics.RetrieveAPIView):
             'format': 'binary',
             'description': 'PDF файл рабочего листа',
         },
+        206: {
+            'type': 'string',
+            'format': 'binary',
+            'description': 'Запрошенный диапазон байт PDF файла',
+        },
+        304: {
+            'description': 'Файл не изменился',
+        },
         404: {
             'description': 'Рабочий лист или PDF файл не найден',
         },
@@ -231,26 +331,23 @@ class WorksheetDownloadView(APIView):
         if not worksheet.pdf_file:
             raise Http404("PDF файл не найден")
 
-        # Увеличиваем счетчик скачиваний
-        worksheet.increment_downloads()
+        # Сам файл отдает nginx (X-Accel-Redirect) или Django (локально)
+        response, started = build_download_response(request, worksheet)
 
-        # Возвращаем PDF файл для скачивания
-        response = FileResponse(
-            worksheet.pdf_file.open('rb'),
-            content_type='application/pdf'
-        )
-
-        # Устанавливаем заголовок для скачивания файла
-        filename = f"{worksheet.slug}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        # Увеличиваем счетчик скачиваний (не для 304 и продолжений докачки)
+        if started:
+            worksheet.increment_downloads()
 
         return response
 
 
-class WorksheetSearchView(generics.ListAPIView):
+class WorksheetSearchView(CachedCardsMixin, generics.ListAPIView):
     """
     Поиск рабочих листов с пагинацией
 
+    Ищет по названию, описанию, тегам и категории,
+    результаты отсортированы по релевантности.
+
     GET /api/worksheets/search/?q=<запрос>
 
     Параметры:
@@ -270,13 +367,13 @@ class WorksheetSearchView(generics.ListAPIView):
         if not query:
             return Worksheet.objects.none()
 
-        return Worksheet.objects.filter(
-            is_published=True,
-            title__icontains=query
-        ).select_related('category').prefetch_related('tags')
+        queryset = Worksheet.objects.filter(is_published=True).for_list()
+
+        # Полнотекстовый поиск с сортировкой по релевантности
+        return search_worksheets(queryset, query)
 
 
-class FeaturedWorksheetsView(generics.ListAPIView):
+class FeaturedWorksheetsView(CachedCardsMixin, generics.ListAPIView):
     """
     Избранные рабочие листы для главной страницы
 
@@ -287,11 +384,11 @@ class FeaturedWorksheetsView(generics.ListAPIView):
     queryset = Worksheet.objects.filter(
         is_published=True,
         is_featured=True
-    ).select_related('category').prefetch_related('tags')[:12]
+    ).for_list()[:12]
     serializer_class = WorksheetListSerializer
 
 
-class WorksheetsByCategoryView(generics.ListAPIView):
+class WorksheetsByCategoryView(CachedCardsMixin, generics.ListAPIView):
     """
     Список worksheets по категории с пагинацией
 
@@ -300,6 +397,7 @@ class WorksheetsByCategoryView(generics.ListAPIView):
     Параметры:
     - page: номер страницы
     - page_size: количество элементов
+    - cursor: keyset-пагинация (см. WorksheetPagination)
 
     Если категория родительская - возвращает worksheets из всех дочерних категорий
     Если категория дочерняя - только её worksheets
@@ -315,8 +413,6 @@ class WorksheetsByCategoryView(generics.ListAPIView):
     def get_queryset(self):
         category_slug = self.kwargs.get('category_slug')
 
-        from apps.categories.models import Category
-
         # Получаем категорию
         category = get_object_or_404(Category, slug=category_slug, is_active=True)
 
@@ -329,16 +425,16 @@ class WorksheetsByCategoryView(generics.ListAPIView):
             return Worksheet.objects.filter(
                 is_published=True,
                 category_id__in=category_ids
-            ).select_related('category').prefetch_related('tags')
+            ).for_list()
         else:
             # Если это дочерняя категория - только ее worksheets
             return Worksheet.objects.filter(
                 is_published=True,
                 category=category
-            ).select_related('category').prefetch_related('tags')
+            ).for_list()
 
 
-class WorksheetsByTagView(generics.ListAPIView):
+class WorksheetsByTagView(CachedCardsMixin, generics.ListAPIView):
     """
     Список worksheets по тегу с пагинацией
 
@@ -347,6 +443,7 @@ class WorksheetsByTagView(generics.ListAPIView):
     Параметры:
     - page: номер страницы
     - page_size: количество элементов
+    - cursor: keyset-пагинация (см. WorksheetPagination)
 
     Примеры:
     - GET /api/tags/matematika/worksheets/
@@ -365,7 +462,7 @@ class WorksheetsByTagView(generics.ListAPIView):
         return Worksheet.objects.filter(
             is_published=True,
             tags=tag
-        ).select_related('category').prefetch_related('tags')
+        ).for_list()
 
 
 @extend_schema(
@@ -374,7 +471,9 @@ class WorksheetsByTagView(generics.ListAPIView):
     description='''
     Получить похожие рабочие листы из той же категории.
 
-    Возвращает до 4 рандомных worksheet из той же категории, исключая текущий.
+    Возвращает до 4 worksheet из той же категории (без пагинации), исключая текущий,
+    по убыванию сходства: общие теги, тот же класс, та же сложность.
+    Список предвычислен (см. apps/worksheets/similarity.py) и стабилен между запросами.
     Полезно для блока "Вам может понравиться" на странице worksheet.
     ''',
     parameters=[
@@ -387,25 +486,62 @@ class WorksheetsByTagView(generics.ListAPIView):
         ),
     ],
 )
-class WorksheetSimilarView(generics.ListAPIView):
+class WorksheetSimilarView(CachedCardsMixin, generics.ListAPIView):
     """
     Получение похожих рабочих листов из той же категории
+
+    Читает предвычисленный индекс SimilarWorksheet одним запросом
+    (плюс prefetch тегов) вместо ORDER BY RANDOM() по всей категории
     """
     serializer_class = WorksheetListSerializer
+    pagination_class = None
 
     def get_queryset(self):
-        slug = self.kwargs.get('slug')
+        return Worksheet.objects.filter(
+            is_published=True,
+            similar_for__worksheet__slug=self.kwargs.get('slug'),
+            similar_for__worksheet__is_published=True,
+        ).for_list().order_by('similar_for__position')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+
+        # Пустой список - проверяем, существует ли сам worksheet (как раньше, 404)
+        if not response.data and not Worksheet.objects.filter(
+            is_published=True, slug=self.kwargs.get('slug')
+        ).exists():
+            raise Http404
+        return response
 
-        # Получаем текущий worksheet
-        worksheet = get_object_or_404(
-            Worksheet.objects.filter(is_published=True),
-            slug=slug
-        )
 
-        # Возвращаем 4 рандомных worksheet из той же категории (кроме текущего)
+@extend_schema(
+    tags=['Рабочие листы'],
+    summary='Рекомендации по тегам',
+    description='''
+    Получить рекомендации "Вам может понравиться" по пересечению тегов.
+
+    Возвращает до 8 worksheet из любых категорий (без пагинации) по убыванию
+    сходства наборов тегов. Рекомендации пересчитываются пакетно
+    (manage.py build_recommendations, см. apps/worksheets/recommendations.py).
+    ''',
+    parameters=[
+        OpenApiParameter(
+            name='slug',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.PATH,
+            description='Slug рабочего листа',
+            required=True,
+        ),
+    ],
+)
+class WorksheetRecommendationsView(WorksheetSimilarView):
+    """
+    Рекомендации по общим тегам из предвычисленной таблицы WorksheetRecommendation
+    """
+
+    def get_queryset(self):
         return Worksheet.objects.filter(
             is_published=True,
-            category=worksheet.category
-        ).exclude(
-            id=worksheet.id
-        ).select_related('category').prefetch_related('tags').order_by('?')[:4]
+            recommended_for__worksheet__slug=self.kwargs.get('slug'),
+            recommended_for__worksheet__is_published=True,
+        ).for_list().order_by('recommended_for__position')
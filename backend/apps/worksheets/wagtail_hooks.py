@@ -6,7 +6,7 @@ Wagtail ModelAdmin для рабочих листов
 from wagtail_modeladmin.options import ModelAdmin, modeladmin_register
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from django.utils.html import format_html
-from .models import Worksheet
+from .models import PreviewStatus, Worksheet
 
 
 class WorksheetAdmin(ModelAdmin):
@@ -79,7 +79,12 @@ class WorksheetAdmin(ModelAdmin):
     ]
 
     def thumbnail_preview(self, obj):
-        """Показывает миниатюру в списке"""
+        """Показывает миниатюру в списке (или статус, пока она генерируется)"""
+        if obj.preview_status in (PreviewStatus.PENDING, PreviewStatus.PROCESSING, PreviewStatus.FAILED):
+            return format_html(
+                '<div style="width: 60px; height: 80px; background: #f0f0f0; border-radius: 4px; display: flex; align-items: center; justify-content: center; font-size: 10px; color: #999;">{}</div>',
+                obj.get_preview_status_display()
+            )
         if obj.thumbnail:
             return format_html(
                 '<img src="{}" style="width: 60px; height: 80px; object-fit: cover; border-radius: 4px;" />',
@@ -64,6 +64,7 @@ INSTALLED_APPS = [
     'drf_spectacular',  # API документация (Swagger/OpenAPI)
 
     # Наши приложения
+    'apps.core',
     'apps.worksheets',
     'apps.categories',
     'apps.tags',
@@ -172,6 +173,50 @@ STATIC_ROOT = BASE_DIR / 'static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# ====================
+# CACHE
+# ====================
+# Кэш должен быть общим для всех процессов: версия контента для кэша API
+# (apps/core/cache.py) меняется в одном воркере или в preview_worker,
+# а читается всеми. Локально - файловый кэш, в production - Redis
+# (docker-compose.prod.yml, CACHE_BACKEND/CACHE_LOCATION).
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache')
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache'))
+
+# Лимит файлового/локального кэша. По умолчанию Django держит 300 записей,
+# а одних карточек каталога (apps/worksheets/cards.py) около тысячи на хост.
+# Файловый кэш перечисляет каталог при каждой записи - для большого
+# каталога используйте Redis, а не увеличивайте лимит.
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '5000'))
+
+# При переполнении удаляется 1/CULL_FREQUENCY записей
+CACHE_CULL_FREQUENCY = int(os.getenv('CACHE_CULL_FREQUENCY', '4'))
+
+_IS_FILE_CACHE = CACHE_BACKEND.endswith('FileBasedCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION,
+        # У Redis/Memcached своя политика вытеснения, OPTIONS у них другие
+        'OPTIONS': {
+            'MAX_ENTRIES': CACHE_MAX_ENTRIES,
+            'CULL_FREQUENCY': CACHE_CULL_FREQUENCY,
+        } if _IS_FILE_CACHE or CACHE_BACKEND.endswith('LocMemCache') else {},
+    },
+    # Версии контента: без срока жизни и не должны вытесняться.
+    # Файловый кэш держит их в отдельном каталоге (там 1-2 записи, до лимита
+    # не доходит), в Redis ключи без TTL не вытесняются при
+    # maxmemory-policy volatile-lru.
+    'versions': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': str(Path(CACHE_LOCATION) / 'versions') if _IS_FILE_CACHE else CACHE_LOCATION,
+        'KEY_PREFIX': 'versions',
+        'TIMEOUT': None,
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -307,3 +352,49 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50 MB
 
 # Допустимые форматы файлов
 ALLOWED_UPLOAD_EXTENSIONS = ['pdf', 'png', 'jpg', 'jpeg']
+
+# Генерация превью в фоне (manage.py run_preview_worker).
+# False - генерировать сразу при сохранении (удобно локально без воркера)
+PREVIEW_GENERATION_ASYNC = os.getenv('PREVIEW_GENERATION_ASYNC', 'True') == 'True'
+
+# Форматы превью в порядке предпочтения (PNG сохраняется всегда как запасной).
+# avif требует Pillow >= 11.2 или pip install pillow-avif-plugin
+PREVIEW_FORMATS = os.getenv('PREVIEW_FORMATS', 'webp,png').split(',')
+
+
+# ====================
+# СКАЧИВАНИЕ PDF
+# ====================
+# True - Django только считает скачивание, файл отдает nginx
+# через X-Accel-Redirect (см. apps/worksheets/downloads.py).
+# False - файл отдается самим Django (локально без nginx)
+WORKSHEETS_DOWNLOAD_ACCEL = os.getenv('WORKSHEETS_DOWNLOAD_ACCEL', 'False') == 'True'
+
+# internal-location nginx, смотрящий на MEDIA_ROOT
+WORKSHEETS_DOWNLOAD_ACCEL_PREFIX = os.getenv('WORKSHEETS_DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+
+
+# ====================
+# СЧЕТЧИКИ ПРОСМОТРОВ И СКАЧИВАНИЙ
+# ====================
+# Инкременты копятся в общей таблице CounterIncrement и сбрасываются
+# в worksheets пачкой (см. apps/worksheets/counters.py)
+
+# Интервал сброса в секундах (0 - писать в worksheets сразу)
+COUNTERS_FLUSH_INTERVAL = int(os.getenv('COUNTERS_FLUSH_INTERVAL', '10'))
+
+# Досрочный сброс, если процесс добавил столько инкрементов с прошлого сброса
+COUNTERS_FLUSH_THRESHOLD = int(os.getenv('COUNTERS_FLUSH_THRESHOLD', '500'))
+
+
+# ====================
+# ПАГИНАЦИЯ СПИСКОВ
+# ====================
+# Количество для каждой комбинации фильтров кэшируется до смены
+# версии контента (см. apps/worksheets/pagination.py)
+
+# Для листинга без фильтров отдавать оценку планировщика PostgreSQL вместо COUNT(*)
+WORKSHEETS_ESTIMATED_COUNT = os.getenv('WORKSHEETS_ESTIMATED_COUNT', 'False') == 'True'
+
+# Оценка используется, только если строк не меньше этого числа
+WORKSHEETS_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('WORKSHEETS_ESTIMATED_COUNT_THRESHOLD', '10000'))
@@ -27,6 +27,9 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '').split(',')
 USE_X_FORWARDED_HOST = True
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
+# PDF отдает nginx (X-Accel-Redirect), воркеры gunicorn не заняты скачиванием
+WORKSHEETS_DOWNLOAD_ACCEL = os.getenv('WORKSHEETS_DOWNLOAD_ACCEL', 'True') == 'True'
+
 # Security settings
 SECURE_SSL_REDIRECT = False  # Отключаем, т.к. редирект делает nginx
 SESSION_COOKIE_SECURE = True
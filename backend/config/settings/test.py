@@ -0,0 +1,35 @@
+"""
+Test settings
+Настройки для запуска тестов (pytest, см. pytest.ini)
+"""
+
+import tempfile
+
+from .base import *
+
+DEBUG = False
+
+# Тестовая база в файле, а не в памяти: тесты счетчиков пишут
+# в нее из нескольких потоков одновременно
+DATABASES['default']['OPTIONS'] = {'timeout': 30}
+DATABASES['default']['TEST'] = {
+    'NAME': str(Path(tempfile.gettempdir()) / 'smartleaves_test.sqlite3'),
+}
+
+# Кэш и медиа тестов не должны попадать в рабочие каталоги
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'versions',
+    },
+}
+MEDIA_ROOT = Path(tempfile.mkdtemp(prefix='smartleaves_media_'))
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Счетчики сбрасываются только явно (counters.flush())
+COUNTERS_FLUSH_INTERVAL = 3600
+COUNTERS_FLUSH_THRESHOLD = 10 ** 9
@@ -2,6 +2,7 @@ import { apiClient } from './client'
 import type {
   WorksheetListItem,
   WorksheetDetail,
+  WorksheetBundle,
   PaginatedResponse
 } from '@/types'
 
@@ -34,6 +35,14 @@ export const worksheetsApi = {
     return data
   },
 
+  /**
+   * Получить карточку, похожие листы и хлебные крошки одним запросом
+   */
+  async getBundle(slug: string): Promise<WorksheetBundle> {
+    const { data } = await apiClient.get(`/api/worksheets/${slug}/bundle/`)
+    return data
+  },
+
   /**
    * Получить URL для скачивания PDF файла
    */
@@ -34,6 +34,14 @@ export interface CategoryTree extends Category {
 export type GradeLevel = 'preschool' | 'kindergarten' | 'grade1' | 'grade2' | 'grade3' | 'grade4' | 'grade5'
 export type Difficulty = 'easy' | 'medium' | 'hard'
 
+// Источник для <picture>: один формат превью во всех плотностях (1x/2x)
+export interface PictureSource {
+  type: string
+  srcset: string
+  width: number | null
+  height: number | null
+}
+
 export interface WorksheetListItem {
   id: number
   title: string
@@ -45,6 +53,7 @@ export interface WorksheetListItem {
   grade_level: GradeLevel
   difficulty: Difficulty
   thumbnail: string | null
+  thumbnail_sources: PictureSource[]
   tags: Tag[]
   views_count: number
   downloads_count: number
@@ -61,7 +70,9 @@ export interface WorksheetDetail {
   grade_level: GradeLevel
   difficulty: Difficulty
   thumbnail: string | null
+  thumbnail_sources: PictureSource[]
   preview_image: string | null
+  preview_sources: PictureSource[]
   pdf_file: string
   tags: Tag[]
   views_count: number
@@ -71,6 +82,13 @@ export interface WorksheetDetail {
   updated_at: string
 }
 
+// Страница рабочего листа одним запросом (/api/worksheets/{slug}/bundle/)
+export interface WorksheetBundle {
+  worksheet: WorksheetDetail
+  similar: WorksheetListItem[]
+  breadcrumbs: CategoryParent[]
+}
+
 export interface PaginatedResponse<T> {
   count: number
   total_pages: number
@@ -24,23 +24,9 @@ if [ ! -f "worksheets_data.json" ]; then
     exit 1
 fi
 
-# 1. Импорт категорий
+# 1. Медиа файлы (до импорта: команда проверяет наличие PDF)
 echo ""
-echo "📦 Шаг 1/4: Импорт категорий..."
-docker cp categories_data.json smartleaves_backend:/app/
-docker cp import_categories.py smartleaves_backend:/app/
-docker compose -f docker-compose.prod.yml exec backend python /app/import_categories.py
-
-# 2. Импорт тегов
-echo ""
-echo "📦 Шаг 2/4: Импорт тегов..."
-docker cp tags_data.json smartleaves_backend:/app/
-docker cp import_tags.py smartleaves_backend:/app/
-docker compose -f docker-compose.prod.yml exec backend python /app/import_tags.py
-
-# 3. Медиа файлы
-echo ""
-echo "📦 Шаг 3/4: Копирование медиа файлов..."
+echo "📦 Шаг 1/2: Копирование медиа файлов..."
 if [ -f "media_files.tar.gz" ]; then
     echo "Распаковка media_files.tar.gz..."
     tar -xzf media_files.tar.gz
@@ -56,12 +42,15 @@ else
     echo "   Скопируйте архив на сервер: scp media_files.tar.gz deploy@server:/var/www/smartleaves/"
 fi
 
-# 4. Импорт worksheets
+# 2. Импорт категорий, тегов и worksheets одним процессом и одной транзакцией
 echo ""
-echo "📦 Шаг 4/4: Импорт рабочих листов..."
+echo "📦 Шаг 2/2: Импорт каталога..."
+docker cp categories_data.json smartleaves_backend:/app/
+docker cp tags_data.json smartleaves_backend:/app/
 docker cp worksheets_data.json smartleaves_backend:/app/
-docker cp import_worksheets.py smartleaves_backend:/app/
-docker compose -f docker-compose.prod.yml exec backend python /app/import_worksheets.py
+# JSON-сводка сохраняется в import_summary.json, предупреждения - в консоль
+docker compose -f docker-compose.prod.yml exec -T backend python manage.py import_catalog --dir /app --json > import_summary.json
+echo "📊 Сводка импорта: import_summary.json"
 
 # Итоговая проверка
 echo ""
@@ -4,6 +4,9 @@
 ВАЖНО: Перед запуском скрипта убедитесь, что медиа файлы уже скопированы!
 
 Использование: python import_worksheets.py
+
+Для больших файлов быстрее команда с bulk-запросами в одной транзакции:
+    python manage.py import_worksheets worksheets_data.json
 """
 
 import json
@@ -19,6 +22,7 @@ django.setup()
 from apps.worksheets.models import Worksheet
 from apps.categories.models import Category
 from apps.tags.models import Tag
+from apps.tags.usage import deferred_usage_counts
 
 
 def import_worksheets(json_file='worksheets_data.json'):
@@ -48,65 +52,67 @@ def import_worksheets(json_file='worksheets_data.json'):
     files_missing_count = 0
 
     print("\n⏳ Импорт рабочих листов...")
-    for ws_data in worksheets_data:
-        try:
-            # Находим категорию по slug
-            category = None
-            if ws_data.get('category_slug'):
-                try:
-                    category = Category.objects.get(slug=ws_data['category_slug'])
-                except Category.DoesNotExist:
-                    print(f"  ⚠️  Категория '{ws_data['category_slug']}' не найдена для '{ws_data['title']}'")
+    # usage_count тегов пересчитывается один раз в конце, а не на каждый tags.set()
+    with deferred_usage_counts():
+        for ws_data in worksheets_data:
+            try:
+                # Находим категорию по slug
+                category = None
+                if ws_data.get('category_slug'):
+                    try:
+                        category = Category.objects.get(slug=ws_data['category_slug'])
+                    except Category.DoesNotExist:
+                        print(f"  ⚠️  Категория '{ws_data['category_slug']}' не найдена для '{ws_data['title']}'")
+                        skipped_count += 1
+                        continue
+
+                if not category:
+                    print(f"  ⚠️  У '{ws_data['title']}' нет категории")
                     skipped_count += 1
                     continue
 
-            if not category:
-                print(f"  ⚠️  У '{ws_data['title']}' нет категории")
+                # Проверяем наличие PDF файла
+                pdf_path = os.path.join('/app/media', ws_data['pdf_file'])
+                if not os.path.exists(pdf_path):
+                    files_missing_count += 1
+                    # Все равно создаем, но предупреждаем
+                    # print(f"  ⚠️  PDF файл не найден: {ws_data['pdf_file']}")
+
+                # Создаем или обновляем worksheet
+                worksheet, created = Worksheet.objects.update_or_create(
+                    slug=ws_data['slug'],
+                    defaults={
+                        'title': ws_data['title'],
+                        'description': ws_data['description'],
+                        'category': category,
+                        'grade_level': ws_data['grade_level'],
+                        'difficulty': ws_data['difficulty'],
+                        'pdf_file': ws_data['pdf_file'],
+                        'thumbnail': ws_data['thumbnail'] or '',
+                        'preview_image': ws_data['preview_image'] or '',
+                        'meta_title': ws_data['meta_title'],
+                        'meta_description': ws_data['meta_description'],
+                        'is_featured': bool(ws_data['is_featured']),
+                        'is_published': bool(ws_data['is_published']),
+                    }
+                )
+
+                # Добавляем теги
+                if ws_data.get('tag_slugs'):
+                    tag_slugs = [s.strip() for s in ws_data['tag_slugs'].split(',') if s.strip()]
+                    tags = Tag.objects.filter(slug__in=tag_slugs)
+                    worksheet.tags.set(tags)
+
+                if created:
+                    created_count += 1
+                    if created_count % 50 == 0:
+                        print(f"  ✅ Создано: {created_count}...")
+                else:
+                    updated_count += 1
+
+            except Exception as e:
+                print(f"  ❌ Ошибка при импорте '{ws_data['title']}': {e}")
                 skipped_count += 1
-                continue
-
-            # Проверяем наличие PDF файла
-            pdf_path = os.path.join('/app/media', ws_data['pdf_file'])
-            if not os.path.exists(pdf_path):
-                files_missing_count += 1
-                # Все равно создаем, но предупреждаем
-                # print(f"  ⚠️  PDF файл не найден: {ws_data['pdf_file']}")
-
-            # Создаем или обновляем worksheet
-            worksheet, created = Worksheet.objects.update_or_create(
-                slug=ws_data['slug'],
-                defaults={
-                    'title': ws_data['title'],
-                    'description': ws_data['description'],
-                    'category': category,
-                    'grade_level': ws_data['grade_level'],
-                    'difficulty': ws_data['difficulty'],
-                    'pdf_file': ws_data['pdf_file'],
-                    'thumbnail': ws_data['thumbnail'] or '',
-                    'preview_image': ws_data['preview_image'] or '',
-                    'meta_title': ws_data['meta_title'],
-                    'meta_description': ws_data['meta_description'],
-                    'is_featured': bool(ws_data['is_featured']),
-                    'is_published': bool(ws_data['is_published']),
-                }
-            )
-
-            # Добавляем теги
-            if ws_data.get('tag_slugs'):
-                tag_slugs = [s.strip() for s in ws_data['tag_slugs'].split(',') if s.strip()]
-                tags = Tag.objects.filter(slug__in=tag_slugs)
-                worksheet.tags.set(tags)
-
-            if created:
-                created_count += 1
-                if created_count % 50 == 0:
-                    print(f"  ✅ Создано: {created_count}...")
-            else:
-                updated_count += 1
-
-        except Exception as e:
-            print(f"  ❌ Ошибка при импорте '{ws_data['title']}': {e}")
-            skipped_count += 1
 
     # Итоговая статистика
     print("\n" + "="*60)